@@ -0,0 +1,14 @@
+# backend/app/api/deps.py
+
+from fastapi import Request
+
+from app.services.rag_service import RAGService
+from app.services.ingestion_jobs import IngestionJobQueue
+
+def get_rag_service(request: Request) -> RAGService:
+    """Return the process-wide RAG service created in the app lifespan."""
+    return request.app.state.rag_service
+
+def get_ingestion_queue(request: Request) -> IngestionJobQueue:
+    """Return the background ingestion queue created in the app lifespan."""
+    return request.app.state.ingestion_queue
\ No newline at end of file
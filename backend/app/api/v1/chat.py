@@ -1,11 +1,16 @@
+import json
+from contextlib import aclosing
+from typing import Any, Dict
+
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
 
 from app.schemas.chat import ChatMessage, ChatResponse
 from app.services.chat import ChatService
 from app.core.logger import setup_logger
 from app.core.exceptions import ChatProcessingError, LLMError
-from app.db.deps import get_db
+from app.api.deps import get_rag_service
+from app.services.rag_service import RAGService
 
 router = APIRouter()
 logger = setup_logger(__name__)
@@ -14,38 +19,86 @@ logger = setup_logger(__name__)
 async def chat_endpoint(
         request: Request,
         message: ChatMessage,
-        db: Session = Depends(get_db)
+        rag_service: RAGService = Depends(get_rag_service)
 ) -> ChatResponse:
     """
     Process a chat message and return a response.
     """
-    logger.info(f"Received chat request with message: {message.message}")
-    logger.info(f"Request headers: {request.headers}")
+    # Sizes only: message and answer text can contain personal details
+    logger.info("Chat request", extra={"message_chars": len(message.message)})
 
     try:
-        logger.info("Initializing ChatService")
-        chat_service = ChatService(db)
-
-        logger.info("Processing message")
+        chat_service = ChatService(rag_service=rag_service)
         response = await chat_service.process_message(message.message)
 
-        logger.info(f"Generated response: {response}")
+        logger.info("Chat response", extra={"response_chars": len(response)})
         return ChatResponse(response=response)
 
     except (ChatProcessingError, LLMError) as e:
         logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
-        error_response = ChatResponse(
+        return ChatResponse(
             response="I apologize, but I encountered an error processing your message. Please try again.",
             error=str(e)
         )
-        logger.info(f"Sending error response: {error_response}")
-        return error_response
 
     except Exception as e:
         logger.error(f"Unexpected error in chat endpoint: {str(e)}", exc_info=True)
-        error_response = ChatResponse(
+        return ChatResponse(
             response="An unexpected error occurred. Please try again later.",
             error=str(e)
         )
-        logger.info(f"Sending error response: {error_response}")
-        return error_response
\ No newline at end of file
+
+@router.get("/cache")
+async def answer_cache_stats(rag_service: RAGService = Depends(get_rag_service)) -> Dict[str, Any]:
+    """
+    Return answer cache hit and miss counters for this worker.
+    """
+    if rag_service.answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **rag_service.answer_cache.stats()}
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def chat_stream_endpoint(
+        request: Request,
+        message: ChatMessage,
+        rag_service: RAGService = Depends(get_rag_service)
+) -> StreamingResponse:
+    """
+    Process a chat message and stream the response as Server-Sent Events.
+
+    Emits "token" events while the answer is generated, then a "done" event
+    with retrieval metadata, or an "error" event if generation fails.
+
+    Takes no database session: a dependency's session is closed before the
+    response body is streamed.
+    """
+    logger.info("Streaming chat request", extra={"message_chars": len(message.message)})
+    chat_service = ChatService(rag_service=rag_service)
+
+    async def event_stream():
+        try:
+            # aclosing() guarantees the upstream LLM stream is closed when we stop early
+            async with aclosing(chat_service.stream_message(message.message)) as events:
+                async for event in events:
+                    if await request.is_disconnected():
+                        logger.info("Client disconnected, cancelling generation")
+                        break
+                    yield _sse(event["event"], event["data"])
+
+        except Exception as e:
+            logger.error(f"Error in streaming chat endpoint: {str(e)}", exc_info=True)
+            yield _sse("error", {
+                "response": "I apologize, but I encountered an error processing your message. Please try again.",
+                "error": str(e)
+            })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so the first token reaches the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
\ No newline at end of file
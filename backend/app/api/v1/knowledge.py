@@ -1,18 +1,19 @@
 # backend/app/api/v1/knowledge.py
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+import asyncio
 import tempfile
-import os
-from datetime import datetime
-from sqlalchemy.orm import Session
+import shutil
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.document_processor import DocumentProcessor
 from app.services.document_service import DocumentService
-from app.db.session import SessionLocal
-from app.db.deps import get_db
-from langchain_community.vectorstores.pgvector import PGVector
-from langchain_openai import OpenAIEmbeddings
+from app.db import vector_index
+from app.schemas.knowledge import VectorIndexRequest
+from app.db.deps import get_async_db
+from app.api.deps import get_rag_service, get_ingestion_queue
+from app.services.rag_service import RAGService
+from app.services.ingestion_jobs import IngestionJobQueue
+from app.services.upload_storage import receive_uploads
 from app.core.config import get_settings
 import logging
 
@@ -20,95 +21,103 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 router = APIRouter()
 
-@router.post("/upload")
-async def upload_files(files: List[UploadFile] = File(...)):
+# Documents the body receive_uploads parses, as File(...) parameters would
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                    "required": ["files"],
+                }
+            }
+        },
+    }
+}
+
+@router.post("/upload", status_code=202, openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_files(
+        request: Request,
+        ingestion_queue: IngestionJobQueue = Depends(get_ingestion_queue)
+):
     """
     Upload knowledge base files (PDF or Markdown) to be processed and added to the vector store.
-    """
-    # Validate file types
-    for file in files:
-        if not (file.filename.endswith('.pdf') or file.filename.endswith('.md')):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type for {file.filename}. Only PDF and MD files are allowed."
-            )
 
+    The multipart body is parsed as it arrives and each file is streamed to
+    disk, then queued for background processing; poll GET
+    /knowledge/jobs/{job_id} for progress. A file over UPLOAD_MAX_FILE_BYTES
+    is rejected with 413 as soon as it goes over, and a request whose
+    Content-Length exceeds UPLOAD_MAX_FILES such files before any of it is read.
+    """
+    # The job owns this directory and removes it when it finishes
+    temp_dir = tempfile.mkdtemp(prefix="knowledge-upload-")
     try:
-        # Create temporary directory to store files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Save files to temporary directory
-            file_paths = []
-            file_names = []
-            for file in files:
-                file_path = os.path.join(temp_dir, file.filename)
-                with open(file_path, 'wb') as f:
-                    content = await file.read()
-                    f.write(content)
-                file_paths.append(file_path)
-                file_names.append(file.filename)
-
-            # Process documents
-            processor = DocumentProcessor()
-            await processor.process_documents(file_paths, clear_existing=True)
+        uploads = await receive_uploads(request, temp_dir)
+        file_names = [upload.filename for upload in uploads]
+
+        job = await ingestion_queue.submit(
+            [upload.path for upload in uploads],
+            temp_dir,
+            file_info={
+                upload.filename: {"content_hash": upload.content_hash, "size_bytes": upload.size_bytes}
+                for upload in uploads
+            },
+            file_names={upload.path: upload.filename for upload in uploads}
+        )
 
         return {
-            "message": "Files processed successfully",
+            "message": "Files queued for processing",
+            "job_id": job.id,
+            "status": job.status.value,
             "details": {
                 "processed_files": file_names,
                 "count": len(file_names)
             }
         }
 
+    except HTTPException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
     except Exception as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
         logger.error(f"Error processing files: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Error processing files: {str(e)}"
         )
 
+@router.get("/jobs/{job_id}")
+async def get_job(
+        job_id: str,
+        ingestion_queue: IngestionJobQueue = Depends(get_ingestion_queue)
+):
+    """
+    Get the status, per-stage progress and timings of an upload job.
+    """
+    job = await ingestion_queue.get_status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
 @router.get("/documents")
-async def list_documents():
+async def list_documents(
+        response: Response,
+        limit: int = Query(100, ge=1, le=1000),
+        offset: int = Query(0, ge=0),
+        db: AsyncSession = Depends(get_async_db)
+):
     """
-    Get a list of all processed documents in the vector store.
+    Get a page of processed documents from the document catalog, most recent first.
+
+    The total number of documents is returned in the X-Total-Count header.
     """
     try:
-        # Initialize PGVector store
-        vector_store = PGVector(
-            collection_name="portfolio_chunks",
-            connection_string=settings.get_database_url(),
-            embedding_function=OpenAIEmbeddings(model="text-embedding-3-small")
-        )
-        
-        # Use similarity_search with a general query to get documents
-        # We'll use a dummy embedding to get all documents
-        docs = vector_store.similarity_search(
-            "",
-            k=1000  # Adjust this number based on your needs
-        )
-        
-        # Process documents to get unique sources with their latest document's metadata
-        document_map = {}
-        for doc in docs:
-            source = doc.metadata.get('source')
-            if source:
-                # Update only if this is a new document or has a more recent created_at
-                if source not in document_map or (
-                    doc.metadata.get('created_at', datetime.min) > 
-                    document_map[source].get('created_at', datetime.min)
-                ):
-                    document_map[source] = {
-                        'filename': os.path.basename(source),
-                        'created_at': doc.metadata.get('created_at', datetime.now())
-                    }
-        
-        documents = [
-            {
-                "filename": data['filename'],
-                "processed_date": data['created_at'].isoformat() if isinstance(data['created_at'], datetime) else data['created_at']
-            }
-            for data in document_map.values()
-        ]
-        
+        documents, total = await DocumentService.list_catalog(db, limit=limit, offset=offset)
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
         return documents
     except Exception as e:
         logger.error(f"Error fetching documents: {str(e)}", exc_info=True)
@@ -117,13 +126,57 @@ async def list_documents():
             detail=f"Error fetching documents: {str(e)}"
         )
 
+@router.get("/index")
+async def get_vector_index():
+    """
+    Get the ANN index of the knowledge base embeddings and the search settings in effect.
+    """
+    try:
+        return await asyncio.to_thread(vector_index.get_index_status)
+    except Exception as e:
+        logger.error(f"Error fetching vector index status: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching vector index status: {str(e)}"
+        )
+
+@router.post("/index")
+async def create_vector_index(request: VectorIndexRequest):
+    """
+    Build or rebuild the HNSW or IVFFlat index on the knowledge base embeddings.
+
+    The build runs concurrently with queries and can take minutes on large collections.
+    """
+    try:
+        return await asyncio.to_thread(
+            vector_index.create_index,
+            method=request.method,
+            m=request.m,
+            ef_construction=request.ef_construction,
+            lists=request.lists,
+            quantization=request.quantization
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error building vector index: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error building vector index: {str(e)}"
+        )
+
 @router.delete("/documents/{filename}")
-async def delete_document(filename: str, db: Session = Depends(get_db)):
+async def delete_document(
+        filename: str,
+        db: AsyncSession = Depends(get_async_db),
+        rag_service: RAGService = Depends(get_rag_service)
+):
     """
     Delete a specific document and its chunks from the vector store.
     """
     try:
-        result = await DocumentService.delete_document(db, filename)
+        result = await DocumentService.delete_document(db, filename, rag_service.collection_name)
+        await rag_service.knowledge_base_changed()
         return result
     except HTTPException:
         raise
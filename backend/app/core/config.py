@@ -14,10 +14,42 @@ class Settings(BaseSettings):
     # POSTGRES_PASSWORD: str
     # POSTGRES_DB: str
     DATABASE_URL: str | None = None
+    DB_POOL_SIZE: int = 5  # per engine and worker; request-path concurrency is bounded by this
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a pooled connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
 
     # OpenAI
     OPENAI_API_KEY: str
     OPENAI_MODEL: str = "gpt-4o"
+    # Embeddings for new collections; existing ones keep the model and size they
+    # were built with (see app/db/collections.py and scripts/migrate_embeddings.py)
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_DIMENSIONS: int | None = None  # shortened output, e.g. 256 or 512; None = the model's full size
+    COLLECTION_CHECK_SECONDS: float = 10  # how often each worker checks whether its collection was switched
+
+    # Model providers; "fake" swaps in local stand-ins (see app/services/providers.py)
+    EMBEDDING_PROVIDER: str = "openai"  # or "fake"
+    LLM_PROVIDER: str = "google"  # or "fake"
+    FAKE_EMBEDDING_LATENCY_MS: float = 50  # per embeddings request
+    FAKE_LLM_FIRST_TOKEN_MS: float = 400
+    FAKE_LLM_TOKENS_PER_SECOND: float = 60
+    FAKE_LLM_RESPONSE_TOKENS: int = 80
+
+    # Observability
+    SLOW_REQUEST_MS: int = 5000  # requests slower than this log their per-stage timings
+
+    # Logging (see app/core/logger.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: dict[str, str] = {}  # per-logger overrides, e.g. {"sqlalchemy.engine": "INFO"}
+    LOG_FORMAT: str = "json"  # or "text"
+    LOG_MAX_FIELD_CHARS: int = 500  # longer messages and string fields are truncated
+    LOG_SAMPLE_RATES: dict[str, float] = {}  # fraction of INFO/DEBUG records kept per logger, e.g. {"app.api.v1.chat": 0.1}
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped rather than blocking requests
+
+    # Event loop lag sampling, reported by /health
+    EVENT_LOOP_MONITOR_INTERVAL_MS: int = 100
+    EVENT_LOOP_MONITOR_WINDOW_SECONDS: int = 60
 
     # Vector Settings
     CHUNK_SIZE: int = 500
@@ -25,6 +57,69 @@ class Settings(BaseSettings):
     VECTOR_SIMILARITY_THRESHOLD: float = 0.20  # similarity scale (1-distance); resume chunks score ~0.27-0.29
     MAX_RESULTS: int = 3
 
+    # Hybrid retrieval: full-text and vector search fused with reciprocal rank fusion
+    HYBRID_SEARCH_ENABLED: bool = False  # opt in: keyword-only hits bypass VECTOR_SIMILARITY_THRESHOLD
+    HYBRID_SEARCH_CANDIDATES: int = 20  # per search, before fusion
+    HYBRID_RRF_K: int = 60  # damps the weight of top ranks; 60 is the usual choice
+    TEXT_SEARCH_CONFIG: str = "english"  # Postgres text search configuration
+
+    # In-process vector search (see app/services/memory_retriever.py)
+    IN_MEMORY_RETRIEVAL_ENABLED: bool = False  # replaces pgvector and hybrid search; ~chunks x dims x 4 bytes per worker
+    IN_MEMORY_REFRESH_SECONDS: float = 30  # how often each worker picks up ingested or deleted chunks
+
+    # Knowledge base change events between workers (see app/services/knowledge_events.py)
+    KB_EVENTS_ENABLED: bool = True
+    KB_EVENTS_CATCH_UP_SECONDS: float = 30  # how often a worker checks for changes whose notification it missed
+    KB_EVENTS_MAX_RECONNECT_SECONDS: float = 30  # backoff cap for the listener connection
+
+    # Personalities and contact details: JSON overriding app/config.py, reloaded when it changes
+    PERSONALITY_CONFIG_PATH: str | None = None
+    PERSONALITY_CONFIG_CHECK_SECONDS: float = 10  # how often each worker checks the file
+
+    # Prompt context assembly (see app/services/context_builder.py)
+    CONTEXT_MAX_TOKENS: int = 1500  # retrieved text per prompt, after dedupe and merging
+    CONTEXT_TOKENIZER_MODEL: str = "gpt-4o"  # tiktoken encoding used to estimate prompt tokens
+
+    # ANN index on the embedding column (see app/db/vector_index.py)
+    VECTOR_INDEX_METHOD: str = "hnsw"  # or "ivfflat"
+    VECTOR_INDEX_HNSW_M: int = 16
+    VECTOR_INDEX_HNSW_EF_CONSTRUCTION: int = 64
+    VECTOR_INDEX_MAINTENANCE_WORK_MEM: str | None = None  # e.g. "1GB" for faster HNSW builds
+    VECTOR_INDEX_EF_SEARCH: int = 40  # HNSW candidates per query; higher = better recall, slower
+    VECTOR_INDEX_PROBES: int = 10  # IVFFlat lists scanned per query
+    # Quantized first-pass search: "none", "halfvec" (16-bit floats) or "binary" (1 bit per dimension)
+    VECTOR_QUANTIZATION: str = "none"
+    VECTOR_QUANTIZATION_COLLECTIONS: dict[str, str] = {}  # per-collection override, e.g. {"portfolio_chunks": "halfvec"}
+    VECTOR_RESCORE_CANDIDATES: int = 40  # first-pass hits rescored at full precision; keep <= VECTOR_INDEX_EF_SEARCH
+
+    # Answer cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.93  # cosine similarity between question embeddings
+    ANSWER_CACHE_MAX_ENTRIES: int = 256  # per personality, in-process LRU
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_SHARED: bool = False  # add a Postgres-backed tier shared by all workers
+
+    # Embedding cache
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PERSISTENT: bool = True  # keep vectors in Postgres, keyed by model + text hash
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 4096
+
+    # Ingestion
+    UPLOAD_MAX_FILE_BYTES: int = 50 * 1024 * 1024  # per uploaded file; larger ones are rejected with 413
+    UPLOAD_MAX_FILES: int = 20  # per upload request
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024  # bytes buffered per file before each write; bounds memory per upload
+    INGESTION_WORKERS: int = 1  # uploads processed concurrently per API worker
+    INGESTION_JOB_HISTORY: int = 100  # finished jobs kept in Postgres for GET /knowledge/jobs/{id}
+    INGESTION_JOB_PUBLISH_SECONDS: float = 1.0  # how often a running job's progress is saved for other workers
+    INGESTION_PARSE_WORKERS: int = 1  # >1 parses files in parallel in a process pool
+    INGESTION_BULK_COPY: bool = True  # load chunks with binary COPY instead of INSERT
+
+    # Embedding pipeline
+    EMBEDDING_BATCH_MAX_TOKENS: int = 20000  # tokens per embeddings request (API limit 300k)
+    EMBEDDING_BATCH_MAX_ITEMS: int = 256  # inputs per embeddings request (API limit 2048)
+    EMBEDDING_MAX_CONCURRENCY: int = 4  # embeddings requests in flight
+    EMBEDDING_MAX_RETRIES: int = 6  # on 429s, timeouts and 5xx, with exponential backoff
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -34,6 +129,11 @@ class Settings(BaseSettings):
             return self.DATABASE_URL
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
 
+    def get_async_database_url(self) -> str:
+        """The database URL with the asyncpg driver, for the async engine."""
+        rest = self.get_database_url().split("://", 1)[1]
+        return f"postgresql+asyncpg://{rest}"
+
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
\ No newline at end of file
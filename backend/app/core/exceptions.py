@@ -12,4 +12,8 @@ class LLMError(HTTPException):
 
 class ValidationError(HTTPException):
     def __init__(self, detail: str):
-        super().__init__(status_code=422, detail=detail)
\ No newline at end of file
+        super().__init__(status_code=422, detail=detail)
+
+class UploadTooLargeError(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(status_code=413, detail=detail)
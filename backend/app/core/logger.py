@@ -1,26 +1,172 @@
 # backend/app/core/logger.py
 
+import atexit
+import copy
 import logging
+import queue
+import random
 import sys
-from typing import Any
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional, TextIO, Tuple
 
-def setup_logger(name: str) -> logging.Logger:
-    logger = logging.getLogger(name)
+from pythonjsonlogger.core import RESERVED_ATTRS
+from pythonjsonlogger.json import JsonFormatter
+
+from app.core.config import get_settings
+from app.core.metrics import current_trace_id
+
+settings = get_settings()
+
+# Attributes every LogRecord has; anything else was passed as a field via extra={...}
+_STANDARD_ATTRS = frozenset(RESERVED_ATTRS) | {"taskName", "trace_id"}
+
+_listener: Optional[QueueListener] = None
+
+def _sample_rate(name: str) -> float:
+    """The configured sample rate for a logger, inherited from the closest configured parent."""
+    while name:
+        rate = settings.LOG_SAMPLE_RATES.get(name)
+        if rate is not None:
+            return rate
+        name = name.rpartition(".")[0]
+    return 1.0
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of INFO and DEBUG records from high-volume loggers.
+
+    Rates come from LOG_SAMPLE_RATES; warnings and errors are never dropped.
+    Runs before the record is queued, so dropped records cost almost nothing.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = _sample_rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+class TraceIdFilter(logging.Filter):
+    """Attach the current request's trace id, which only the calling task can see."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id()
+        return True
+
+class TruncatingFilter(logging.Filter):
+    """Cap the message and string fields at LOG_MAX_FIELD_CHARS so one record can't flood the log."""
+
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def _truncate(self, value: str) -> str:
+        if len(value) <= self.max_chars:
+            return value
+        return f"{value[:self.max_chars]}... [{len(value) - self.max_chars} chars truncated]"
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.msg, str):
+            record.msg = self._truncate(record.msg)
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and isinstance(value, str):
+                record.__dict__[key] = self._truncate(value)
+        return True
 
-    if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(
-            logging.Formatter(
-                "[%(asctime)s] %(levelname)s - %(message)s"
-            )
-        )
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
+class TextFormatter(logging.Formatter):
+    """The previous human-readable format, with fields appended as key=value."""
 
-    return logger
+    def __init__(self):
+        super().__init__("[%(asctime)s] %(levelname)s %(name)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = {
+            key: value for key, value in record.__dict__.items()
+            if key not in _STANDARD_ATTRS and value is not None
+        }
+        if record.__dict__.get("trace_id"):
+            fields["trace_id"] = record.trace_id
+        if fields:
+            line += " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of raising when the queue is full."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like QueueHandler.prepare, but the traceback stays in exc_text rather
+        # than the message so truncating the message doesn't cut it off
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+def create_queue_handler(stream: TextIO) -> Tuple[DroppingQueueHandler, QueueListener]:
+    """
+    Build the queue handler and the (unstarted) listener that writes its records to stream.
+
+    Sampling and the trace id are applied on the calling side, truncation and
+    formatting on the listener thread.
+    """
+    output = logging.StreamHandler(stream)
+    output.setFormatter(
+        JsonFormatter("%(asctime)s %(levelname)s %(name)s %(message)s", rename_fields={"levelname": "level"})
+        if settings.LOG_FORMAT == "json" else TextFormatter()
+    )
+    output.addFilter(TruncatingFilter(settings.LOG_MAX_FIELD_CHARS))
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    handler.addFilter(SamplingFilter())
+    handler.addFilter(TraceIdFilter())
+    return handler, QueueListener(handler.queue, output, respect_handler_level=True)
+
+def configure_logging() -> None:
+    """
+    Route all logging through a queue drained by a background thread.
+
+    Request handlers only pay for building the record and a queue put; the
+    formatting and the blocking write to stdout happen on the listener thread.
+    Levels come from LOG_LEVEL and the per-logger LOG_LEVELS, and the output
+    is JSON lines or plain text per LOG_FORMAT. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    handler, _listener = create_queue_handler(sys.stdout)
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL)
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        if DroppingQueueHandler.dropped:
+            print(f"Log queue was full; {DroppingQueueHandler.dropped} records dropped", file=sys.stderr)
+
+def setup_logger(name: str) -> logging.Logger:
+    """Get a module logger; output goes wherever configure_logging() routed the root logger."""
+    return logging.getLogger(name)
 
 def log_error(logger: logging.Logger, error: Any, message: str) -> None:
     """Helper function to log errors with consistent format"""
-    error_type = type(error).__name__
-    error_msg = str(error)
-    logger.error(f"{message} | Type: {error_type} | Message: {error_msg}")
\ No newline at end of file
+    logger.error(message, extra={"error_type": type(error).__name__, "error_message": str(error)})
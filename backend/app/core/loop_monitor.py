@@ -0,0 +1,63 @@
+# backend/app/core/loop_monitor.py
+
+import asyncio
+import logging
+import statistics
+from collections import deque
+from typing import Dict, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class EventLoopMonitor:
+    """
+    Measure how late the event loop wakes up from a fixed sleep.
+
+    A sleep that ends late means some callback held the loop, so every request
+    in flight on this worker was stalled for that long. Samples from the last
+    window_seconds are kept for /health.
+    """
+
+    def __init__(
+            self,
+            interval: float = settings.EVENT_LOOP_MONITOR_INTERVAL_MS / 1000,
+            window_seconds: int = settings.EVENT_LOOP_MONITOR_WINDOW_SECONDS
+    ):
+        self.interval = interval
+        self._samples: deque = deque(maxlen=max(1, int(window_seconds / interval)))
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def stats(self) -> Dict[str, float]:
+        """Lag in milliseconds: the latest sample, and p99/max over the window."""
+        if not self._samples:
+            return {"lag_ms": 0.0, "p99_lag_ms": 0.0, "max_lag_ms": 0.0, "samples": 0}
+        samples = list(self._samples)
+        p99 = statistics.quantiles(samples, n=100)[98] if len(samples) > 1 else samples[0]
+        return {
+            "lag_ms": round(samples[-1] * 1000, 2),
+            "p99_lag_ms": round(p99 * 1000, 2),
+            "max_lag_ms": round(max(samples) * 1000, 2),
+            "samples": len(samples),
+        }
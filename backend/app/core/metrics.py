@@ -0,0 +1,191 @@
+# backend/app/core/metrics.py
+
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, multiprocess
+from prometheus_client.exposition import choose_encoder
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Latency buckets from 5ms to 60s: covers vector search through full LLM answers
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+RAG_STAGE_SECONDS = Histogram(
+    "rag_stage_seconds",
+    "Time spent in each stage of answering a question",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+RAG_TOKENS = Histogram(
+    "rag_tokens",
+    "Context, prompt and completion tokens per LLM call (estimated when the model reports no usage)",
+    ["kind"],
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+RAG_RETRIEVED_DOCS = Histogram(
+    "rag_retrieved_docs",
+    "Chunks retrieved per question",
+    buckets=(0, 1, 2, 4, 6, 8, 12, 16),
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result; hit ratio = hit / (hit + miss)",
+    ["cache", "result"],
+)
+INGESTION_STAGE_SECONDS = Histogram(
+    "ingestion_stage_seconds",
+    "Time spent in each document ingestion stage, summed over one ingestion run",
+    ["stage"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route, until the last byte of the response",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+# Per-request stage timings; the dict is shared with tasks spawned by the request
+_stage_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+def current_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+def current_stage_timings() -> Dict[str, float]:
+    """Stage timings in milliseconds recorded so far in this request."""
+    return dict(_stage_timings.get() or {})
+
+def observe_stage(name: str, seconds: float) -> None:
+    """Record a stage duration in the histogram and the current request's trace."""
+    trace_id = _trace_id.get()
+    RAG_STAGE_SECONDS.labels(stage=name).observe(seconds, exemplar={"trace_id": trace_id} if trace_id else None)
+    timings = _stage_timings.get()
+    if timings is not None:
+        timings[name] = round(timings.get(name, 0.0) + seconds * 1000, 1)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as a RAG pipeline stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+class LLMMetricsCallback(AsyncCallbackHandler):
+    """Records LLM time to first token, total time and token counts per call."""
+
+    def __init__(self):
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt = "".join(str(m.content) for batch in messages for m in batch)
+        self._runs[run_id] = {"start": time.perf_counter(), "first_token": False, "prompt": prompt}
+
+    async def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.get(run_id)
+        if run is not None and not run["first_token"] and token:
+            run["first_token"] = True
+            observe_stage("llm_first_token", time.perf_counter() - run["start"])
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        elapsed = time.perf_counter() - run["start"]
+        if not run["first_token"]:
+            # Not streamed: the whole answer arrives at once
+            observe_stage("llm_first_token", elapsed)
+        observe_stage("llm_total", elapsed)
+
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if usage:
+            prompt_tokens, completion_tokens = usage["input_tokens"], usage["output_tokens"]
+        else:
+            # Same 4-characters-per-token estimate the embedding pipeline falls back to
+            prompt_tokens = max(1, len(run["prompt"]) // 4)
+            completion_tokens = max(1, len(generation.text) // 4) if generation else 0
+        RAG_TOKENS.labels(kind="prompt").observe(prompt_tokens)
+        RAG_TOKENS.labels(kind="completion").observe(completion_tokens)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
+
+class TraceMiddleware:
+    """
+    Give every request a trace id and time it.
+
+    The id comes from an incoming X-Request-ID header or is generated, and is
+    returned as X-Trace-ID. Stage timings recorded while handling the request
+    are attached to its trace and logged when the request is slower than
+    SLOW_REQUEST_MS, so a slow chat can be broken down by stage.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        trace_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        trace_token = _trace_id.set(trace_id)
+        timings_token = _stage_timings.set({})
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_trace(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", []).append((b"x-trace-id", trace_id.encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners can't blow up cardinality
+            route_path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(method=scope["method"], route=route_path, status=str(status)).observe(
+                elapsed, exemplar={"trace_id": trace_id}
+            )
+            if elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+                logger.warning(
+                    f"Slow request {scope['method']} {route_path} trace_id={trace_id} "
+                    f"took {elapsed * 1000:.0f}ms; stages (ms): {_stage_timings.get()}"
+                )
+            _stage_timings.reset(timings_token)
+            _trace_id.reset(trace_token)
+
+def render_metrics(accept_header: Optional[str]) -> tuple:
+    """
+    Encode all metrics for a scrape.
+
+    Under a multi-worker server with PROMETHEUS_MULTIPROC_DIR set, the values of
+    all worker processes are aggregated; otherwise only this process's are shown.
+    OpenMetrics clients also get the trace id exemplars.
+    """
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    encoder, content_type = choose_encoder(accept_header)
+    return encoder(registry), content_type
@@ -0,0 +1,204 @@
+# backend/app/db/bulk_load.py
+
+import io
+import json
+import logging
+import struct
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_TABLE = "langchain_pg_embedding"
+COLLECTION_TABLE = "langchain_pg_collection"
+
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_COPY_TRAILER = struct.pack(">h", -1)
+_NULL_FIELD = struct.pack(">i", -1)
+
+def encode_vector(embedding: List[float]) -> bytes:
+    """pgvector's binary representation: int16 dim, int16 unused, then big-endian float4s."""
+    values = np.asarray(embedding, dtype=">f4")
+    return struct.pack(">HH", len(values), 0) + values.tobytes()
+
+def read_copy_rows(data: bytes) -> Iterator[List[Optional[bytes]]]:
+    """
+    Split the output of COPY ... TO STDOUT WITH (FORMAT BINARY) into rows of raw
+    field values (None for NULL).
+    """
+    if not data.startswith(_COPY_HEADER[:11]):
+        raise ValueError("Not binary COPY data")
+    header_extension = struct.unpack_from(">i", data, 15)[0]
+    offset = 19 + header_extension
+    while True:
+        (field_count,) = struct.unpack_from(">h", data, offset)
+        offset += 2
+        if field_count == -1:
+            return
+        row = []
+        for _ in range(field_count):
+            (length,) = struct.unpack_from(">i", data, offset)
+            offset += 4
+            if length == -1:
+                row.append(None)
+            else:
+                row.append(data[offset:offset + length])
+                offset += length
+        yield row
+
+def _field(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return _NULL_FIELD
+    return struct.pack(">i", len(value)) + value
+
+def _metadata_is_jsonb(db: Session) -> bool:
+    """PGVector stores cmetadata as JSON or JSONB depending on use_jsonb; their binary forms differ."""
+    column_type = db.execute(
+        text("""
+            SELECT format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = CAST(:table AS regclass) AND attname = 'cmetadata'
+        """),
+        {"table": EMBEDDING_TABLE}
+    ).scalar()
+    return column_type == "jsonb"
+
+def lock_collection(db: Session, name: str, exclusive: bool = False) -> None:
+    """
+    Hold what a collection name refers to until the transaction ends.
+
+    Writers take the lock shared before resolving the name to a collection id,
+    so their rows commit into the collection the name still refers to.
+    Creating a collection, deleting it once it is empty, or switching the name
+    to another one (CollectionMigration) takes it exclusive.
+    """
+    db.execute(*_lock_collection_statement(name, exclusive))
+
+async def alock_collection(db: AsyncSession, name: str, exclusive: bool = False) -> None:
+    """Async variant of lock_collection, for request handlers."""
+    await db.execute(*_lock_collection_statement(name, exclusive))
+
+def _lock_collection_statement(name: str, exclusive: bool):
+    function = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+    return text(f"SELECT {function}(hashtext(:key))"), {"key": f"collection:{name}"}
+
+def get_or_create_collection(db: Session, name: str, cmetadata: Optional[Dict[str, Any]] = None) -> str:
+    """Return the UUID of a collection, inserting it if missing. Does not commit."""
+    # The name column has no unique constraint, so serialise creation instead
+    lock_collection(db, name, exclusive=True)
+    collection_id = db.execute(
+        text(f"SELECT uuid FROM {COLLECTION_TABLE} WHERE name = :name"),
+        {"name": name}
+    ).scalar()
+    if collection_id is not None:
+        return str(collection_id)
+
+    collection_id = str(uuid.uuid4())
+    db.execute(
+        text(f"INSERT INTO {COLLECTION_TABLE} (uuid, name, cmetadata) VALUES (CAST(:uuid AS UUID), :name, :cmetadata)"),
+        {"uuid": collection_id, "name": name, "cmetadata": json.dumps(cmetadata or {})}
+    )
+    return collection_id
+
+def copy_embeddings(
+        db: Session,
+        collection_id: str,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+        custom_ids: Optional[List[str]] = None
+) -> int:
+    """
+    Load embedded chunks with a single binary COPY, inside the session's
+    transaction. Does not commit.
+
+    Args:
+        db: Database session
+        collection_id: Collection the chunks belong to
+        texts: Chunk contents
+        metadatas: Chunk metadata, one dict per text
+        embeddings: Chunk vectors, one per text
+        custom_ids: custom_id per chunk; defaults to the chunk's own uuid
+
+    Returns:
+        Number of rows loaded
+    """
+    if not texts:
+        return 0
+
+    start = time.perf_counter()
+    jsonb_prefix = b"\x01" if _metadata_is_jsonb(db) else b""
+    collection_bytes = uuid.UUID(str(collection_id)).bytes
+
+    buffer = io.BytesIO()
+    buffer.write(_COPY_HEADER)
+    for i, (content, metadata, embedding) in enumerate(zip(texts, metadatas, embeddings)):
+        chunk_id = uuid.uuid4()
+        buffer.write(struct.pack(">h", 6))
+        buffer.write(_field(chunk_id.bytes))
+        buffer.write(_field(collection_bytes))
+        buffer.write(_field(encode_vector(embedding)))
+        buffer.write(_field(content.encode("utf-8")))
+        buffer.write(_field(jsonb_prefix + json.dumps(metadata, default=str).encode("utf-8")))
+        buffer.write(_field((custom_ids[i] if custom_ids else str(chunk_id)).encode("utf-8")))
+    buffer.write(_COPY_TRAILER)
+    buffer.seek(0)
+
+    # COPY goes through the raw psycopg2 connection backing the session
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {EMBEDDING_TABLE} (uuid, collection_id, embedding, document, cmetadata, custom_id) "
+            "FROM STDIN WITH (FORMAT BINARY)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - start
+    logger.debug(f"Copied {len(texts)} rows in {elapsed:.3f}s ({len(texts) / elapsed:.0f} rows/s)")
+    return len(texts)
+
+@contextmanager
+def deferred_indexes(db: Session, table: str = EMBEDDING_TABLE) -> Iterator[List[str]]:
+    """
+    Drop a table's secondary indexes for the duration of a bulk load and rebuild
+    them afterwards, in the session's transaction.
+
+    Indexes backing constraints (the primary key) are kept. Dropping an index
+    locks the table against readers until the transaction ends, so this is meant
+    for offline loads such as scripts/init_vectors.py, not live uploads.
+
+    Yields:
+        Definitions of the indexes that will be rebuilt
+    """
+    indexes = db.execute(
+        text("""
+            SELECT i.indexname, i.indexdef
+            FROM pg_indexes i
+            JOIN pg_namespace n ON n.nspname = i.schemaname
+            JOIN pg_class c ON c.relname = i.indexname AND c.relnamespace = n.oid
+            WHERE i.tablename = :table
+              AND i.schemaname = current_schema()
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = c.oid)
+        """),
+        {"table": table}
+    ).fetchall()
+    for index in indexes:
+        db.execute(text(f'DROP INDEX "{index.indexname}"'))
+    logger.info(f"Deferred {len(indexes)} index(es) on {table} until after the load")
+
+    definitions = [index.indexdef for index in indexes]
+    yield definitions
+
+    start = time.perf_counter()
+    for definition in definitions:
+        db.execute(text(definition))
+    logger.info(f"Rebuilt {len(definitions)} index(es) on {table} in {time.perf_counter() - start:.2f}s")
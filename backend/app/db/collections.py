@@ -0,0 +1,70 @@
+# backend/app/db/collections.py
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.db.bulk_load import COLLECTION_TABLE
+from app.db.session import engine as default_engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class CollectionEmbedding:
+    """The embedding model and output size a collection's vectors were made with."""
+    model: str
+    # None is the model's full output size
+    dimensions: Optional[int] = None
+    collection_id: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        """Label for the embedding cache and the document catalog; vectors of different sizes never mix."""
+        return self.model if self.dimensions is None else f"{self.model}@{self.dimensions}"
+
+    def metadata(self) -> Dict[str, Any]:
+        """The collection metadata that records this embedding."""
+        return {"embedding_model": self.model, "embedding_dimensions": self.dimensions}
+
+def default_embedding() -> CollectionEmbedding:
+    """The embedding new collections are created with."""
+    return CollectionEmbedding(model=settings.EMBEDDING_MODEL, dimensions=settings.EMBEDDING_DIMENSIONS)
+
+def collection_embedding(collection_name: str, engine: Engine = default_engine) -> CollectionEmbedding:
+    """
+    Look up the embedding a collection was built with.
+
+    Collections record it in their metadata when they are created. Ones
+    created before that hold full-size vectors of EMBEDDING_MODEL; a
+    collection that doesn't exist yet gets the configured default.
+
+    Args:
+        collection_name: Collection to look up
+        engine: Engine to query with
+
+    Returns:
+        The collection's embedding, with its id if it exists
+    """
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(f"SELECT uuid, cmetadata FROM {COLLECTION_TABLE} WHERE name = :name"),
+            {"name": collection_name}
+        ).first()
+    if row is None:
+        return default_embedding()
+
+    # psycopg2 returns json columns as dicts; stay safe if one comes back as text
+    metadata = json.loads(row.cmetadata) if isinstance(row.cmetadata, str) else (row.cmetadata or {})
+    if "embedding_model" not in metadata:
+        return CollectionEmbedding(model=settings.EMBEDDING_MODEL, collection_id=str(row.uuid))
+    return CollectionEmbedding(
+        model=metadata["embedding_model"],
+        dimensions=metadata.get("embedding_dimensions"),
+        collection_id=str(row.uuid),
+    )
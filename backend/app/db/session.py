@@ -1,14 +1,43 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import get_settings
 
 settings = get_settings()
 
+# Sync engine for ingestion, scripts and LangChain's PGVector
 engine = create_engine(
     settings.get_database_url(),
     pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine (asyncpg) for request-path queries, so they don't block the event loop
+async_engine = create_async_engine(
+    settings.get_async_database_url(),
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def _set_search_params(dbapi_connection, connection_record) -> None:
+    """Set hnsw.ef_search and ivfflat.probes, for the collections' ANN indexes, on every new connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"SET hnsw.ef_search = {int(settings.VECTOR_INDEX_EF_SEARCH)}")
+        cursor.execute(f"SET ivfflat.probes = {int(settings.VECTOR_INDEX_PROBES)}")
+    finally:
+        cursor.close()
+    dbapi_connection.commit()
+
+event.listen(engine, "connect", _set_search_params)
+event.listen(async_engine.sync_engine, "connect", _set_search_params)
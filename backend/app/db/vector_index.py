@@ -0,0 +1,244 @@
+# backend/app/db/vector_index.py
+
+import logging
+import re
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.db.bulk_load import COLLECTION_TABLE, EMBEDDING_TABLE
+from app.db.session import engine as default_engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+INDEX_METHODS = ("hnsw", "ivfflat")
+QUANTIZATIONS = ("none", "halfvec", "binary")
+
+def index_name(collection_name: str) -> str:
+    """Name of the managed ANN index for a collection (one per collection)."""
+    slug = re.sub(r"[^a-z0-9_]+", "_", collection_name.lower()).strip("_")
+    return f"ix_{EMBEDDING_TABLE}_ann_{slug}"[:63]
+
+def quantization_for(collection_name: str) -> str:
+    """The configured quantization of a collection's first-pass search."""
+    quantization = settings.VECTOR_QUANTIZATION_COLLECTIONS.get(collection_name, settings.VECTOR_QUANTIZATION)
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unsupported vector quantization: {quantization}. Supported: {', '.join(QUANTIZATIONS)}")
+    return quantization
+
+def _quantize(value: str, quantization: str, dimensions: int) -> str:
+    if quantization == "halfvec":
+        return f"CAST({value} AS halfvec({int(dimensions)}))"
+    if quantization == "binary":
+        return f"CAST(binary_quantize({value}) AS bit({int(dimensions)}))"
+    # Collections of different sizes share the untyped column; the cast gives the
+    # index its dimension
+    return f"CAST({value} AS vector({int(dimensions)}))"
+
+def index_expression(quantization: str, dimensions: int) -> str:
+    """
+    The indexed expression and operator class for a quantization.
+
+    halfvec indexes 16-bit floats under cosine distance; binary indexes the
+    sign bits under Hamming distance. The embedding column itself stays
+    full precision for rescoring.
+    """
+    if quantization == "halfvec":
+        return f"({_quantize('embedding', quantization, dimensions)}) halfvec_cosine_ops"
+    if quantization == "binary":
+        return f"({_quantize('embedding', quantization, dimensions)}) bit_hamming_ops"
+    return f"({_quantize('embedding', quantization, dimensions)}) vector_cosine_ops"
+
+def to_pgvector(embedding: Sequence[float]) -> str:
+    """A query vector as pgvector's text form, for binding as :embedding and casting to vector."""
+    return "[" + ",".join(f"{x:.7g}" for x in embedding) + "]"
+
+def first_pass_distance(quantization: str, dimensions: int, query_vector: str) -> str:
+    """
+    The distance expression a search must order by to use the collection's index.
+
+    Args:
+        quantization: "none", "halfvec" or "binary"
+        dimensions: Embedding dimensions
+        query_vector: SQL for the query vector, as a vector
+
+    Returns:
+        SQL for the (possibly approximate) distance of each row to the query
+    """
+    operator = "<~>" if quantization == "binary" else "<=>"
+    return (
+        f"{_quantize('embedding', quantization, dimensions)} {operator} "
+        f"{_quantize(query_vector, quantization, dimensions)}"
+    )
+
+def _collection_id(conn, collection_name: str) -> str:
+    collection_id = conn.execute(
+        text(f"SELECT uuid FROM {COLLECTION_TABLE} WHERE name = :name"),
+        {"name": collection_name}
+    ).scalar()
+    if collection_id is None:
+        raise ValueError(f"Collection {collection_name} does not exist")
+    return str(collection_id)
+
+def _collection_dimensions(conn, collection_id: str) -> int:
+    """
+    The dimension of a collection's vectors, which ANN indexes require.
+
+    PGVector creates the column as an untyped vector, so collections of
+    different sizes can share it; the stored vectors of one collection must
+    all agree. The column itself is never altered: the index is built on the
+    vectors cast to this dimension.
+    """
+    dimensions = conn.execute(
+        text(f"""
+            SELECT DISTINCT vector_dims(embedding) FROM {EMBEDDING_TABLE}
+            WHERE collection_id = CAST(:id AS UUID) AND embedding IS NOT NULL
+        """),
+        {"id": collection_id}
+    ).scalars().all()
+    if len(dimensions) != 1:
+        raise ValueError(
+            f"Cannot index collection {collection_id}: expected vectors of one dimension, found {dimensions or 'none'}"
+        )
+    return dimensions[0]
+
+def create_index(
+        collection_name: str = "portfolio_chunks",
+        method: str = settings.VECTOR_INDEX_METHOD,
+        m: int = settings.VECTOR_INDEX_HNSW_M,
+        ef_construction: int = settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION,
+        lists: Optional[int] = None,
+        maintenance_work_mem: Optional[str] = settings.VECTOR_INDEX_MAINTENANCE_WORK_MEM,
+        quantization: Optional[str] = None,
+        engine: Engine = default_engine
+) -> Dict[str, Any]:
+    """
+    Build (or rebuild) the ANN index on a collection's embeddings.
+
+    The index is partial on the collection, so other collections in the table
+    don't dilute its results, and uses cosine distance to match PGVector's
+    default distance strategy. It indexes the expression
+    CAST(embedding AS vector(d)), since the column is untyped, and is built
+    CONCURRENTLY, so retrieval and ingestion keep working while it builds. With quantization the index is
+    on halfvec or binary-quantized embeddings, which the retrievers search
+    first and then rescore exactly; they only use it if the collection's
+    configured quantization (quantization_for) matches.
+
+    Args:
+        collection_name: Collection to index
+        method: "hnsw" or "ivfflat"
+        m: HNSW links per node
+        ef_construction: HNSW candidate list size while building
+        lists: IVFFlat list count; defaults to rows / 1000 (sqrt(rows) above 1M rows)
+        maintenance_work_mem: Memory for the build, e.g. "1GB"; faster HNSW builds
+            when the graph fits
+        quantization: "none", "halfvec" or "binary"; defaults to the collection's
+            configured quantization
+        engine: Engine to build with
+
+    Returns:
+        Index status after the build
+    """
+    if method not in INDEX_METHODS:
+        raise ValueError(f"Unsupported index method: {method}. Supported: {', '.join(INDEX_METHODS)}")
+    quantization = quantization or quantization_for(collection_name)
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unsupported vector quantization: {quantization}. Supported: {', '.join(QUANTIZATIONS)}")
+
+    name = index_name(collection_name)
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        collection_id = _collection_id(conn, collection_name)
+        dimensions = _collection_dimensions(conn, collection_id)
+
+        if method == "hnsw":
+            options = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+        else:
+            if not lists:
+                rows = conn.execute(
+                    text(f"SELECT count(*) FROM {EMBEDDING_TABLE} WHERE collection_id = CAST(:id AS UUID)"),
+                    {"id": collection_id}
+                ).scalar()
+                lists = max(1, rows // 1000) if rows <= 1_000_000 else int(rows ** 0.5)
+            options = f"lists = {int(lists)}"
+
+        if maintenance_work_mem:
+            conn.execute(text("SELECT set_config('maintenance_work_mem', :value, false)"), {"value": maintenance_work_mem})
+
+        # Build under a temporary name and swap, so a rebuild never leaves the
+        # collection without an index
+        building = f"{name[:59]}_new"
+        start = time.perf_counter()
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{building}"'))
+        conn.execute(text(f"""
+            CREATE INDEX CONCURRENTLY "{building}" ON {EMBEDDING_TABLE}
+            USING {method} ({index_expression(quantization, dimensions)}) WITH ({options})
+            WHERE collection_id = '{collection_id}'
+        """))
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+        conn.execute(text(f'ALTER INDEX "{building}" RENAME TO "{name}"'))
+        logger.info(
+            f"Built {method} index {name} ({options}, quantization {quantization}) "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+    return get_index_status(collection_name, engine=engine)
+
+def _index_quantization(definition: str) -> str:
+    if "binary_quantize" in definition:
+        return "binary"
+    if "halfvec" in definition:
+        return "halfvec"
+    return "none"
+
+def drop_index(collection_name: str = "portfolio_chunks", engine: Engine = default_engine) -> None:
+    """Drop a collection's ANN index; retrieval falls back to exact sequential scans."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name(collection_name)}"'))
+
+def get_index_status(collection_name: str = "portfolio_chunks", engine: Engine = default_engine) -> Dict[str, Any]:
+    """Describe a collection's ANN index and the search settings in effect."""
+    name = index_name(collection_name)
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("""
+                SELECT am.amname AS method,
+                       pg_get_indexdef(c.oid) AS definition,
+                       pg_size_pretty(pg_relation_size(c.oid)) AS size,
+                       pg_relation_size(c.oid) AS size_bytes,
+                       i.indisvalid AS valid
+                FROM pg_class c
+                JOIN pg_index i ON i.indexrelid = c.oid
+                JOIN pg_am am ON am.oid = c.relam
+                WHERE c.relname = :name
+            """),
+            {"name": name}
+        ).first()
+        rows = conn.execute(
+            text(f"""
+                SELECT count(*) FROM {EMBEDDING_TABLE} e
+                JOIN {COLLECTION_TABLE} c ON c.uuid = e.collection_id
+                WHERE c.name = :collection
+            """),
+            {"collection": collection_name}
+        ).scalar()
+
+    return {
+        "collection": collection_name,
+        "index": name if row else None,
+        "method": row.method if row else None,
+        # An interrupted concurrent build leaves an invalid index the planner ignores
+        "valid": row.valid if row else None,
+        "definition": row.definition if row else None,
+        "size": row.size if row else None,
+        "size_bytes": row.size_bytes if row else None,
+        "quantization": _index_quantization(row.definition) if row else None,
+        "configured_quantization": quantization_for(collection_name),
+        "rows": rows,
+        "ef_search": settings.VECTOR_INDEX_EF_SEARCH,
+        "probes": settings.VECTOR_INDEX_PROBES,
+    }
@@ -1,17 +1,61 @@
 # backend/app/main.py
 
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import get_settings
+from app.core.logger import configure_logging
+from app.core.loop_monitor import EventLoopMonitor
+from app.core.metrics import TraceMiddleware, render_metrics
 from app.api.v1.api import api_router
+from app.db.session import async_engine
+from app.services.knowledge_events import KnowledgeEventBus
+from app.services.rag_service import RAGService
+from app.services.ingestion_jobs import IngestionJobQueue
+from app.services.document_processor import shutdown_parse_executor
 
 settings = get_settings()
 
+# Queue-backed logging for the whole process, before anything logs
+configure_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.loop_monitor = EventLoopMonitor()
+    app.state.loop_monitor.start()
+    # Build the RAG pipeline once per worker and share it across requests
+    app.state.rag_service = RAGService()
+    app.state.ingestion_queue = IngestionJobQueue(on_complete=app.state.rag_service.knowledge_base_changed)
+    await app.state.ingestion_queue.start()
+    # Changes made by other workers and replicas (this one's are handled where they happen)
+    app.state.knowledge_events = KnowledgeEventBus()
+    if settings.KB_EVENTS_ENABLED:
+        app.state.knowledge_events.subscribe(
+            lambda event: app.state.rag_service.knowledge_base_changed(),
+            collection=app.state.rag_service.collection_name
+        )
+        app.state.knowledge_events.start()
+    try:
+        yield
+    finally:
+        await app.state.knowledge_events.stop()
+        await app.state.ingestion_queue.stop()
+        shutdown_parse_executor()
+        await app.state.rag_service.aclose()
+        await async_engine.dispose()
+        await app.state.loop_monitor.stop()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
+# Trace ids and request timings; added first so CORS wraps it and exposes X-Trace-ID
+app.add_middleware(TraceMiddleware)
+
 # Set up CORS
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +63,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Trace-ID"],
 )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
\ No newline at end of file
+app.include_router(api_router, prefix=settings.API_V1_STR)
+
+@app.get("/health")
+async def health(request: Request) -> Dict[str, Any]:
+    """
+    Liveness check with this worker's event loop lag, so load tests can tell
+    when the loop, not the backends, is the bottleneck, and the knowledge base
+    versions it has caught up with.
+    """
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "event_loop": request.app.state.loop_monitor.stats(),
+        "knowledge_base_versions": request.app.state.knowledge_events.versions,
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request) -> Response:
+    """Prometheus scrape endpoint: RAG stage latencies, token counts, cache hit ratios and ingestion timings."""
+    body, content_type = render_metrics(request.headers.get("accept"))
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,15 @@
+# backend/app/schemas/knowledge.py
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+class VectorIndexRequest(BaseModel):
+    """Schema for building the ANN index on the knowledge base embeddings"""
+    method: Literal["hnsw", "ivfflat"] = "hnsw"
+    m: int = Field(16, ge=2, le=100)
+    ef_construction: int = Field(64, ge=4, le=1000)
+    lists: int | None = Field(None, ge=1, description="IVFFlat lists; derived from the row count if omitted")
+    quantization: Literal["none", "halfvec", "binary"] | None = Field(
+        None, description="Index halfvec or binary-quantized embeddings; the collection's configured quantization if omitted"
+    )
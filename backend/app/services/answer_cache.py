@@ -0,0 +1,285 @@
+# backend/app/services/answer_cache.py
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.metrics import CACHE_LOOKUPS
+from app.db.session import async_engine, engine
+from app.db.vector_index import to_pgvector
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _CacheEntry:
+    embedding: np.ndarray
+    answer: str
+    created_at: float
+
+@dataclass
+class CacheLookup:
+    """Result of an answer cache lookup, passed back to store() on a miss."""
+    question: str
+    personality: str
+    generation: int
+    # Shared entries are only reused within the same scope (see AnswerCache.lookup)
+    scope: str = ""
+    answer: Optional[str] = None
+    embedding: Optional[np.ndarray] = None
+
+def _normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+class AnswerCache:
+    """
+    Semantic cache of generated answers, keyed on question embeddings.
+
+    Questions are matched by cosine similarity so paraphrases of a cached question
+    reuse its answer. Entries are partitioned by personality, held in a per-process
+    LRU and optionally mirrored to a Postgres table shared by all workers.
+
+    Shared rows are never deleted on invalidation. Each row records the
+    shared_generation (the knowledge base state, set by the owner) and the
+    caller's scope it was generated under, lookups only match rows of the
+    current ones, and rows past the TTL are pruned as new answers are stored.
+    So one knowledge base change costs no DELETE however many workers see it,
+    and a personality's new prompt leaves the others' answers alone.
+    """
+
+    def __init__(
+            self,
+            embeddings: Embeddings,
+            similarity_threshold: float = settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            max_entries: int = settings.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds: int = settings.ANSWER_CACHE_TTL_SECONDS,
+            shared: bool = settings.ANSWER_CACHE_SHARED,
+            shared_generation: str = ""
+    ):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self.shared_generation = shared_generation
+
+        self._entries: Dict[str, OrderedDict[str, _CacheEntry]] = {}
+        # Bumped on invalidation so answers generated from the old knowledge base
+        # are not stored after the cache was cleared.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.shared:
+            self.create_table()
+
+    def create_table(self) -> None:
+        """Create the shared cache table if it does not exist."""
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS answer_cache (
+                    id BIGSERIAL PRIMARY KEY,
+                    personality TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    embedding vector NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """))
+            # Tables from before generations were recorded; their rows never match
+            conn.execute(text("ALTER TABLE answer_cache ADD COLUMN IF NOT EXISTS generation TEXT NOT NULL DEFAULT ''"))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_answer_cache_personality
+                ON answer_cache (personality, created_at)
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_answer_cache_generation
+                ON answer_cache (personality, generation)
+            """))
+
+    async def lookup(self, question: str, personality: str, scope: str = "") -> CacheLookup:
+        """
+        Find a cached answer for a question.
+
+        Args:
+            question: The visitor's question
+            personality: Personality the answer must have been generated with
+            scope: Anything else a shared answer must have been generated
+                under, e.g. the personality's prompt version
+
+        Returns:
+            CacheLookup with the answer set on a hit
+        """
+        result = CacheLookup(
+            question=question,
+            personality=personality,
+            generation=self._generation,
+            scope=f"{self.shared_generation}:{scope}"
+        )
+        partition = self._partition(personality)
+        key = _normalize_question(question)
+
+        # Exact repeats (e.g. /about, /projects) don't need an embedding call
+        entry = partition.get(key)
+        if entry is not None and not self._expired(entry):
+            partition.move_to_end(key)
+            return self._hit(result, entry.answer, "exact")
+
+        result.embedding = self._normalize(await self.embeddings.aembed_query(question))
+
+        answer = self._lookup_local(partition, result.embedding)
+        if answer is not None:
+            return self._hit(result, answer, "semantic")
+
+        if self.shared:
+            try:
+                answer = await self._lookup_shared(personality, result.scope, result.embedding)
+            except Exception as e:
+                logger.warning(f"Shared answer cache lookup failed: {str(e)}")
+                answer = None
+            if answer is not None:
+                self._store_local(key, personality, result.embedding, answer)
+                return self._hit(result, answer, "shared")
+
+        self.misses += 1
+        CACHE_LOOKUPS.labels(cache="answer", result="miss").inc()
+        return result
+
+    async def store(self, lookup: CacheLookup, answer: str) -> None:
+        """Cache an answer generated after a miss."""
+        if lookup.generation != self._generation or lookup.embedding is None or not answer:
+            return
+
+        self._store_local(_normalize_question(lookup.question), lookup.personality, lookup.embedding, answer)
+        if self.shared:
+            try:
+                await self._store_shared(lookup, answer)
+            except Exception as e:
+                logger.warning(f"Shared answer cache store failed: {str(e)}")
+
+    async def invalidate(self, shared_generation: Optional[str] = None) -> None:
+        """
+        Drop every answer cached by this worker, e.g. after the knowledge base changed.
+
+        Args:
+            shared_generation: The new knowledge base state, if it changed; shared
+                answers from other states stop matching
+        """
+        self._generation += 1
+        self._entries.clear()
+        if shared_generation is not None:
+            self.shared_generation = shared_generation
+        logger.info("Answer cache invalidated")
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "entries": sum(len(p) for p in self._entries.values()),
+        }
+
+    def _hit(self, result: CacheLookup, answer: str, tier: str) -> CacheLookup:
+        self.hits += 1
+        CACHE_LOOKUPS.labels(cache="answer", result="hit").inc()
+        result.answer = answer
+        logger.info("Answer cache hit", extra={"tier": tier, "personality": result.personality})
+        return result
+
+    def _partition(self, personality: str) -> OrderedDict:
+        return self._entries.setdefault(personality, OrderedDict())
+
+    def _expired(self, entry: _CacheEntry) -> bool:
+        return time.monotonic() - entry.created_at > self.ttl_seconds
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _lookup_local(self, partition: OrderedDict, embedding: np.ndarray) -> Optional[str]:
+        # Evict expired entries first so they can't match
+        for key in [k for k, e in partition.items() if self._expired(e)]:
+            del partition[key]
+        if not partition:
+            return None
+
+        keys = list(partition.keys())
+        matrix = np.stack([partition[k].embedding for k in keys])
+        similarities = matrix @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        partition.move_to_end(keys[best])
+        return partition[keys[best]].answer
+
+    def _store_local(self, key: str, personality: str, embedding: np.ndarray, answer: str) -> None:
+        partition = self._partition(personality)
+        partition[key] = _CacheEntry(embedding=embedding, answer=answer, created_at=time.monotonic())
+        partition.move_to_end(key)
+        while len(partition) > self.max_entries:
+            partition.popitem(last=False)
+
+    async def _lookup_shared(self, personality: str, scope: str, embedding: np.ndarray) -> Optional[str]:
+        async with async_engine.connect() as conn:
+            row = (await conn.execute(
+                text("""
+                    SELECT answer, 1 - (embedding <=> CAST(CAST(:embedding AS text) AS vector)) AS similarity
+                    FROM answer_cache
+                    WHERE personality = :personality
+                      AND generation = :scope
+                      AND created_at > now() - make_interval(secs => :ttl)
+                      -- Rows from before a switch to differently sized embeddings
+                      AND vector_dims(embedding) = :dimensions
+                    ORDER BY embedding <=> CAST(CAST(:embedding AS text) AS vector)
+                    LIMIT 1
+                """),
+                {
+                    "embedding": to_pgvector(embedding),
+                    "personality": personality,
+                    "scope": scope,
+                    "ttl": self.ttl_seconds,
+                    "dimensions": len(embedding),
+                }
+            )).first()
+        if row is None or row.similarity < self.similarity_threshold:
+            return None
+        return row.answer
+
+    async def _store_shared(self, lookup: CacheLookup, answer: str) -> None:
+        async with async_engine.begin() as conn:
+            # Prune expired rows for this personality so the table stays small; rows
+            # of old generations go the same way
+            await conn.execute(
+                text("""
+                    DELETE FROM answer_cache
+                    WHERE personality = :personality
+                      AND created_at <= now() - make_interval(secs => :ttl)
+                """),
+                {"personality": lookup.personality, "ttl": self.ttl_seconds}
+            )
+            await conn.execute(
+                text("""
+                    INSERT INTO answer_cache (personality, generation, question, embedding, answer)
+                    VALUES (:personality, :scope, :question, CAST(CAST(:embedding AS text) AS vector), :answer)
+                """),
+                {
+                    "personality": lookup.personality,
+                    "scope": lookup.scope,
+                    "question": lookup.question,
+                    "embedding": to_pgvector(lookup.embedding),
+                    "answer": answer,
+                }
+            )
@@ -0,0 +1,186 @@
+# backend/app/services/chain_registry.py
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+
+from app.config import CONTACT_DETAILS, PERSONALITY_SETTINGS
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# One system prompt per personality (the personality's own prompt goes first) and
+# a short human turn, so the instructions aren't repeated on every call.
+SYSTEM_TEMPLATE = (
+    "You are acting as me, the portfolio owner, answering questions about my experience, projects and "
+    "background from my resume and portfolio. Keep a professional yet casual, conversational tone. "
+    "Always write complete sentences — never stop mid-sentence. Aim for 3-5 sentences unless the "
+    "question genuinely requires more detail.\n"
+    "Only use information from the provided context, and be specific about the projects, technologies "
+    "and experiences it mentions. If it doesn't contain enough detail to fully answer the question, "
+    "say what you do know and which details are not available.\n"
+    "Stay true to the question and do not add extra lines like \"If you have any more questions or need "
+    "further details, feel free to ask!\"\n"
+    "When asked for contact details, use the ones below; I want to be reachable by mobile phone as well. "
+    "Give links (GitHub, Twitter, resume, etc.) as <a href='link'>link</a>, with the name of the link as its text. "
+    "My contact details are: Mobile Phone: {phone_number}, "
+    "GitHub: {github}, "
+    "Twitter: {twitter}, "
+    "Resume: {resume}"
+)
+
+HUMAN_TEMPLATE = (
+    "Information about me from my resume and portfolio:\n\n"
+    "{context}\n\n"
+    "Question: {question}"
+)
+
+def current_personality(now: Optional[datetime.datetime] = None) -> str:
+    """Determine the current personality based on time and day."""
+    now = now or datetime.datetime.now()
+    if now.weekday() >= 5:  # Saturday and Sunday
+        return "weekend"
+    hour = now.hour
+    if 6 <= hour < 12:
+        return "morning"
+    elif 22 <= hour or hour < 6:
+        return "late_night"
+    else:
+        return "base"
+
+def build_prompt(system_prompt: str, contact_details: Dict[str, str]) -> ChatPromptTemplate:
+    """Build the prompt for one personality, with everything but the context and question filled in."""
+    system = f"{system_prompt}\n{SYSTEM_TEMPLATE.format(**contact_details)}"
+    # Braces in configured text are literal, not template variables
+    system = system.replace("{", "{{").replace("}", "}}")
+    return ChatPromptTemplate.from_messages([("system", system), ("human", HUMAN_TEMPLATE)])
+
+def load_personality_config(path: Optional[str]) -> Tuple[Dict[str, Dict[str, str]], Dict[str, str]]:
+    """
+    Read personalities and contact details, with app/config.py as the defaults.
+
+    The file is JSON with optional "personalities" ({name: {"system_prompt": ...}})
+    and "contact_details" objects; entries in it replace or add to the defaults.
+
+    Args:
+        path: Path of the JSON file, or None for the defaults only
+
+    Returns:
+        The personalities and the contact details
+
+    Raises:
+        ValueError: If the file doesn't have the expected shape
+    """
+    personalities = dict(PERSONALITY_SETTINGS)
+    contact_details = dict(CONTACT_DETAILS)
+    if path is not None:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        personalities.update(data.get("personalities", {}))
+        contact_details.update(data.get("contact_details", {}))
+
+    for name, config in personalities.items():
+        if not isinstance(config, dict) or not isinstance(config.get("system_prompt", ""), str):
+            raise ValueError(f"Personality {name} needs a string system_prompt")
+    missing = {"phone_number", "github", "twitter", "resume"} - contact_details.keys()
+    if missing:
+        raise ValueError(f"Contact details are missing: {', '.join(sorted(missing))}")
+    return personalities, contact_details
+
+class ChainRegistry:
+    """
+    One compiled RAG chain per personality, picked per request.
+
+    All chains are built up front, so a request only looks one up. With
+    PERSONALITY_CONFIG_PATH set, the file's modification time is checked at
+    most every PERSONALITY_CONFIG_CHECK_SECONDS and the chains are rebuilt
+    when it changes; every worker picks up the edit on its own. A file that
+    fails to load is logged and the previous chains stay in use.
+    """
+
+    def __init__(
+            self,
+            build_chain: Callable[[ChatPromptTemplate], Runnable],
+            config_path: Optional[str] = settings.PERSONALITY_CONFIG_PATH,
+            check_interval: float = settings.PERSONALITY_CONFIG_CHECK_SECONDS
+    ):
+        self._build_chain = build_chain
+        self.config_path = config_path
+        self.check_interval = check_interval
+        self._chains: Dict[str, Runnable] = {}
+        self._prompt_versions: Dict[str, str] = {}
+        self._mtime: Optional[int] = None
+        self._next_check = 0.0
+        self.rebuild()
+
+    @property
+    def personalities(self) -> List[str]:
+        return list(self._chains)
+
+    def get(self, personality: str) -> Runnable:
+        """The chain for a personality, or the base one for an unknown name."""
+        return self._chains.get(personality) or self._chains["base"]
+
+    def prompt_version(self, personality: str) -> str:
+        """A hash of the prompt get(personality) was built with; changes when the prompt does."""
+        return self._prompt_versions.get(personality) or self._prompt_versions["base"]
+
+    def rebuild(self) -> None:
+        """Load the config and build every chain, then swap them in at once."""
+        mtime = self._config_mtime()
+        personalities, contact_details = load_personality_config(self.config_path)
+        if "base" not in personalities:
+            raise ValueError("The base personality can't be removed")
+        prompts = {
+            name: build_prompt(config.get("system_prompt", ""), contact_details)
+            for name, config in personalities.items()
+        }
+        chains = {name: self._build_chain(prompt) for name, prompt in prompts.items()}
+        # Requests in flight keep the chain they already picked
+        self._chains = chains
+        self._prompt_versions = {
+            name: hashlib.sha256(prompt.pretty_repr().encode("utf-8")).hexdigest()[:16]
+            for name, prompt in prompts.items()
+        }
+        self._mtime = mtime
+        logger.info("Built RAG chains", extra={"personalities": ", ".join(chains)})
+
+    def maybe_reload(self) -> bool:
+        """
+        Rebuild the chains if the config file changed since the last build.
+
+        Returns:
+            True if the chains were rebuilt
+        """
+        if self.config_path is None:
+            return False
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+
+        mtime = self._config_mtime()
+        if mtime == self._mtime:
+            return False
+        try:
+            self.rebuild()
+            return True
+        except Exception as e:
+            # Don't retry the same broken file on every check
+            self._mtime = mtime
+            logger.error(f"Error reloading personality config, keeping the previous one: {str(e)}", exc_info=True)
+            return False
+
+    def _config_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.config_path).st_mtime_ns if self.config_path else None
+        except OSError:
+            return None
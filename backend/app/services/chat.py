@@ -1,6 +1,5 @@
-from typing import Optional
+from typing import Optional, AsyncIterator, Dict, Any
 import logging
-from sqlalchemy.orm import Session
 
 from app.core.logger import setup_logger
 from app.core.exceptions import ChatProcessingError
@@ -8,34 +7,48 @@ from app.services.rag_service import RAGService
 
 logger = setup_logger(__name__)
 
+# Commands that are answered by asking the RAG pipeline a fixed question
+COMMAND_QUESTIONS = {
+    'about': "Tell me about yourself",
+    'projects': "What projects have you worked on?"
+}
+
 class ChatService:
-    def __init__(self, db: Session):
-        logger.info("Initializing ChatService")
-        self.db = db
-        self.rag_service = RAGService()
-        logger.info("ChatService initialized with RAG service")
+    def __init__(self, rag_service: Optional[RAGService] = None):
+        self.rag_service = rag_service or RAGService()
 
     async def process_message(self, message: str) -> str:
         """Process a chat message and return a response."""
-        logger.info(f"Processing message: {message}")
         try:
             if message.startswith('/'):
-                logger.info("Processing as command")
                 return await self.handle_command(message)
 
             # Keep await and use async query
-            response = await self.rag_service.query(message)
-            logger.info(f"Generated response using RAG: {response}")
-            return response
+            return await self.rag_service.query(message)
 
         except Exception as e:
             logger.error(f"Error processing chat message: {str(e)}", exc_info=True)
             raise ChatProcessingError(str(e))
 
+    async def stream_message(self, message: str) -> AsyncIterator[Dict[str, Any]]:
+        """Process a chat message and yield streaming events."""
+        if message.startswith('/'):
+            command = message[1:].lower().split()[0]
+            if command not in COMMAND_QUESTIONS:
+                # Static commands are answered in one piece
+                response = await self.handle_command(message)
+                yield {"event": "token", "data": {"content": response}}
+                yield {"event": "done", "data": {"command": command}}
+                return
+            message = COMMAND_QUESTIONS[command]
+
+        async for event in self.rag_service.stream(message):
+            yield event
+
     async def handle_command(self, message: str) -> str:
         """Handle special commands."""
         command = message[1:].lower().split()[0]
-        logger.info(f"Handling command: {command}")
+        logger.info("Handling command", extra={"command": command})
 
         commands = {
             'help': self._help_command,
@@ -45,11 +58,9 @@ class ChatService:
         }
 
         if command in commands:
-            response = await commands[command]()
-            logger.info(f"Command response: {response}")
-            return response
+            return await commands[command]()
 
-        logger.warning(f"Unknown command: {command}")
+        logger.warning("Unknown command", extra={"command": command})
         return f"Unknown command: {command}. Type /help for available commands."
 
     async def _help_command(self) -> str:
@@ -60,10 +71,10 @@ class ChatService:
                 /clear - Clear chat history"""
 
     async def _about_command(self) -> str:
-        return await self.process_message("Tell me about yourself")
+        return await self.process_message(COMMAND_QUESTIONS['about'])
 
     async def _projects_command(self) -> str:
-        return await self.process_message("What projects have you worked on?")
+        return await self.process_message(COMMAND_QUESTIONS['projects'])
 
     async def _clear_command(self) -> str:
         return "Chat history cleared"
\ No newline at end of file
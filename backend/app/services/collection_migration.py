@@ -0,0 +1,326 @@
+# backend/app/services/collection_migration.py
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db import vector_index
+from app.db.bulk_load import COLLECTION_TABLE, EMBEDDING_TABLE, copy_embeddings, get_or_create_collection, lock_collection
+from app.db.collections import CollectionEmbedding, collection_embedding
+from app.db.session import SessionLocal
+from app.services.document_service import ensure_document_catalog
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.embedding_pipeline import EmbeddingPipeline
+from app.services.knowledge_events import record_change
+from app.services.providers import get_embeddings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SHADOW_SUFFIX = "__reembed"
+RETIRED_SUFFIX = "__retired"
+
+# Chunks of the live collection with no copy in the shadow yet. Each shadow row's
+# custom_id is the uuid of the live row it was embedded from.
+_MISSING_CHUNKS = text(f"""
+    SELECT e.uuid, e.document, e.cmetadata
+    FROM {EMBEDDING_TABLE} e
+    WHERE e.collection_id = CAST(:source AS UUID)
+      AND e.uuid > CAST(:after AS UUID)
+      AND NOT EXISTS (
+          SELECT 1 FROM {EMBEDDING_TABLE} s
+          WHERE s.collection_id = CAST(:shadow AS UUID) AND s.custom_id = CAST(e.uuid AS TEXT)
+      )
+    ORDER BY e.uuid
+    LIMIT :limit
+""")
+
+# Copies of chunks that were deleted from the live collection since
+_DELETE_STALE_CHUNKS = text(f"""
+    DELETE FROM {EMBEDDING_TABLE} s
+    WHERE s.collection_id = CAST(:shadow AS UUID)
+      AND NOT EXISTS (
+          SELECT 1 FROM {EMBEDDING_TABLE} e
+          WHERE e.collection_id = CAST(:source AS UUID) AND CAST(e.uuid AS TEXT) = s.custom_id
+      )
+""")
+
+_FIRST_UUID = "00000000-0000-0000-0000-000000000000"
+
+# Longest the switch makes ingestion wait, per attempt
+SWITCH_LOCK_TIMEOUT = "5s"
+SWITCH_ATTEMPTS = 10
+
+class CollectionMigration:
+    """
+    Re-embed a collection with another model or output size, without downtime.
+
+    Every chunk is embedded again into a shadow collection while the live one
+    keeps serving. Chunks added or deleted meanwhile are caught up. The switch
+    then locks the collection name, waiting for ingestion that already
+    resolved the old collection to commit, and, in one short transaction that
+    embeds nothing, checks that the shadow has every chunk and renames it to
+    the live collection's name (and the old one to a retired name). If chunks
+    arrived in the meantime it lets go, embeds them and tries again. RAGService workers are told through the
+    knowledge base event bus, or otherwise notice within
+    COLLECTION_CHECK_SECONDS, and switch their question embeddings with it;
+    until then they keep searching the retired collection.
+
+    An interrupted migration resumes where it stopped: chunks already in the
+    shadow are not embedded again.
+    """
+
+    def __init__(
+            self,
+            collection_name: str,
+            target: CollectionEmbedding,
+            page_size: int = 1000,
+            quantization: Optional[str] = None
+    ):
+        self.collection_name = collection_name
+        self.target = target
+        self.page_size = page_size
+        # The shadow's ANN index is built for the quantization of the name it will take over
+        self.quantization = quantization or vector_index.quantization_for(collection_name)
+        self.shadow_name = f"{collection_name}{SHADOW_SUFFIX}"
+
+        embeddings = get_embeddings(model=target.model, dimensions=target.dimensions, max_retries=0)
+        if settings.EMBEDDING_CACHE_ENABLED:
+            embeddings = CachedEmbeddings(embeddings, model_name=target.name)
+        self.embeddings = embeddings
+
+    async def run(self, drop_retired: bool = False) -> Dict[str, Any]:
+        """
+        Migrate the collection and switch readers over.
+
+        Args:
+            drop_retired: Delete the old collection once workers have had time to switch
+
+        Returns:
+            Summary of the migration
+
+        Raises:
+            ValueError: If the collection doesn't exist or already uses the target embedding
+        """
+        start = time.perf_counter()
+        source = await asyncio.to_thread(collection_embedding, self.collection_name)
+        if source.collection_id is None:
+            raise ValueError(f"Collection {self.collection_name} does not exist")
+        if source.name == self.target.name:
+            raise ValueError(f"Collection {self.collection_name} is already embedded with {source.name}")
+        logger.info(f"Re-embedding {self.collection_name} from {source.name} to {self.target.name}")
+
+        await asyncio.to_thread(ensure_document_catalog)
+        shadow_id = await asyncio.to_thread(self._create_shadow)
+
+        embedded, removed = await self._sync(source.collection_id, shadow_id)
+        index = await asyncio.to_thread(vector_index.get_index_status, self.collection_name)
+        if index["method"]:
+            await asyncio.to_thread(
+                vector_index.create_index, self.shadow_name, method=index["method"], quantization=self.quantization
+            )
+
+        retired_name = f"{self.collection_name}{RETIRED_SUFFIX}_{time.strftime('%Y%m%d%H%M%S')}"
+        # Catches up on what was ingested during the index build
+        final, final_removed = await self._switch(source.collection_id, shadow_id, retired_name)
+
+        if drop_retired:
+            # Give every worker a chance to notice the switch before its collection disappears
+            await asyncio.sleep(2 * settings.COLLECTION_CHECK_SECONDS)
+            await asyncio.to_thread(self._drop_collection, retired_name)
+
+        summary = {
+            "collection": self.collection_name,
+            "from": source.name,
+            "to": self.target.name,
+            "collection_id": shadow_id,
+            "chunks_embedded": embedded + final,
+            "chunks_removed": removed + final_removed,
+            "retired": None if drop_retired else retired_name,
+            "seconds": round(time.perf_counter() - start, 1),
+        }
+        logger.info(f"Re-embedding finished: {summary}")
+        return summary
+
+    def _create_shadow(self) -> str:
+        """Create the shadow collection, or reuse one left by an interrupted run with the same target."""
+        existing = collection_embedding(self.shadow_name)
+        if existing.collection_id is not None and existing.name != self.target.name:
+            logger.info(f"Discarding {self.shadow_name}, which was embedded with {existing.name}")
+            self._drop_collection(self.shadow_name)
+
+        db = SessionLocal()
+        try:
+            shadow_id = get_or_create_collection(db, self.shadow_name, self.target.metadata())
+            db.commit()
+            return shadow_id
+        finally:
+            db.close()
+
+    async def _sync(self, source_id: str, shadow_id: str) -> Tuple[int, int]:
+        """
+        Embed the live chunks missing from the shadow and delete copies of removed ones.
+
+        Each page is committed on its own, so an interruption loses at most one page.
+
+        Returns:
+            Chunks embedded and chunks removed
+        """
+        db = SessionLocal()
+        try:
+            removed = (await asyncio.to_thread(
+                db.execute, _DELETE_STALE_CHUNKS, {"source": source_id, "shadow": shadow_id}
+            )).rowcount
+            embedded = 0
+            after = _FIRST_UUID
+            while True:
+                rows = (await asyncio.to_thread(
+                    db.execute,
+                    _MISSING_CHUNKS,
+                    {"source": source_id, "shadow": shadow_id, "after": after, "limit": self.page_size}
+                )).fetchall()
+                if not rows:
+                    break
+                after = str(rows[-1].uuid)
+                embedded += await self._embed_page(db, shadow_id, rows)
+                await asyncio.to_thread(db.commit)
+                logger.info(f"Re-embedded {embedded} chunks of {self.collection_name}")
+            await asyncio.to_thread(db.commit)
+            return embedded, removed
+        except Exception:
+            await asyncio.to_thread(db.rollback)
+            raise
+        finally:
+            db.close()
+
+    async def _embed_page(self, db: Session, shadow_id: str, rows) -> int:
+        texts = [row.document for row in rows]
+        # psycopg2 returns json columns as dicts; stay safe if one comes back as text
+        metadatas = [json.loads(row.cmetadata) if isinstance(row.cmetadata, str) else (row.cmetadata or {}) for row in rows]
+        source_ids = [str(row.uuid) for row in rows]
+        inserted = 0
+
+        async def insert_batch(indices, vectors) -> None:
+            nonlocal inserted
+            inserted += await asyncio.to_thread(
+                copy_embeddings,
+                db,
+                shadow_id,
+                [texts[i] for i in indices],
+                [metadatas[i] for i in indices],
+                vectors,
+                [source_ids[i] for i in indices]
+            )
+
+        await EmbeddingPipeline(self.embeddings, model_name=self.target.model).run(texts, insert_batch)
+        return inserted
+
+    async def _switch(self, source_id: str, shadow_id: str, retired_name: str) -> Tuple[int, int]:
+        """
+        Catch the shadow up and swap the collection names.
+
+        Embedding happens outside any lock. The swap itself only runs once the
+        shadow has a copy of every live chunk.
+
+        Returns:
+            Chunks embedded and chunks removed
+
+        Raises:
+            RuntimeError: If ingestion kept changing the collection for SWITCH_ATTEMPTS attempts
+        """
+        embedded = removed = 0
+        for attempt in range(1, SWITCH_ATTEMPTS + 1):
+            synced, synced_removed = await self._sync(source_id, shadow_id)
+            switched, switch_removed = await asyncio.to_thread(self._try_switch, source_id, shadow_id, retired_name)
+            embedded += synced
+            removed += synced_removed + switch_removed
+            if switched:
+                logger.info(f"Switched {self.collection_name} to collection {shadow_id}; the old one is {retired_name}")
+                return embedded, removed
+            logger.info(f"Chunks of {self.collection_name} changed during switch attempt {attempt}; catching up again")
+        raise RuntimeError(
+            f"Could not switch {self.collection_name}: it kept changing for {SWITCH_ATTEMPTS} attempts; run again later"
+        )
+
+    def _try_switch(self, source_id: str, shadow_id: str, retired_name: str) -> Tuple[bool, int]:
+        """
+        Swap the collection names if the shadow holds every live chunk, in one short transaction.
+
+        Returns:
+            Whether the names were swapped, and the stale copies removed
+        """
+        db = SessionLocal()
+        try:
+            # Ingestion waits on these locks for at most the timeout (usually a few ms)
+            db.execute(text(f"SET LOCAL lock_timeout = '{SWITCH_LOCK_TIMEOUT}'"))
+            # Waits for writers that resolved the old collection id; new ones then resolve the shadow's
+            lock_collection(db, self.collection_name, exclusive=True)
+            # And for deletions in flight; readers carry on
+            db.execute(text(f"LOCK TABLE {EMBEDDING_TABLE} IN SHARE MODE"))
+
+            missing = db.execute(
+                _MISSING_CHUNKS, {"source": source_id, "shadow": shadow_id, "after": _FIRST_UUID, "limit": 1}
+            ).first()
+            if missing is not None:
+                db.rollback()
+                return False, 0
+            removed = db.execute(_DELETE_STALE_CHUNKS, {"source": source_id, "shadow": shadow_id}).rowcount
+            self._rename(db, source_id, shadow_id, retired_name)
+            db.commit()
+            return True, removed
+        except OperationalError as e:
+            db.rollback()
+            # lock_not_available: a long write held the collection; retry after catching up
+            if getattr(e.orig, "pgcode", None) == "55P03":
+                return False, 0
+            raise
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _rename(self, db: Session, source_id: str, shadow_id: str, retired_name: str) -> None:
+        rename = text(f"UPDATE {COLLECTION_TABLE} SET name = :name WHERE uuid = CAST(:id AS UUID)")
+        db.execute(rename, {"name": retired_name, "id": source_id})
+        db.execute(rename, {"name": self.collection_name, "id": shadow_id})
+
+        # Managed indexes are named after their collection
+        live_index = vector_index.index_name(self.collection_name)
+        db.execute(text(f'ALTER INDEX IF EXISTS "{live_index}" RENAME TO "{vector_index.index_name(retired_name)}"'))
+        db.execute(text(f'ALTER INDEX IF EXISTS "{vector_index.index_name(self.shadow_name)}" RENAME TO "{live_index}"'))
+
+        db.execute(
+            text("UPDATE knowledge_documents SET embedding_model = :model WHERE collection_name = :name"),
+            {"model": self.target.name, "name": self.collection_name}
+        )
+        # Workers listening for events switch now rather than at their next collection check
+        record_change(db, [self.collection_name], "switched")
+
+    @staticmethod
+    def _drop_collection(collection_name: str) -> None:
+        vector_index.drop_index(collection_name)
+        db = SessionLocal()
+        try:
+            collection_id = db.execute(
+                text(f"SELECT uuid FROM {COLLECTION_TABLE} WHERE name = :name"),
+                {"name": collection_name}
+            ).scalar()
+            if collection_id is None:
+                return
+            deleted = db.execute(
+                text(f"DELETE FROM {EMBEDDING_TABLE} WHERE collection_id = CAST(:id AS UUID)"),
+                {"id": str(collection_id)}
+            ).rowcount
+            db.execute(text(f"DELETE FROM {COLLECTION_TABLE} WHERE uuid = CAST(:id AS UUID)"), {"id": str(collection_id)})
+            db.commit()
+            logger.info(f"Dropped collection {collection_name} ({deleted} chunks)")
+        finally:
+            db.close()
@@ -0,0 +1,143 @@
+# backend/app/services/context_builder.py
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from app.core.config import get_settings
+from app.services.embedding_pipeline import count_tokens
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Shorter shared runs between two chunks are coincidence, not splitter overlap
+MIN_OVERLAP_CHARS = 20
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of left that is also a prefix of right."""
+    probe = right[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+    # Only positions where the probe occurs can start an overlap; the earliest is the longest
+    position = left.find(probe, max(0, len(left) - len(right)))
+    while position != -1:
+        if right.startswith(left[position:]):
+            return len(left) - position
+        position = left.find(probe, position + 1)
+    return 0
+
+@dataclass
+class _Section:
+    """Selected text from one section of one source, as runs of contiguous chunks."""
+    source: str
+    section: str
+    category: str
+    page: Optional[int]
+    runs: List[str] = field(default_factory=list)
+
+    def add(self, text: str) -> str:
+        """
+        Add a chunk, stitching it onto a run it overlaps. Returns the text that
+        was actually new.
+        """
+        for i, run in enumerate(self.runs):
+            if text in run:
+                return ""
+            if run in text:
+                self.runs[i] = text
+                return text.replace(run, "", 1)
+            overlap = _overlap(run, text)
+            if overlap:
+                self.runs[i] = run + text[overlap:]
+                return text[overlap:]
+            overlap = _overlap(text, run)
+            if overlap:
+                self.runs[i] = text + run[overlap:]
+                return text[:-overlap]
+        self.runs.append(text)
+        return text
+
+    def header(self) -> str:
+        return f"[Source: {self.source} | Section: {self.section or 'General'} | Type: {self.category}]"
+
+    def render(self) -> str:
+        return self.header() + "\n" + "\n...\n".join(self.runs)
+
+@dataclass
+class BuiltContext:
+    text: str
+    tokens: int
+    used: List[Document]
+    dropped: int
+
+class ContextBuilder:
+    """
+    Turn retrieved chunks, most relevant first, into prompt context under a token budget.
+
+    Chunks already covered by earlier ones are skipped, and the splitter's
+    overlap between neighbouring chunks is stitched away, so each piece of
+    text appears once. Chunks of the same section are grouped under one
+    header. Chunks are added in relevance order until the next one would
+    exceed max_tokens; smaller, less relevant chunks may still fill the rest.
+    """
+
+    def __init__(
+            self,
+            max_tokens: int = settings.CONTEXT_MAX_TOKENS,
+            model_name: str = settings.CONTEXT_TOKENIZER_MODEL
+    ):
+        self.max_tokens = max_tokens
+        self.model_name = model_name
+
+    def build(self, docs: List[Document]) -> BuiltContext:
+        """
+        Build the context for a list of retrieved documents.
+
+        Args:
+            docs: Retrieved documents in relevance order
+
+        Returns:
+            The context text, its token count and the documents it draws on
+        """
+        sections: Dict[Tuple[str, str, Optional[int]], _Section] = {}
+        used: List[Document] = []
+        tokens = 0
+        dropped = 0
+
+        for doc in docs:
+            source = os.path.basename(doc.metadata.get("source", ""))
+            key = (source, doc.metadata.get("section", ""), doc.metadata.get("page"))
+            section = sections.get(key) or _Section(
+                source=source,
+                section=key[1],
+                category=doc.metadata.get("category", "Content"),
+                page=key[2],
+            )
+            # Dry run on a copy so a chunk that doesn't fit leaves the section untouched
+            trial = _Section(section.source, section.section, section.category, section.page, list(section.runs))
+            new_text = trial.add(doc.page_content)
+            if not new_text.strip():
+                continue
+
+            cost = count_tokens([new_text], self.model_name)[0]
+            if key not in sections:
+                cost += count_tokens([trial.header()], self.model_name)[0]
+            if tokens + cost > self.max_tokens:
+                dropped += 1
+                continue
+
+            sections[key] = trial
+            used.append(doc)
+            tokens += cost
+
+        if dropped:
+            logger.debug("Context token budget reached", extra={"dropped_chunks": dropped, "budget": self.max_tokens})
+        return BuiltContext(
+            text="\n\n".join(section.render() for section in sections.values()),
+            tokens=tokens,
+            used=used,
+            dropped=dropped,
+        )
@@ -1,7 +1,16 @@
 # backend/app/services/document_processor.py
 
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, ContextManager, Iterator, Tuple
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext
+from functools import lru_cache
+import asyncio
+import hashlib
 import logging
+import multiprocessing
+import re
+import time
 from pathlib import Path
 import os
 
@@ -11,160 +20,581 @@ from langchain_community.document_loaders.pdf import PyMuPDFLoader
 from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores.pgvector import PGVector
-from langchain_openai import OpenAIEmbeddings
+from sqlalchemy.orm import Session
 from unstructured.partition.auto import partition
 from app.core.config import get_settings
-from app.db.session import SessionLocal
-from app.services.document_service import DocumentService
+from app.core.metrics import INGESTION_STAGE_SECONDS
+from app.db.bulk_load import copy_embeddings, deferred_indexes
+from app.db.collections import CollectionEmbedding, collection_embedding
+from app.db.session import AsyncSessionLocal, SessionLocal, engine
+from app.services.document_service import DocumentService, ensure_source_index
+from app.services.retrievers import ensure_fulltext_index
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.providers import get_embeddings
+from app.services.embedding_pipeline import EmbeddingPipeline
+from app.services.knowledge_events import record_change
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+def _stage(progress: Optional[Any], name: str) -> ContextManager[Any]:
+    """Enter a pipeline stage on the progress tracker, if one was given."""
+    return progress.stage(name) if progress is not None else nullcontext()
+
+class _StageTimer:
+    """
+    Progress tracker that sums the time spent in each stage over one
+    process_documents call and observes each sum in ingestion_stage_seconds
+    once, when the call ends. Stages must not nest, or time is counted twice.
+
+    Passes every stage and update on to the caller's tracker, if any.
+    """
+
+    def __init__(self, progress: Optional[Any] = None):
+        self.progress = progress
+        self.seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            with _stage(self.progress, name):
+                yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def update(self, name: str, **detail: Any) -> None:
+        if self.progress is not None:
+            self.progress.update(name, **detail)
+
+    def observe(self) -> None:
+        for name, seconds in self.seconds.items():
+            INGESTION_STAGE_SECONDS.labels(stage=name).observe(seconds)
+
+# Parsing lives in module-level functions so it can run in a process pool.
+
+_parse_executor: Optional[ProcessPoolExecutor] = None
+
+def get_parse_executor(max_workers: int) -> ProcessPoolExecutor:
+    """Return the shared parsing process pool, creating it on first use."""
+    global _parse_executor
+    if _parse_executor is None:
+        # spawn, not fork: the API process has running threads and open connections
+        _parse_executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _parse_executor
+
+def shutdown_parse_executor() -> None:
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=True, cancel_futures=True)
+        _parse_executor = None
+
+def fingerprint_file(file_path: str) -> Dict[str, Any]:
+    """SHA-256 and size of a file, for the document catalog."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {"content_hash": digest.hexdigest(), "size_bytes": os.path.getsize(file_path)}
+
+# Tried in order: paragraphs, lines, sentences, clauses, words, characters
+DEFAULT_SEPARATORS = ("\n\n", "\n", ".", "!", "?", ",", " ", "")
+
+@lru_cache(maxsize=8)
+def _get_text_splitter(
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: Tuple[str, ...] = DEFAULT_SEPARATORS
+) -> RecursiveCharacterTextSplitter:
+    # Configure text splitter for semantic chunking
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=list(separators),
+        is_separator_regex=False,
+    )
+
+def parse_file(
+        file_path: str,
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: Tuple[str, ...] = DEFAULT_SEPARATORS
+) -> List[Document]:
+    """Load, clean and split a single file. CPU-bound, so kept off the event loop."""
+    path = Path(file_path)
+    logger.info(f"Processing file: {path}")
+
+    try:
+        # Load document based on file type
+        if path.suffix.lower() == '.pdf':
+            docs = _load_pdf(path)
+        elif path.suffix.lower() in ['.tex', '.md']:
+            docs = _load_with_unstructured(path)
+        else:
+            raise ValueError(f"Unsupported file type: {path.suffix}. Supported types: .pdf, .tex, .md")
+
+        # Clean and preprocess documents
+        cleaned_docs = _clean_documents(docs)
+
+        # Split documents into chunks
+        chunks = _split_documents(cleaned_docs, _get_text_splitter(chunk_size, chunk_overlap, separators))
+
+        logger.info(f"Generated {len(chunks)} chunks from {path}")
+        return chunks
+
+    except Exception as e:
+        logger.error(f"Error processing file {path}: {str(e)}", exc_info=True)
+        raise
+
+def _load_pdf(path: Path) -> List[Document]:
+    """Load PDF using PyMuPDF."""
+    loader = PyMuPDFLoader(str(path))
+    return loader.load()
+
+def _load_with_unstructured(path: Path) -> List[Document]:
+    """Load documents using Unstructured's partition capability."""
+    # Use Unstructured to partition the document
+    elements = partition(str(path))
+
+    # Convert elements to LangChain documents with metadata
+    docs = []
+    current_section = ""
+
+    for element in elements:
+        # Update current section if this is a heading
+        if element.category == "HeaderText":
+            current_section = element.text
+            continue
+
+        # Create document with metadata
+        doc = Document(
+            page_content=element.text,
+            metadata={
+                "source": str(path),
+                "section": current_section,
+                "category": element.category,
+                "coordinates": element.coordinates if hasattr(element, "coordinates") else None,
+            }
+        )
+        docs.append(doc)
+
+    return docs
+
+def _clean_documents(docs: List[Document]) -> List[Document]:
+    """Normalise whitespace and strip PDF encoding artifacts for better embeddings."""
+    cleaned_docs = []
+    for doc in docs:
+        text = doc.page_content
+        # Strip C0/C1 control characters (ESC \x1b, SYN \x16, \x88, etc.) that
+        # PyMuPDF emits for ligatures/special chars in some LaTeX-produced PDFs
+        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+        # Restore common ligature artifacts: "con dence" -> "confidence" etc.
+        text = re.sub(r'\bcon dence\b', 'confidence', text)
+        text = re.sub(r'\blter(ing|ed|s)?\b', lambda m: 'filter' + (m.group(1) or ''), text)
+        text = re.sub(r'\bpro le\b', 'profile', text)
+        # Preserve \n\n paragraph breaks, collapse single newlines and extra spaces
+        paragraphs = text.split('\n\n')
+        cleaned_paragraphs = [' '.join(p.split()) for p in paragraphs if p.strip()]
+        cleaned_text = '\n\n'.join(cleaned_paragraphs)
+        cleaned_docs.append(Document(page_content=cleaned_text, metadata=doc.metadata))
+    return cleaned_docs
+
+def _split_documents(docs: List[Document], text_splitter: RecursiveCharacterTextSplitter) -> List[Document]:
+    """Split documents into chunks, discarding low-signal micro-chunks."""
+    chunks = []
+    for doc in docs:
+        doc_chunks = text_splitter.split_documents([doc])
+        # Drop chunks that are too short to carry semantic meaning (e.g. lone section headers)
+        chunks.extend(c for c in doc_chunks if len(c.page_content.strip()) >= 80)
+
+    # Stable content hashes let re-ingestion skip chunks that did not change
+    for chunk in chunks:
+        chunk.metadata["content_hash"] = hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()
+    return chunks
+
 class DocumentProcessor:
     def __init__(
             self,
             collection_name: str = "portfolio_chunks",
             chunk_size: int = 1000,
-            chunk_overlap: int = 200
+            chunk_overlap: int = 200,
+            parse_workers: int = settings.INGESTION_PARSE_WORKERS,
+            bulk_copy: bool = settings.INGESTION_BULK_COPY,
+            separators: Tuple[str, ...] = DEFAULT_SEPARATORS,
+            embedding: Optional[CollectionEmbedding] = None
     ):
 
         self.connection_string = settings.get_database_url()
         self.collection_name = collection_name
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-
-        # Configure text splitter for semantic chunking
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""],
-            is_separator_regex=False,
-        )
+        # Looked up on first use, so parsing alone needs no database
+        self._embedding = embedding
+        self._embeddings: Optional[Embeddings] = None
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = tuple(separators)
+        self.text_splitter = _get_text_splitter(chunk_size, chunk_overlap, self.separators)
+        # More than one worker spreads file parsing over a shared process pool
+        self.parse_workers = parse_workers
+        # Load chunks with binary COPY rather than multi-row INSERTs
+        self.bulk_copy = bulk_copy
+
+    @property
+    def embedding(self) -> CollectionEmbedding:
+        """The model and size of the collection's vectors, which new chunks must match."""
+        if self._embedding is None:
+            self._embedding = collection_embedding(self.collection_name)
+        return self._embedding
+
+    @property
+    def embedding_model(self) -> str:
+        return self.embedding.name
+
+    @property
+    def embeddings(self) -> Embeddings:
+        if self._embeddings is None:
+            # Retries are left to EmbeddingPipeline, which backs off all batches together on a 429
+            embeddings = get_embeddings(
+                model=self.embedding.model, dimensions=self.embedding.dimensions, max_retries=0
+            )
+            if settings.EMBEDDING_CACHE_ENABLED:
+                # Re-uploading unchanged documents then costs no embedding API calls
+                embeddings = CachedEmbeddings(embeddings, model_name=self.embedding.name)
+            self._embeddings = embeddings
+        return self._embeddings
+
+    @embeddings.setter
+    def embeddings(self, embeddings: Embeddings) -> None:
+        self._embeddings = embeddings
 
-    async def process_documents(self, file_paths: List[str], clear_existing: bool = False) -> None:
-        """Process multiple documents and store them in the vector database."""
+    async def process_documents(
+            self,
+            file_paths: List[str],
+            clear_existing: bool = False,
+            incremental: bool = False,
+            progress: Optional[Any] = None,
+            defer_indexes: bool = False,
+            file_info: Optional[Dict[str, Dict[str, Any]]] = None,
+            file_names: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Process multiple documents and store them in the vector database.
+
+        Args:
+            file_paths: Paths of the files to ingest
+            clear_existing: Delete all stored chunks of these files before inserting
+            incremental: Diff each file against its stored chunks by content hash and
+                only embed, insert and delete what changed, in one transaction per file
+            progress: Optional tracker (e.g. an IngestionJob) with a stage(name)
+                context manager and update(name, **detail), used to report
+                parse/embed/store progress
+            defer_indexes: For full (non-incremental) loads, drop the embedding
+                table's secondary indexes and rebuild them after the load. Blocks
+                readers until the load commits, so meant for offline loads
+            file_info: SHA-256 and size per file name, if already known (e.g.
+                computed while saving the upload); other files are hashed here
+            file_names: Original file name per path, for files saved under
+                another name (e.g. uploads); defaults to the path's base name.
+                Chunks are stored and replaced under this name
+
+        Returns:
+            Per-file counts of added, removed and unchanged chunks
+        """
+        progress = _StageTimer(progress)
         try:
             logger.info(f"Processing {len(file_paths)} documents")
 
+            names = {path: (file_names or {}).get(path) or os.path.basename(path) for path in file_paths}
+            chunks_by_file = await self._parse_files(file_paths, progress, names)
+            known_info = file_info or {}
+            file_info = {
+                names[path]: known_info.get(names[path]) or await asyncio.to_thread(fingerprint_file, path)
+                for path in file_paths
+            }
+
+            if incremental:
+                return await self._process_incrementally(chunks_by_file, progress, file_info)
+
             # Clear existing vectors if requested
             if clear_existing:
-                filenames = [os.path.basename(path) for path in file_paths]
+                filenames = [names[path] for path in file_paths]
                 await self.clear_document_vectors(filenames)
 
             all_documents = []
-            for file_path in file_paths:
-                docs = await self._load_and_process_file(file_path)
+            summary = {}
+            catalog = {}
+            for filename, docs in chunks_by_file.items():
                 all_documents.extend(docs)
+                summary[filename] = {"added": len(docs), "removed": 0, "unchanged": 0}
+                # Without clearing, the new chunks are appended to any already stored
+                catalog[filename] = {"chunk_count": len(docs), "replace": clear_existing, **file_info[filename]}
 
             # Store documents in vector database
-            await self._store_documents(all_documents)
+            await self._store_documents(all_documents, progress, defer_indexes=defer_indexes, catalog=catalog)
 
             logger.info(f"Successfully processed {len(all_documents)} chunks")
+            return summary
 
         except Exception as e:
             logger.error(f"Error processing documents: {str(e)}", exc_info=True)
             raise
 
-    async def _load_and_process_file(self, file_path: str) -> List[Document]:
-        """Load and process a single file."""
-        path = Path(file_path)
-        logger.info(f"Processing file: {path}")
+        finally:
+            progress.observe()
 
-        try:
-            # Load document based on file type
-            if path.suffix.lower() == '.pdf':
-                docs = await self._load_pdf(path)
-            elif path.suffix.lower() in ['.tex', '.md']:
-                docs = await self._load_with_unstructured(path)
+    async def _parse_files(
+            self,
+            file_paths: List[str],
+            progress: Optional[Any] = None,
+            names: Optional[Dict[str, str]] = None
+    ) -> Dict[str, List[Document]]:
+        """
+        Load, clean and split each file off the event loop.
+
+        With parse_workers > 1 the files are parsed in parallel in a process pool;
+        results are merged in input order, so the output is deterministic.
+        Chunks are grouped by names[path] (the base name by default), which also
+        replaces the saved path as their source.
+        """
+        files_done = 0
+
+        async def parse(file_path: str) -> List[Document]:
+            nonlocal files_done
+            chunks = await self._load_and_process_file(file_path)
+            files_done += 1
+            if progress is not None:
+                progress.update("parse", files_done=files_done, files_total=len(file_paths))
+            return chunks
+
+        with _stage(progress, "parse"):
+            if self.parse_workers > 1 and len(file_paths) > 1:
+                results = await asyncio.gather(*(parse(path) for path in file_paths))
             else:
-                raise ValueError(f"Unsupported file type: {path.suffix}. Supported types: .pdf, .tex, .md")
+                results = [await parse(path) for path in file_paths]
+
+        chunks_by_file: Dict[str, List[Document]] = {}
+        for file_path, chunks in zip(file_paths, results):
+            name = (names or {}).get(file_path) or os.path.basename(file_path)
+            if name != os.path.basename(file_path):
+                for chunk in chunks:
+                    chunk.metadata["source"] = name
+            chunks_by_file.setdefault(name, []).extend(chunks)
+        return chunks_by_file
+
+    async def _process_incrementally(
+            self,
+            chunks_by_file: Dict[str, List[Document]],
+            progress: Optional[Any] = None,
+            file_info: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """Re-ingest each file by applying only the chunk-level differences."""
+        await asyncio.to_thread(self._ensure_collection)
+
+        summary = {}
+        for filename, chunks in chunks_by_file.items():
+            summary[filename] = await self._sync_document_chunks(
+                filename, chunks, progress, (file_info or {}).get(filename)
+            )
+            logger.info(f"Incremental update of {filename}: {summary[filename]}")
+        return summary
 
-            # Clean and preprocess documents
-            cleaned_docs = self._clean_documents(docs)
+    async def _sync_document_chunks(
+            self,
+            filename: str,
+            chunks: List[Document],
+            progress: Optional[Any] = None,
+            file_info: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, int]:
+        """
+        Replace the stored chunks of one document with a new set, touching only
+        the rows whose content hash changed. Runs in a single transaction, with
+        the document's catalog entry, so readers see the old chunks until the
+        new ones are committed.
+        """
+        db = SessionLocal()
+        try:
+            collection_id, to_delete, to_add = await asyncio.to_thread(
+                self._diff_document_chunks, db, filename, chunks
+            )
 
-            # Split documents into chunks
-            chunks = await self._split_documents(cleaned_docs)
+            added = await self._embed_and_insert(db, collection_id, to_add, progress)
+            with _stage(progress, "store"):
+                removed = await asyncio.to_thread(DocumentService.delete_chunks, db, to_delete)
+                await asyncio.to_thread(
+                    self._update_catalog, db, filename, chunk_count=len(chunks), **(file_info or {})
+                )
+                if added or removed:
+                    await asyncio.to_thread(record_change, db, [self.collection_name], "ingested")
+                await asyncio.to_thread(db.commit)
 
-            logger.info(f"Generated {len(chunks)} chunks from {path}")
-            return chunks
+            return {"added": added, "removed": removed, "unchanged": len(chunks) - added}
 
-        except Exception as e:
-            logger.error(f"Error processing file {path}: {str(e)}", exc_info=True)
+        except Exception:
+            await asyncio.to_thread(db.rollback)
             raise
+        finally:
+            db.close()
+
+    def _diff_document_chunks(self, db: Session, filename: str, chunks: List[Document]):
+        """Lock a document and return (collection_id, uuids to delete, chunks to add)."""
+        collection_id = DocumentService.get_collection_id(db, self.collection_name)
+        DocumentService.lock_document(db, filename)
+        existing = DocumentService.get_chunk_hashes(db, collection_id, filename)
+
+        # Multiset diff: duplicate chunks are matched one-to-one
+        wanted = Counter(c.metadata["content_hash"] for c in chunks)
+        to_delete = []
+        for chunk_uuid, content_hash in existing:
+            if wanted[content_hash] > 0:
+                wanted[content_hash] -= 1
+            else:
+                to_delete.append(chunk_uuid)
+
+        to_add = []
+        for chunk in chunks:
+            if wanted[chunk.metadata["content_hash"]] > 0:
+                wanted[chunk.metadata["content_hash"]] -= 1
+                to_add.append(chunk)
 
-    async def _load_pdf(self, path: Path) -> List[Document]:
-        """Load PDF using PyMuPDF."""
-        loader = PyMuPDFLoader(str(path))
-        return loader.load()
-
-    async def _load_with_unstructured(self, path: Path) -> List[Document]:
-        """Load documents using Unstructured's partition capability."""
-        # Use Unstructured to partition the document
-        elements = partition(str(path))
-
-        # Convert elements to LangChain documents with metadata
-        docs = []
-        current_section = ""
-
-        for element in elements:
-            # Update current section if this is a heading
-            if element.category == "HeaderText":
-                current_section = element.text
-                continue
-
-            # Create document with metadata
-            doc = Document(
-                page_content=element.text,
-                metadata={
-                    "source": str(path),
-                    "section": current_section,
-                    "category": element.category,
-                    "coordinates": element.coordinates if hasattr(element, "coordinates") else None,
-                }
+        return collection_id, to_delete, to_add
+
+    async def _embed_and_insert(
+            self,
+            db: Session,
+            collection_id: str,
+            chunks: List[Document],
+            progress: Optional[Any] = None
+    ) -> int:
+        """
+        Embed chunks in concurrent token-sized batches and insert each batch as soon
+        as it is embedded. Does not commit.
+        """
+        texts = [c.page_content for c in chunks]
+        insert = copy_embeddings if self.bulk_copy else DocumentService.insert_chunks
+        inserted = 0
+        store_seconds = 0.0
+        # The sink runs inside the pipeline, so the embed span is paused while a
+        # batch is stored: the two stages never overlap
+        embedding = ExitStack()
+
+        async def insert_batch(indices: List[int], vectors: List[List[float]]) -> None:
+            nonlocal inserted, store_seconds
+            embedding.close()
+            start = time.perf_counter()
+            with _stage(progress, "store"):
+                inserted += await asyncio.to_thread(
+                    insert,
+                    db,
+                    collection_id,
+                    [texts[i] for i in indices],
+                    [chunks[i].metadata for i in indices],
+                    vectors
+                )
+            store_seconds += time.perf_counter() - start
+            if progress is not None:
+                progress.update("embed", chunks_done=inserted, chunks_total=len(chunks))
+                progress.update("store", rows=inserted, rows_per_sec=round(inserted / store_seconds))
+            embedding.enter_context(_stage(progress, "embed"))
+
+        with embedding:
+            embedding.enter_context(_stage(progress, "embed"))
+            await EmbeddingPipeline(self.embeddings, model_name=self.embedding.model).run(texts, insert_batch)
+
+        if inserted:
+            logger.info(
+                f"Stored {inserted} rows in {store_seconds:.2f}s of insert time "
+                f"({inserted / store_seconds:.0f} rows/s, {'COPY' if self.bulk_copy else 'INSERT'})"
             )
-            docs.append(doc)
-
-        return docs
-
-    def _clean_documents(self, docs: List[Document]) -> List[Document]:
-        """Normalise whitespace and strip PDF encoding artifacts for better embeddings."""
-        import re
-        cleaned_docs = []
-        for doc in docs:
-            text = doc.page_content
-            # Strip C0/C1 control characters (ESC \x1b, SYN \x16, \x88, etc.) that
-            # PyMuPDF emits for ligatures/special chars in some LaTeX-produced PDFs
-            text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
-            # Restore common ligature artifacts: "con dence" -> "confidence" etc.
-            text = re.sub(r'\bcon dence\b', 'confidence', text)
-            text = re.sub(r'\blter(ing|ed|s)?\b', lambda m: 'filter' + (m.group(1) or ''), text)
-            text = re.sub(r'\bpro le\b', 'profile', text)
-            # Preserve \n\n paragraph breaks, collapse single newlines and extra spaces
-            paragraphs = text.split('\n\n')
-            cleaned_paragraphs = [' '.join(p.split()) for p in paragraphs if p.strip()]
-            cleaned_text = '\n\n'.join(cleaned_paragraphs)
-            cleaned_docs.append(Document(page_content=cleaned_text, metadata=doc.metadata))
-        return cleaned_docs
-
-    async def _split_documents(self, docs: List[Document]) -> List[Document]:
-        """Split documents into chunks, discarding low-signal micro-chunks."""
-        chunks = []
-        for doc in docs:
-            doc_chunks = self.text_splitter.split_documents([doc])
-            # Drop chunks that are too short to carry semantic meaning (e.g. lone section headers)
-            chunks.extend(c for c in doc_chunks if len(c.page_content.strip()) >= 80)
-        return chunks
+        return inserted
 
-    async def _store_documents(self, documents: List[Document]) -> None:
-        """Store documents in the vector database."""
-        try:
-            # Create vector store
-            vector_store = PGVector.from_documents(
-                embedding=self.embeddings,
-                documents=documents,
+    def _update_catalog(
+            self,
+            db: Session,
+            filename: str,
+            chunk_count: int,
+            content_hash: Optional[str] = None,
+            size_bytes: Optional[int] = None,
+            replace: bool = True
+    ) -> None:
+        """Record a document in the catalog; a document left with no chunks is removed."""
+        if replace and chunk_count == 0:
+            DocumentService.remove_from_catalog(db, filename, self.collection_name)
+            return
+        DocumentService.upsert_catalog_entry(
+            db,
+            self.collection_name,
+            filename,
+            chunk_count,
+            content_hash=content_hash,
+            size_bytes=size_bytes,
+            embedding_model=self.embedding_model,
+            replace=replace
+        )
+
+    def _ensure_collection(self) -> None:
+        """Let PGVector create the extension, tables and collection if they are missing, then index them."""
+        # On a pooled connection, rather than an engine of PGVector's own
+        with engine.connect() as connection:
+            PGVector(
                 collection_name=self.collection_name,
                 connection_string=self.connection_string,
+                embedding_function=self.embeddings,
+                collection_metadata=self.embedding.metadata(),
+                connection=connection,
+            )
+        ensure_source_index()
+        ensure_fulltext_index()
+
+    async def _load_and_process_file(self, file_path: str) -> List[Document]:
+        """Load and process a single file in a worker process or thread."""
+        if self.parse_workers > 1:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                get_parse_executor(self.parse_workers),
+                parse_file, file_path, self.chunk_size, self.chunk_overlap, self.separators
             )
+        return await asyncio.to_thread(parse_file, file_path, self.chunk_size, self.chunk_overlap, self.separators)
+
+    async def _store_documents(
+            self,
+            documents: List[Document],
+            progress: Optional[Any] = None,
+            defer_indexes: bool = False,
+            catalog: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Store documents in the vector database.
+
+        catalog maps filenames to keyword arguments for _update_catalog, applied
+        in the same transaction as the chunks.
+        """
+        try:
+            await asyncio.to_thread(self._ensure_collection)
+
+            db = SessionLocal()
+            try:
+                collection_id = await asyncio.to_thread(
+                    DocumentService.get_collection_id, db, self.collection_name
+                )
+                if defer_indexes:
+                    with deferred_indexes(db):
+                        await self._embed_and_insert(db, collection_id, documents, progress)
+                else:
+                    await self._embed_and_insert(db, collection_id, documents, progress)
+                for filename, entry in (catalog or {}).items():
+                    await asyncio.to_thread(self._update_catalog, db, filename, **entry)
+                if documents:
+                    await asyncio.to_thread(record_change, db, [self.collection_name], "ingested")
+                await asyncio.to_thread(db.commit)
+            except Exception:
+                await asyncio.to_thread(db.rollback)
+                raise
+            finally:
+                db.close()
 
             logger.info(f"Successfully stored {len(documents)} documents in vector store")
 
@@ -183,30 +613,12 @@ class DocumentProcessor:
             dict: Summary of cleared and not found documents
         """
         try:
-            db = SessionLocal()
-            try:
+            async with AsyncSessionLocal() as db:
                 # Use the centralized document service for deletion
-                results = await DocumentService.delete_documents_by_filenames(db, filenames)
+                results = await DocumentService.delete_documents_by_filenames(db, filenames, self.collection_name)
                 logger.info(f"Document clearing results: {results}")
                 return results
-            finally:
-                db.close()
 
         except Exception as e:
             logger.error(f"Error clearing document vectors: {str(e)}", exc_info=True)
             raise
-
-    async def _clear_vectors(self) -> None:
-        """Clear existing vectors from the database."""
-        try:
-            PGVector.from_existing_index(
-                embedding=self.embeddings,
-                collection_name=self.collection_name,
-                connection_string=self.connection_string,
-            ).delete_collection()
-
-            logger.info("Cleared existing vectors")
-
-        except Exception as e:
-            logger.error(f"Error clearing vectors: {str(e)}", exc_info=True)
-            raise
\ No newline at end of file
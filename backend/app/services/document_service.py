@@ -1,13 +1,157 @@
 # backend/app/services/document_service.py
 
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
+import asyncio
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.db.bulk_load import alock_collection, lock_collection
+from app.db.session import engine
+from app.services.knowledge_events import arecord_change, record_change
 
 logger = logging.getLogger(__name__)
 
+_catalog_ready = False
+_catalog_lock = threading.Lock()
+
+def ensure_document_catalog() -> None:
+    """
+    Create the knowledge_documents catalog once per process.
+
+    When the table is first created it is backfilled from the stored chunks, so
+    existing deployments list their documents straight away. Content hashes, sizes
+    and embedding models are unknown for backfilled rows until re-ingestion.
+    """
+    global _catalog_ready
+    if _catalog_ready:
+        return
+    with _catalog_lock:
+        if _catalog_ready:
+            return
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('knowledge_documents'))"))
+            exists = conn.execute(text("SELECT to_regclass('knowledge_documents') IS NOT NULL")).scalar()
+            if not exists:
+                conn.execute(text("""
+                    CREATE TABLE knowledge_documents (
+                        collection_name TEXT NOT NULL,
+                        filename TEXT NOT NULL,
+                        chunk_count INTEGER NOT NULL,
+                        content_hash TEXT,
+                        size_bytes BIGINT,
+                        embedding_model TEXT,
+                        ingested_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                        PRIMARY KEY (collection_name, filename)
+                    )
+                """))
+                conn.execute(text("""
+                    CREATE INDEX ix_knowledge_documents_listing
+                    ON knowledge_documents (collection_name, ingested_at DESC, filename)
+                """))
+                if conn.execute(text("SELECT to_regclass('langchain_pg_embedding') IS NOT NULL")).scalar():
+                    backfilled = conn.execute(text("""
+                        INSERT INTO knowledge_documents (collection_name, filename, chunk_count)
+                        SELECT c.name, regexp_replace(e.cmetadata->>'source', '^.*/', ''), count(*)
+                        FROM langchain_pg_embedding e
+                        JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+                        WHERE e.cmetadata->>'source' IS NOT NULL
+                        GROUP BY 1, 2
+                    """)).rowcount
+                    logger.info(f"Backfilled the document catalog with {backfilled} documents")
+        _catalog_ready = True
+
+# Basename of a chunk's source path. Queries must use this exact expression to
+# hit ix_langchain_pg_embedding_source_basename.
+SOURCE_BASENAME = "regexp_replace(cmetadata->>'source', '^.*/', '')"
+
+_source_index_ready = False
+_source_index_lock = threading.Lock()
+
+def ensure_source_index() -> None:
+    """
+    Index chunks by collection and source basename, once per process.
+
+    Built CONCURRENTLY so existing deployments can pick it up without blocking
+    writes. Skipped until PGVector has created the embedding table.
+
+    A concurrent build waits for every open transaction, so call this before
+    the caller's session has started one.
+    """
+    global _source_index_ready
+    if _source_index_ready:
+        return
+    with _source_index_lock:
+        if _source_index_ready:
+            return
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if not conn.execute(text("SELECT to_regclass('langchain_pg_embedding') IS NOT NULL")).scalar():
+                return
+            conn.execute(text(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_langchain_pg_embedding_source_basename
+                ON langchain_pg_embedding (({SOURCE_BASENAME}), collection_id)
+            """))
+        _source_index_ready = True
+
+# Waits for in-flight re-ingestion of the documents; sorted to avoid deadlocks
+_LOCK_DOCUMENTS = text(
+    "SELECT pg_advisory_xact_lock(hashtext(f)) FROM unnest(CAST(:filenames AS TEXT[])) AS f ORDER BY f"
+)
+
+# Data-modifying CTEs share one snapshot, so the emptiness check has to exclude
+# the rows being deleted alongside it
+_BULK_DELETE = text(f"""
+    WITH deleted AS (
+        DELETE FROM langchain_pg_embedding
+        WHERE collection_id IN (SELECT uuid FROM langchain_pg_collection WHERE name = :collection_name)
+          AND {SOURCE_BASENAME} = ANY(CAST(:filenames AS TEXT[]))
+        RETURNING uuid, collection_id, {SOURCE_BASENAME} AS filename
+    ),
+    uncatalogued AS (
+        DELETE FROM knowledge_documents
+        WHERE collection_name = :collection_name
+          AND filename = ANY(CAST(:filenames AS TEXT[]))
+    ),
+    emptied AS (
+        DELETE FROM langchain_pg_collection c
+        WHERE c.uuid IN (SELECT collection_id FROM deleted)
+          AND NOT EXISTS (
+              SELECT 1 FROM langchain_pg_embedding e
+              WHERE e.collection_id = c.uuid
+                AND NOT EXISTS (SELECT 1 FROM deleted d WHERE d.uuid = e.uuid)
+          )
+    )
+    SELECT f.filename, count(d.uuid) AS deleted
+    FROM unnest(CAST(:filenames AS TEXT[])) AS f(filename)
+    LEFT JOIN deleted d ON d.filename = f.filename
+    GROUP BY f.filename
+""")
+
+def _catalog_row(row: Any) -> Dict[str, Any]:
+    return {
+        "filename": row.filename,
+        "processed_date": row.ingested_at.isoformat() if isinstance(row.ingested_at, datetime) else row.ingested_at,
+        "chunk_count": row.chunk_count,
+        "content_hash": row.content_hash,
+        "size_bytes": row.size_bytes,
+        "embedding_model": row.embedding_model,
+    }
+
+_LIST_CATALOG = text("""
+    SELECT filename, chunk_count, content_hash, size_bytes, embedding_model, ingested_at,
+           count(*) OVER () AS total
+    FROM knowledge_documents
+    WHERE collection_name = :collection_name
+    ORDER BY ingested_at DESC, filename
+    LIMIT :limit OFFSET :offset
+""")
+
 class DocumentService:
     """
     Service for handling document-related operations including deletion
@@ -15,84 +159,33 @@ class DocumentService:
     """
     
     @staticmethod
-    async def delete_document(db: Session, filename: str) -> Dict[str, Any]:
+    async def delete_document(
+            db: AsyncSession,
+            filename: str,
+            collection_name: str = "portfolio_chunks"
+    ) -> Dict[str, Any]:
         """
         Delete a specific document and its chunks from the vector store.
         
         Args:
-            db: Database session
+            db: Async database session
             filename: Document filename to delete
+            collection_name: Collection the document is stored in
             
         Returns:
             Dict with message and deletion info
         """
         try:
-            # Find all chunks for this document, handling potential path prefixes
-            result = db.execute(
-                text("""
-                    SELECT 
-                        e.uuid,
-                        e.collection_id,
-                        e.cmetadata->>'source' as source
-                    FROM langchain_pg_embedding e
-                    WHERE e.cmetadata->>'source' LIKE :filename_pattern
-                """),
-                {"filename_pattern": f"%{filename}"}
-            ).fetchall()
-            
-            if not result:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Document {filename} not found"
-                )
-                
-            # Get unique collection IDs and chunk UUIDs
-            chunk_uuids = [str(row.uuid) for row in result]
-            collection_ids = list(set(str(row.collection_id) for row in result))
-            
-            # Delete the chunks using proper UUID casting
-            deleted = db.execute(
-                text("""
-                    DELETE FROM langchain_pg_embedding
-                    WHERE uuid = ANY(SELECT CAST(UNNEST(:chunk_uuids) AS UUID))
-                    RETURNING uuid
-                """),
-                {"chunk_uuids": chunk_uuids}
-            )
-            
-            # Count deleted rows
-            deleted_count = len(deleted.all())
-            
+            deleted_count = (await DocumentService.abulk_delete_documents(db, [filename], collection_name))[filename]
+
             if deleted_count == 0:
-                db.rollback()
+                await db.rollback()
                 raise HTTPException(
                     status_code=404,
-                    detail=f"No chunks found for document {filename}"
-                )
-                
-            # Check if this was the last document in any collections
-            for collection_id in collection_ids:
-                remaining = db.execute(
-                    text("""
-                        SELECT COUNT(*) 
-                        FROM langchain_pg_embedding 
-                        WHERE collection_id = CAST(:collection_id AS UUID)
-                    """),
-                    {"collection_id": collection_id}
+                    detail=f"Document {filename} not found"
                 )
-                count = remaining.scalar()
-                
-                if count == 0:
-                    # Delete the empty collection
-                    db.execute(
-                        text("""
-                            DELETE FROM langchain_pg_collection 
-                            WHERE uuid = CAST(:collection_id AS UUID)
-                        """),
-                        {"collection_id": collection_id}
-                    )
-            
-            db.commit()
+
+            await db.commit()
             
             logger.info(f"Successfully deleted document {filename} with {deleted_count} chunks")
                 
@@ -104,7 +197,7 @@ class DocumentService:
         except HTTPException:
             raise
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Error deleting document: {str(e)}", exc_info=True)
             raise HTTPException(
                 status_code=500,
@@ -112,30 +205,279 @@ class DocumentService:
             )
     
     @staticmethod
-    async def delete_documents_by_filenames(db: Session, filenames: List[str]) -> Dict[str, Any]:
+    async def delete_documents_by_filenames(
+            db: AsyncSession,
+            filenames: List[str],
+            collection_name: str = "portfolio_chunks"
+    ) -> Dict[str, Any]:
         """
-        Delete multiple documents by their filenames.
+        Delete multiple documents by their filenames in one transaction.
         
         Args:
-            db: Database session
+            db: Async database session
             filenames: List of document filenames to delete
+            collection_name: Collection the documents are stored in
             
         Returns:
             Dict with results of deletion operation
         """
-        results = {
-            "deleted": [],
-            "not_found": []
+        try:
+            counts = await DocumentService.abulk_delete_documents(db, filenames, collection_name)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        return {
+            "deleted": [f for f in filenames if counts.get(f)],
+            "not_found": [f for f in filenames if not counts.get(f)],
+            "deleted_chunks": counts
         }
-        
-        for filename in filenames:
-            try:
-                await DocumentService.delete_document(db, filename)
-                results["deleted"].append(filename)
-            except HTTPException as e:
-                if e.status_code == 404:
-                    results["not_found"].append(filename)
-                else:
-                    raise
-        
-        return results
\ No newline at end of file
+
+    @staticmethod
+    def bulk_delete_documents(
+            db: Session,
+            filenames: List[str],
+            collection_name: str = "portfolio_chunks"
+    ) -> Dict[str, int]:
+        """
+        Delete the chunks of several documents with a single statement, without committing.
+
+        Chunks are matched on the indexed source basename, so the cost depends on
+        the number of chunks deleted rather than the corpus size. Catalog entries
+        go with them, and a collection left empty is dropped in the same statement.
+        The collection name is locked exclusively first (see lock_collection), so
+        no ingestion can be writing into the collection being dropped.
+
+        Args:
+            db: Database session
+            filenames: Document filenames (basenames of the stored source paths)
+            collection_name: Collection the documents are stored in
+
+        Returns:
+            Deleted chunk count per filename (0 for unknown documents)
+        """
+        filenames = list(dict.fromkeys(filenames))
+        if not filenames:
+            return {}
+        ensure_document_catalog()
+
+        # Collection before documents, in the order ingestion takes them
+        lock_collection(db, collection_name, exclusive=True)
+        db.execute(_LOCK_DOCUMENTS, {"filenames": filenames})
+        rows = db.execute(_BULK_DELETE, {"filenames": filenames, "collection_name": collection_name}).fetchall()
+        if any(row.deleted for row in rows):
+            record_change(db, [collection_name], "deleted")
+
+        counts = {row.filename: row.deleted for row in rows}
+        logger.info(f"Bulk-deleted chunks per document: {counts}")
+        return counts
+
+    @staticmethod
+    async def abulk_delete_documents(
+            db: AsyncSession,
+            filenames: List[str],
+            collection_name: str = "portfolio_chunks"
+    ) -> Dict[str, int]:
+        """Async variant of bulk_delete_documents, for request handlers. Does not commit."""
+        filenames = list(dict.fromkeys(filenames))
+        if not filenames:
+            return {}
+        # One-off DDL on the sync engine; no-ops once done in this process.
+        # The index build must not wait on this session, so it runs first.
+        await asyncio.to_thread(ensure_source_index)
+        await asyncio.to_thread(ensure_document_catalog)
+
+        await alock_collection(db, collection_name, exclusive=True)
+        await db.execute(_LOCK_DOCUMENTS, {"filenames": filenames})
+        rows = (await db.execute(_BULK_DELETE, {"filenames": filenames, "collection_name": collection_name})).fetchall()
+        if any(row.deleted for row in rows):
+            await arecord_change(db, [collection_name], "deleted")
+
+        counts = {row.filename: row.deleted for row in rows}
+        logger.info(f"Bulk-deleted chunks per document: {counts}")
+        return counts
+
+    @staticmethod
+    def get_collection_id(db: Session, collection_name: str) -> Optional[str]:
+        """
+        Return the UUID of a vector store collection, if it exists.
+
+        Locks the name (shared) until the transaction ends, so a collection
+        switch waits for rows written to this id to commit.
+        """
+        lock_collection(db, collection_name)
+        return db.execute(
+            text("SELECT uuid FROM langchain_pg_collection WHERE name = :name"),
+            {"name": collection_name}
+        ).scalar()
+
+    @staticmethod
+    def lock_document(db: Session, filename: str) -> None:
+        """Serialise concurrent re-ingestion of the same document until the transaction ends."""
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:filename))"), {"filename": filename})
+
+    @staticmethod
+    def get_chunk_hashes(db: Session, collection_id: str, filename: str) -> List[Tuple[str, Optional[str]]]:
+        """
+        List the stored chunks of a document with their content hashes.
+
+        Args:
+            db: Database session
+            collection_id: Collection the document belongs to
+            filename: Document filename (basename of the stored source path)
+
+        Returns:
+            List of (chunk uuid, content hash) pairs; the hash is None for chunks
+            ingested before content hashes were recorded
+        """
+        rows = db.execute(
+            text(f"""
+                SELECT e.uuid, e.cmetadata->>'content_hash' AS content_hash
+                FROM langchain_pg_embedding e
+                WHERE e.collection_id = CAST(:collection_id AS UUID)
+                  AND {SOURCE_BASENAME} = :filename
+            """),
+            {"collection_id": str(collection_id), "filename": filename}
+        ).fetchall()
+        return [(str(row.uuid), row.content_hash) for row in rows]
+
+    @staticmethod
+    def delete_chunks(db: Session, chunk_uuids: List[str]) -> int:
+        """Delete chunks by UUID without committing."""
+        if not chunk_uuids:
+            return 0
+        result = db.execute(
+            text("DELETE FROM langchain_pg_embedding WHERE uuid = ANY(CAST(:chunk_uuids AS UUID[]))"),
+            {"chunk_uuids": chunk_uuids}
+        )
+        return result.rowcount
+
+    @staticmethod
+    def insert_chunks(
+            db: Session,
+            collection_id: str,
+            texts: List[str],
+            metadatas: List[Dict[str, Any]],
+            embeddings: List[List[float]]
+    ) -> int:
+        """Insert embedded chunks into a collection without committing."""
+        if not texts:
+            return 0
+        rows = []
+        for content, metadata, embedding in zip(texts, metadatas, embeddings):
+            chunk_id = str(uuid.uuid4())
+            rows.append({
+                "uuid": chunk_id,
+                "collection_id": str(collection_id),
+                "embedding": "[" + ",".join(str(x) for x in embedding) + "]",
+                "document": content,
+                "cmetadata": json.dumps(metadata, default=str),
+                "custom_id": chunk_id,
+            })
+        db.execute(
+            text("""
+                INSERT INTO langchain_pg_embedding (uuid, collection_id, embedding, document, cmetadata, custom_id)
+                VALUES (
+                    CAST(:uuid AS UUID), CAST(:collection_id AS UUID), CAST(:embedding AS vector),
+                    :document, :cmetadata, :custom_id
+                )
+            """),
+            rows
+        )
+        return len(rows)
+
+    @staticmethod
+    def upsert_catalog_entry(
+            db: Session,
+            collection_name: str,
+            filename: str,
+            chunk_count: int,
+            content_hash: Optional[str] = None,
+            size_bytes: Optional[int] = None,
+            embedding_model: Optional[str] = None,
+            replace: bool = True
+    ) -> None:
+        """
+        Record an ingested document in the catalog without committing.
+
+        Args:
+            db: Database session
+            collection_name: Collection the document was stored in
+            filename: Document filename
+            chunk_count: Chunks stored for the document
+            content_hash: SHA-256 of the uploaded file
+            size_bytes: Size of the uploaded file
+            embedding_model: Model the chunks were embedded with
+            replace: Overwrite the chunk count; False adds to it (for appends)
+        """
+        ensure_document_catalog()
+        chunk_count_update = "EXCLUDED.chunk_count" if replace else "knowledge_documents.chunk_count + EXCLUDED.chunk_count"
+        db.execute(
+            text(f"""
+                INSERT INTO knowledge_documents
+                    (collection_name, filename, chunk_count, content_hash, size_bytes, embedding_model, ingested_at)
+                VALUES (:collection_name, :filename, :chunk_count, :content_hash, :size_bytes, :embedding_model, now())
+                ON CONFLICT (collection_name, filename) DO UPDATE SET
+                    chunk_count = {chunk_count_update},
+                    content_hash = EXCLUDED.content_hash,
+                    size_bytes = EXCLUDED.size_bytes,
+                    embedding_model = EXCLUDED.embedding_model,
+                    ingested_at = EXCLUDED.ingested_at
+            """),
+            {
+                "collection_name": collection_name,
+                "filename": filename,
+                "chunk_count": chunk_count,
+                "content_hash": content_hash,
+                "size_bytes": size_bytes,
+                "embedding_model": embedding_model,
+            }
+        )
+
+    @staticmethod
+    def remove_from_catalog(db: Session, filename: str, collection_name: Optional[str] = None) -> None:
+        """Drop a document from the catalog (in every collection by default) without committing."""
+        ensure_document_catalog()
+        db.execute(
+            text("""
+                DELETE FROM knowledge_documents
+                WHERE filename = :filename
+                  AND (CAST(:collection_name AS TEXT) IS NULL OR collection_name = :collection_name)
+            """),
+            {"filename": filename, "collection_name": collection_name}
+        )
+
+    @staticmethod
+    async def list_catalog(
+            db: AsyncSession,
+            collection_name: str = "portfolio_chunks",
+            limit: int = 100,
+            offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        List catalogued documents, most recently ingested first.
+
+        A single index-backed query; its cost depends on the number of documents,
+        not chunks, and it makes no embedding calls.
+
+        Args:
+            db: Async database session
+            collection_name: Collection to list
+            limit: Page size
+            offset: Documents to skip
+
+        Returns:
+            The page of documents and the total document count (None when the
+            page is past the end)
+        """
+        await asyncio.to_thread(ensure_document_catalog)
+        rows = (await db.execute(
+            _LIST_CATALOG,
+            {"collection_name": collection_name, "limit": limit, "offset": offset}
+        )).fetchall()
+
+        documents = [_catalog_row(row) for row in rows]
+        if rows:
+            return documents, rows[0].total
+        return documents, (0 if offset == 0 else None)
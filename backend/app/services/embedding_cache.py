@@ -0,0 +1,194 @@
+# backend/app/services/embedding_cache.py
+
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.metrics import CACHE_LOOKUPS
+from app.db.session import engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+def _hash_text(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+def ensure_embedding_cache_table() -> None:
+    """Create the embedding cache table once per process."""
+    global _table_ready
+    if _table_ready:
+        return
+    with _table_lock:
+        if _table_ready:
+            return
+        with engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    embedding BYTEA NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    PRIMARY KEY (model, text_hash)
+                )
+            """))
+        _table_ready = True
+
+def cache_key(embeddings: Embeddings, model_name: Optional[str] = None) -> str:
+    """
+    The name vectors of an embeddings instance are cached under.
+
+    It names the implementation as well as the model, so vectors from a fake
+    or local provider configured with a real model's name are never served as
+    that model's, and the output size, so shortened vectors of one model are
+    not served for each other.
+    """
+    model_name = model_name or getattr(embeddings, "model", None) or type(embeddings).__name__
+    dimensions = getattr(embeddings, "dimensions", None) or getattr(embeddings, "size", None)
+    if dimensions and not model_name.endswith(f"@{dimensions}"):
+        model_name = f"{model_name}@{dimensions}"
+    return f"{type(embeddings).__name__}:{model_name}"
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that caches vectors by provider, model name and text hash.
+
+    Lookups go through an in-memory LRU first, then a Postgres table shared by all
+    processes. Only texts missing from both are sent to the wrapped embeddings, and
+    each batch costs at most one bulk SELECT and one bulk INSERT.
+    """
+
+    def __init__(
+            self,
+            embeddings: Embeddings,
+            model_name: Optional[str] = None,
+            max_memory_entries: int = settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+            persistent: bool = settings.EMBEDDING_CACHE_PERSISTENT
+    ):
+        self.embeddings = embeddings
+        self.model_name = cache_key(embeddings, model_name)
+        self.max_memory_entries = max_memory_entries
+        self.persistent = persistent
+
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        # Ingestion embeds from worker threads while requests embed on the event loop
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [_hash_text(t) for t in texts]
+        found = self._get_cached(hashes)
+
+        missing = self._missing(texts, hashes, found)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            self._put_cached(dict(zip(missing.keys(), vectors)), found)
+
+        return [found[h].tolist() for h in hashes]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [_hash_text(t) for t in texts]
+        found = await asyncio.to_thread(self._get_cached, hashes)
+
+        missing = self._missing(texts, hashes, found)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            await asyncio.to_thread(self._put_cached, dict(zip(missing.keys(), vectors)), found)
+
+        return [found[h].tolist() for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    @staticmethod
+    def _missing(texts: List[str], hashes: List[str], found: Dict[str, np.ndarray]) -> Dict[str, str]:
+        """Map hash -> text for uncached texts, deduplicated so each is embedded once."""
+        missing: Dict[str, str] = {}
+        for value, text_hash in zip(texts, hashes):
+            if text_hash not in found and text_hash not in missing:
+                missing[text_hash] = value
+        return missing
+
+    def _get_cached(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for text_hash in hashes:
+                vector = self._memory.get(text_hash)
+                if vector is not None:
+                    self._memory.move_to_end(text_hash)
+                    found[text_hash] = vector
+
+        pending = list({h for h in hashes if h not in found})
+        if pending and self.persistent:
+            try:
+                found_in_db = self._select(pending)
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {str(e)}")
+                found_in_db = {}
+            self._remember(found_in_db)
+            found.update(found_in_db)
+
+        CACHE_LOOKUPS.labels(cache="embedding", result="hit").inc(len(found))
+        CACHE_LOOKUPS.labels(cache="embedding", result="miss").inc(len(set(hashes)) - len(found))
+        logger.debug(f"Embedding cache: {len(found)} of {len(set(hashes))} texts cached")
+        return found
+
+    def _put_cached(self, new_vectors: Dict[str, List[float]], found: Dict[str, np.ndarray]) -> None:
+        arrays = {h: np.asarray(v, dtype=np.float32) for h, v in new_vectors.items()}
+        found.update(arrays)
+        self._remember(arrays)
+        if self.persistent:
+            try:
+                self._insert(arrays)
+            except Exception as e:
+                logger.warning(f"Embedding cache insert failed: {str(e)}")
+
+    def _remember(self, vectors: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for text_hash, vector in vectors.items():
+                self._memory[text_hash] = vector
+                self._memory.move_to_end(text_hash)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _select(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        ensure_embedding_cache_table()
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text("""
+                    SELECT text_hash, embedding
+                    FROM embedding_cache
+                    WHERE model = :model AND text_hash = ANY(:hashes)
+                """),
+                {"model": self.model_name, "hashes": hashes}
+            ).fetchall()
+        return {row.text_hash: np.frombuffer(row.embedding, dtype=np.float32) for row in rows}
+
+    def _insert(self, vectors: Dict[str, np.ndarray]) -> None:
+        ensure_embedding_cache_table()
+        with engine.begin() as conn:
+            conn.execute(
+                text("""
+                    INSERT INTO embedding_cache (model, text_hash, embedding)
+                    SELECT :model, h, e
+                    FROM unnest(CAST(:hashes AS TEXT[]), CAST(:embeddings AS BYTEA[])) AS t(h, e)
+                    ON CONFLICT (model, text_hash) DO NOTHING
+                """),
+                {
+                    "model": self.model_name,
+                    "hashes": list(vectors.keys()),
+                    "embeddings": [v.tobytes() for v in vectors.values()],
+                }
+            )
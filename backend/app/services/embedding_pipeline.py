@@ -0,0 +1,196 @@
+# backend/app/services/embedding_pipeline.py
+
+import asyncio
+import logging
+import random
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+import openai
+import tiktoken
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Receives the indices of a batch into the input texts and their vectors
+BatchSink = Callable[[List[int], List[List[float]]], Awaitable[None]]
+
+@lru_cache(maxsize=4)
+def _get_encoding(model_name: str) -> Optional[tiktoken.Encoding]:
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The BPE file is downloaded on first use, which fails offline
+        logger.warning(f"tiktoken encoding unavailable, estimating token counts: {str(e)}")
+        return None
+
+def count_tokens(texts: List[str], model_name: str = "text-embedding-3-small") -> List[int]:
+    """Token count of each text, or a 4-characters-per-token estimate without tiktoken."""
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return [max(1, len(t) // 4) for t in texts]
+    return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts)]
+
+def batch_by_tokens(token_counts: List[int], max_tokens: int, max_items: int) -> List[List[int]]:
+    """
+    Group consecutive texts into batches under a token and item budget.
+
+    Args:
+        token_counts: Token count of each text
+        max_tokens: Token budget per batch; a single larger text gets its own batch
+        max_items: Maximum number of texts per batch
+
+    Returns:
+        Batches of indices into the input, in order
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the API asked us to wait, from the Retry-After header."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def _is_retryable(error: Exception) -> bool:
+    return isinstance(error, (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    ))
+
+class EmbeddingPipeline:
+    """
+    Embeds texts in token-sized batches, several at a time, and hands each batch
+    to a sink (usually a database insert) as soon as it is ready.
+
+    Batches are delivered to the sink in input order while later batches are still
+    being embedded, so inserts overlap with embedding. At most max_concurrency
+    requests are in flight and at most max_concurrency finished batches wait for
+    the sink, so a slow database slows embedding down rather than buffering the
+    whole corpus in memory. A 429 pauses every batch until the rate limit resets.
+    """
+
+    def __init__(
+            self,
+            embeddings: Embeddings,
+            model_name: str = "text-embedding-3-small",
+            max_batch_tokens: int = settings.EMBEDDING_BATCH_MAX_TOKENS,
+            max_batch_items: int = settings.EMBEDDING_BATCH_MAX_ITEMS,
+            max_concurrency: int = settings.EMBEDDING_MAX_CONCURRENCY,
+            max_retries: int = settings.EMBEDDING_MAX_RETRIES
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_items = max_batch_items
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+
+        self.retries = 0
+        self._resume_at = 0.0
+
+    async def run(self, texts: List[str], sink: BatchSink) -> int:
+        """
+        Embed texts and pass every batch to sink, in order.
+
+        Args:
+            texts: Texts to embed
+            sink: Coroutine called with (indices, vectors) for each batch
+
+        Returns:
+            Number of texts embedded
+        """
+        if not texts:
+            return 0
+
+        start = time.perf_counter()
+        token_counts = count_tokens(texts, self.model_name)
+        batches = batch_by_tokens(token_counts, self.max_batch_tokens, self.max_batch_items)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        ready: "asyncio.Queue[Optional[Tuple[List[int], asyncio.Task]]]" = asyncio.Queue(maxsize=self.max_concurrency)
+        in_flight: Set[asyncio.Task] = set()
+
+        async def embed(batch: List[int]) -> List[List[float]]:
+            try:
+                return await self._embed_with_retry([texts[i] for i in batch])
+            finally:
+                semaphore.release()
+
+        async def produce() -> None:
+            for batch in batches:
+                await semaphore.acquire()
+                task = asyncio.create_task(embed(batch))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+                await ready.put((batch, task))
+            await ready.put(None)
+
+        producer = asyncio.create_task(produce())
+        done = 0
+        try:
+            while (item := await ready.get()) is not None:
+                batch, task = item
+                await sink(batch, await task)
+                done += len(batch)
+            await producer
+        finally:
+            producer.cancel()
+            for task in list(in_flight):
+                task.cancel()
+            await asyncio.gather(producer, *in_flight, return_exceptions=True)
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Embedded {done} texts ({sum(token_counts)} tokens) in {len(batches)} batches "
+            f"in {elapsed:.2f}s ({done / elapsed:.0f} texts/s, {self.retries} retries)"
+        )
+        return done
+
+    async def _embed_with_retry(self, batch: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            # Another batch hit the rate limit: wait with it instead of piling on
+            delay = self._resume_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                return await self.embeddings.aembed_documents(batch)
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.retries += 1
+
+                # Exponential backoff with full jitter, unless the API said how long to wait
+                backoff = _retry_after(e) or random.uniform(0, min(60.0, 2 ** attempt))
+                self._resume_at = max(self._resume_at, loop.time() + backoff)
+                logger.warning(
+                    f"Embedding batch of {len(batch)} failed ({type(e).__name__}), "
+                    f"retry {attempt}/{self.max_retries} in {backoff:.1f}s"
+                )
@@ -0,0 +1,47 @@
+# backend/app/services/hashing_embeddings.py
+
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WORD = re.compile(r"\w+")
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic local embeddings from hashed words and character n-grams.
+
+    Texts that share words (or word stems, through the n-grams) get similar
+    vectors, so retrieval over them behaves like a crude lexical model: good
+    enough to compare chunking and retrieval settings offline, reproducibly and
+    without API calls. Not a substitute for a real embedding model's quality.
+    """
+
+    def __init__(self, size: int = 1536, ngram: int = 4):
+        self.size = size
+        self.ngram = ngram
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for word in _WORD.findall(text.lower()):
+            features.append(word)
+            padded = f"<{word}>"
+            features.extend(padded[i:i + self.ngram] for i in range(max(1, len(padded) - self.ngram + 1)))
+        return features
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for feature in self._features(text):
+            # blake2b rather than hash(), which is salted per process
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.size] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
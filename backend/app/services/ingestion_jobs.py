@@ -0,0 +1,319 @@
+# backend/app/services/ingestion_jobs.py
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.config import get_settings
+from app.db.session import async_engine, engine
+from app.services.document_processor import DocumentProcessor
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PIPELINE_STAGES = ("parse", "embed", "store")
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+_FINISHED = (JobStatus.SUCCEEDED.value, JobStatus.FAILED.value)
+
+_SAVE_JOB = text("""
+    INSERT INTO ingestion_jobs (id, status, state, created_at, updated_at)
+    VALUES (:id, :status, CAST(:state AS JSONB), :created_at, now())
+    ON CONFLICT (id) DO UPDATE
+    SET status = EXCLUDED.status, state = EXCLUDED.state, updated_at = now()
+""")
+
+_LOAD_JOB = text("SELECT state FROM ingestion_jobs WHERE id = :id").columns(state=JSONB)
+
+_PRUNE_JOBS = text("""
+    DELETE FROM ingestion_jobs
+    WHERE status IN :finished AND id NOT IN (
+        SELECT id FROM ingestion_jobs WHERE status IN :finished ORDER BY created_at DESC LIMIT :keep
+    )
+""").bindparams(bindparam("finished", expanding=True))
+
+_jobs_ready = False
+_jobs_lock = threading.Lock()
+
+def ensure_jobs_table() -> None:
+    """Create the ingestion_jobs table once per process."""
+    global _jobs_ready
+    if _jobs_ready:
+        return
+    with _jobs_lock:
+        if _jobs_ready:
+            return
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('ingestion_jobs'))"))
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    state JSONB NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """))
+        _jobs_ready = True
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+@dataclass
+class StageProgress:
+    """Progress of one pipeline stage. Durations accumulate across files."""
+    status: str = "pending"
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_ms: float = 0.0
+    detail: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class IngestionJob:
+    """A queued knowledge base upload and its per-stage progress."""
+    id: str
+    files: List[str]
+    work_dir: str
+    file_info: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Original file name per saved path
+    file_names: Dict[str, str] = field(default_factory=dict)
+    status: JobStatus = JobStatus.QUEUED
+    created_at: datetime = field(default_factory=_now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    stages: Dict[str, StageProgress] = field(
+        default_factory=lambda: {name: StageProgress() for name in PIPELINE_STAGES}
+    )
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageProgress]:
+        """Mark a stage as running and add the time spent to its duration."""
+        progress = self.stages.setdefault(name, StageProgress())
+        progress.status = "running"
+        progress.started_at = progress.started_at or _now()
+        start = time.perf_counter()
+        try:
+            yield progress
+            progress.status = "done"
+        except Exception:
+            progress.status = "failed"
+            raise
+        finally:
+            progress.duration_ms += (time.perf_counter() - start) * 1000
+            progress.finished_at = _now()
+
+    def update(self, name: str, **detail: Any) -> None:
+        """Record stage-specific counters, e.g. files_done."""
+        self.stages.setdefault(name, StageProgress()).detail.update(detail)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status.value,
+            "files": [self.file_names.get(path) or os.path.basename(path) for path in self.files],
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "result": self.result,
+            "stages": {
+                name: {
+                    "status": stage.status,
+                    "started_at": stage.started_at.isoformat() if stage.started_at else None,
+                    "finished_at": stage.finished_at.isoformat() if stage.finished_at else None,
+                    "duration_ms": round(stage.duration_ms, 1),
+                    **stage.detail,
+                }
+                for name, stage in self.stages.items()
+            },
+        }
+
+class IngestionJobQueue:
+    """
+    Runs knowledge base uploads in the background so request handlers return
+    immediately.
+
+    A job runs on the worker that accepted the upload, but its state is saved
+    to the ingestion_jobs table when queued, every INGESTION_JOB_PUBLISH_SECONDS
+    while running and when finished, so a status poll can land on any worker.
+    The most recent INGESTION_JOB_HISTORY finished jobs are kept; queued and
+    running jobs are never pruned.
+    """
+
+    def __init__(
+            self,
+            on_complete: Optional[Callable[[], Awaitable[None]]] = None,
+            workers: int = settings.INGESTION_WORKERS,
+            max_history: int = settings.INGESTION_JOB_HISTORY,
+            publish_interval: float = settings.INGESTION_JOB_PUBLISH_SECONDS
+    ):
+        self.on_complete = on_complete
+        self.workers = workers
+        self.max_history = max_history
+        self.publish_interval = publish_interval
+
+        self._queue: "asyncio.Queue[IngestionJob]" = asyncio.Queue()
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await asyncio.to_thread(ensure_jobs_table)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} ingestion worker(s)")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Discard the uploads of jobs that never ran
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.status = JobStatus.FAILED
+            job.error = "Ingestion worker shut down before the job ran"
+            job.finished_at = _now()
+            await self._save(job)
+            shutil.rmtree(job.work_dir, ignore_errors=True)
+        logger.info("Ingestion workers stopped")
+
+    async def submit(
+            self,
+            file_paths: List[str],
+            work_dir: str,
+            file_info: Optional[Dict[str, Dict[str, Any]]] = None,
+            file_names: Optional[Dict[str, str]] = None
+    ) -> IngestionJob:
+        """
+        Queue files for ingestion.
+
+        Args:
+            file_paths: Saved upload paths inside work_dir
+            work_dir: Directory owned by the job, removed when it finishes
+            file_info: SHA-256 and size per file name, computed while saving
+            file_names: Original file name per saved path, if saved under another name
+
+        Returns:
+            The queued job
+        """
+        job = IngestionJob(
+            id=uuid.uuid4().hex,
+            files=file_paths,
+            work_dir=work_dir,
+            file_info=file_info or {},
+            file_names=file_names or {}
+        )
+        self._jobs[job.id] = job
+        self._forget_finished()
+        # Saved before the 202 goes out, so a poll on any worker finds the job
+        await self._save(job)
+
+        await self._queue.put(job)
+        logger.info(f"Queued ingestion job {job.id} with {len(file_paths)} file(s)")
+        return job
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The state of a job queued by any worker, or None if unknown or pruned."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            # This worker's own jobs are more current than their last save
+            return job.to_dict()
+        async with async_engine.connect() as conn:
+            return (await conn.execute(_LOAD_JOB, {"id": job_id})).scalar()
+
+    def _forget_finished(self) -> None:
+        """Drop the oldest finished jobs beyond max_history from memory; unfinished ones stay."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status.value in _FINISHED]
+        for job_id in finished[:max(len(self._jobs) - self.max_history, 0)]:
+            del self._jobs[job_id]
+
+    async def _save(self, job: IngestionJob, prune: bool = False) -> None:
+        """Save the job's state for status queries on other workers."""
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(_SAVE_JOB, {
+                    "id": job.id,
+                    "status": job.status.value,
+                    "state": json.dumps(job.to_dict()),
+                    "created_at": job.created_at,
+                })
+                if prune:
+                    await conn.execute(_PRUNE_JOBS, {"finished": list(_FINISHED), "keep": self.max_history})
+        except Exception as e:
+            # The job itself is unaffected; only polls on other workers see stale state
+            logger.warning(f"Could not save the state of ingestion job {job.id}: {str(e)}")
+
+    async def _publish_progress(self, job: IngestionJob) -> None:
+        while True:
+            await asyncio.sleep(self.publish_interval)
+            await self._save(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = _now()
+        await self._save(job)
+        publisher = asyncio.create_task(self._publish_progress(job))
+        try:
+            processor = DocumentProcessor()
+            job.result = await processor.process_documents(
+                job.files, incremental=True, progress=job, file_info=job.file_info, file_names=job.file_names
+            )
+            job.status = JobStatus.SUCCEEDED
+            logger.info(f"Ingestion job {job.id} succeeded: {job.result}")
+
+        except asyncio.CancelledError:
+            job.status = JobStatus.FAILED
+            job.error = "Ingestion worker shut down while the job ran"
+            raise
+
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            logger.error(f"Ingestion job {job.id} failed: {str(e)}", exc_info=True)
+
+        finally:
+            job.finished_at = _now()
+            shutil.rmtree(job.work_dir, ignore_errors=True)
+            publisher.cancel()
+            await asyncio.gather(publisher, return_exceptions=True)
+            # After the publisher stopped, so no progress save can overwrite the final state
+            await self._save(job, prune=True)
+
+        # Documents may have been swapped even if a later file failed
+        if self.on_complete is not None:
+            try:
+                await self.on_complete()
+            except Exception as e:
+                logger.error(f"Ingestion completion hook failed: {str(e)}", exc_info=True)
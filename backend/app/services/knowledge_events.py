@@ -0,0 +1,285 @@
+# backend/app/services/knowledge_events.py
+
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import async_engine, engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CHANNEL = "kb_changes"
+
+# Identifies this process in the events it publishes, so it can skip its own
+PROCESS_ID = uuid.uuid4().hex
+
+_BUMP_VERSION = text("""
+    INSERT INTO kb_versions (collection_name, version, reason, changed_at)
+    VALUES (:collection, 1, :reason, now())
+    ON CONFLICT (collection_name) DO UPDATE
+    SET version = kb_versions.version + 1, reason = EXCLUDED.reason, changed_at = now()
+    RETURNING version
+""")
+
+_NOTIFY = text("SELECT pg_notify(:channel, :payload)")
+
+_GET_VERSION = text("SELECT version FROM kb_versions WHERE collection_name = :collection")
+
+_versions_ready = False
+_versions_lock = threading.Lock()
+
+def ensure_version_table() -> None:
+    """Create the kb_versions table once per process."""
+    global _versions_ready
+    if _versions_ready:
+        return
+    with _versions_lock:
+        if _versions_ready:
+            return
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('kb_versions'))"))
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS kb_versions (
+                    collection_name TEXT PRIMARY KEY,
+                    version BIGINT NOT NULL,
+                    reason TEXT,
+                    changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """))
+        _versions_ready = True
+
+@dataclass(frozen=True)
+class KnowledgeBaseEvent:
+    """A committed change to a collection's chunks, or a switch to another collection."""
+    collection: str
+    version: int
+    reason: Optional[str] = None
+    # PROCESS_ID of the publisher; None when found by a catch-up rather than notified
+    origin: Optional[str] = None
+
+def _events(collections: Iterable[str], reason: str, versions: List[int]) -> List[Tuple[KnowledgeBaseEvent, str]]:
+    events = []
+    for collection, version in zip(collections, versions):
+        event = KnowledgeBaseEvent(collection, version, reason, PROCESS_ID)
+        events.append((event, json.dumps(asdict(event))))
+    return events
+
+def record_change(db: Session, collections: Iterable[str], reason: str) -> Dict[str, int]:
+    """
+    Bump the version of each collection and queue a notification, without committing.
+
+    Call inside the transaction that changes the chunks: the row lock on
+    kb_versions orders concurrent changes, and Postgres delivers the
+    notifications only if, and when, the transaction commits.
+
+    Args:
+        db: Database session holding the change
+        collections: Names of the collections changed
+        reason: Short description, e.g. "ingested" or "deleted"
+
+    Returns:
+        New version per collection
+    """
+    collections = sorted(set(collections))
+    if not collections:
+        return {}
+    ensure_version_table()
+    versions = [db.execute(_BUMP_VERSION, {"collection": c, "reason": reason}).scalar() for c in collections]
+    for event, payload in _events(collections, reason, versions):
+        db.execute(_NOTIFY, {"channel": CHANNEL, "payload": payload})
+    return dict(zip(collections, versions))
+
+async def arecord_change(db: AsyncSession, collections: Iterable[str], reason: str) -> Dict[str, int]:
+    """Async variant of record_change, for request handlers. Does not commit."""
+    collections = sorted(set(collections))
+    if not collections:
+        return {}
+    await asyncio.to_thread(ensure_version_table)
+    versions = [
+        (await db.execute(_BUMP_VERSION, {"collection": c, "reason": reason})).scalar() for c in collections
+    ]
+    for event, payload in _events(collections, reason, versions):
+        await db.execute(_NOTIFY, {"channel": CHANNEL, "payload": payload})
+    return dict(zip(collections, versions))
+
+def get_version(collection: str) -> int:
+    """The current version of a collection, 0 before its first recorded change."""
+    ensure_version_table()
+    with engine.connect() as conn:
+        return conn.execute(_GET_VERSION, {"collection": collection}).scalar() or 0
+
+async def aget_version(collection: str) -> int:
+    """Async variant of get_version."""
+    await asyncio.to_thread(ensure_version_table)
+    async with async_engine.connect() as conn:
+        return (await conn.execute(_GET_VERSION, {"collection": collection})).scalar() or 0
+
+Subscriber = Callable[[KnowledgeBaseEvent], Awaitable[None]]
+
+class KnowledgeEventBus:
+    """
+    Delivers knowledge base changes made by other workers and replicas to
+    in-process subscribers.
+
+    A dedicated asyncpg connection LISTENs on the kb_changes channel. Every
+    notification carries the collection's new version from kb_versions, so
+    duplicates and stale events are dropped, and the worker's own events
+    (already handled where the change was made) are skipped. Notifications
+    sent while the connection is down are lost, so after every (re)connect
+    and every catch_up_interval seconds the bus compares kb_versions with
+    the versions it has seen and emits one event per collection that moved.
+
+    Subscribers are awaited one at a time, in version order per collection;
+    an exception in one is logged and doesn't affect the others.
+    """
+
+    def __init__(
+            self,
+            dsn: Optional[str] = None,
+            catch_up_interval: float = settings.KB_EVENTS_CATCH_UP_SECONDS,
+            max_reconnect_delay: float = settings.KB_EVENTS_MAX_RECONNECT_SECONDS
+    ):
+        # asyncpg takes a plain postgresql:// URL, without a SQLAlchemy driver name
+        self.dsn = dsn or "postgresql://" + settings.get_database_url().split("://", 1)[1]
+        self.catch_up_interval = catch_up_interval
+        self.max_reconnect_delay = max_reconnect_delay
+        self._subscribers: List[Tuple[Optional[str], Subscriber]] = []
+        self._versions: Dict[str, int] = {}
+        self._synced = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def versions(self) -> Dict[str, int]:
+        """The latest version seen per collection."""
+        return dict(self._versions)
+
+    def subscribe(self, callback: Subscriber, collection: Optional[str] = None) -> Callable[[], None]:
+        """
+        Call callback with every change to a collection (every collection by default).
+
+        Returns:
+            A function that removes the subscription
+        """
+        entry = (collection, callback)
+        self._subscribers.append(entry)
+
+        def unsubscribe() -> None:
+            if entry in self._subscribers:
+                self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            connection = None
+            # One queue per connection, bound into its callbacks, so a closed
+            # connection's wake-up can never reach the next one
+            notifications: asyncio.Queue = asyncio.Queue()
+
+            def on_notification(conn, pid, channel, payload, queue=notifications) -> None:
+                queue.put_nowait(payload)
+
+            def on_termination(conn, queue=notifications) -> None:
+                queue.put_nowait(None)
+
+            try:
+                await asyncio.to_thread(ensure_version_table)
+                connection = await asyncpg.connect(self.dsn)
+                await connection.add_listener(CHANNEL, on_notification)
+                # Wakes the loop up to reconnect as soon as the connection is lost
+                connection.add_termination_listener(on_termination)
+                # Listening first, then reading versions, so nothing falls in between
+                await self._catch_up(connection)
+                delay = 1.0
+
+                while True:
+                    try:
+                        payload = await asyncio.wait_for(notifications.get(), timeout=self.catch_up_interval)
+                    except asyncio.TimeoutError:
+                        await self._catch_up(connection)
+                        continue
+                    if payload is None:
+                        raise ConnectionError("Listener connection closed")
+                    await self._handle(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(
+                    f"Knowledge base event listener failed, reconnecting in {delay:.0f}s: {str(e)}",
+                    exc_info=True
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    # Closing on purpose is not a lost connection
+                    connection.remove_termination_listener(on_termination)
+                    try:
+                        await connection.close(timeout=5)
+                    except Exception:
+                        connection.terminate()
+
+    async def _handle(self, payload: str) -> None:
+        try:
+            event = KnowledgeBaseEvent(**json.loads(payload))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Ignoring malformed knowledge base event {payload!r}: {str(e)}")
+            return
+        if event.version <= self._versions.get(event.collection, 0):
+            return
+        self._versions[event.collection] = event.version
+        if event.origin == PROCESS_ID:
+            return
+        await self._dispatch(event)
+
+    async def _catch_up(self, connection) -> None:
+        """Emit an event for every collection whose version moved past the one last seen."""
+        rows = await connection.fetch("SELECT collection_name, version, reason FROM kb_versions")
+        if not self._synced:
+            # This worker's state was built from the current knowledge base
+            self._versions = {row["collection_name"]: row["version"] for row in rows}
+            self._synced = True
+            return
+        for row in rows:
+            if row["version"] > self._versions.get(row["collection_name"], 0):
+                self._versions[row["collection_name"]] = row["version"]
+                logger.info(f"Caught up on collection {row['collection_name']} at version {row['version']}")
+                await self._dispatch(KnowledgeBaseEvent(row["collection_name"], row["version"], row["reason"]))
+
+    async def _dispatch(self, event: KnowledgeBaseEvent) -> None:
+        logger.info(
+            "Knowledge base changed",
+            extra={"collection": event.collection, "version": event.version, "reason": event.reason}
+        )
+        for collection, callback in list(self._subscribers):
+            if collection is not None and collection != event.collection:
+                continue
+            try:
+                await callback(event)
+            except Exception as e:
+                logger.error(f"Error in knowledge base event subscriber: {str(e)}", exc_info=True)
@@ -0,0 +1,238 @@
+# backend/app/services/memory_retriever.py
+
+import asyncio
+import io
+import json
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from pydantic import PrivateAttr
+
+from app.core.config import get_settings
+from app.db.bulk_load import COLLECTION_TABLE, EMBEDDING_TABLE, read_copy_rows
+from app.services.retrievers import PGVectorRetriever
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """One immutable copy of a collection; refreshes build a new one and swap it in."""
+    collection_id: Optional[str]
+    ids: np.ndarray  # chunk uuids, as fixed-width strings
+    matrix: np.ndarray  # (chunks, dimensions) float32, C-contiguous, rows L2-normalized
+    documents: List[str]
+    # Raw JSON, parsed only for the chunks a search returns
+    metadata: List[str]
+
+    @classmethod
+    def empty(cls, collection_id: Optional[str] = None) -> "_Snapshot":
+        return cls(collection_id, np.empty(0, dtype="U36"), np.empty((0, 0), dtype=np.float32), [], [])
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+class InMemoryRetriever(PGVectorRetriever):
+    """
+    Cosine similarity search over an in-process copy of a PGVector collection.
+
+    The collection's embeddings are held in one normalized float32 matrix, so
+    a search is a single matrix-vector product and a partial sort, with no
+    database round trip. Chunk text and metadata sit in flat lists alongside.
+    The copy is loaded by refresh() and kept in sync incrementally: every
+    refresh_interval seconds (or after invalidate()) a search starts a background refresh that
+    fetches the ids in the collection and loads or drops only the chunks
+    that changed (chunks are immutable; re-ingestion replaces them). Meant
+    for collections up to about 100k chunks: the matrix takes
+    chunks x dimensions x 4 bytes in every worker.
+    """
+
+    refresh_interval: float = settings.IN_MEMORY_REFRESH_SECONDS
+
+    _snapshot: _Snapshot = PrivateAttr(default_factory=_Snapshot.empty)
+    _next_refresh: float = PrivateAttr(default=0.0)
+    _refresh_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _refresh_task: Optional[asyncio.Task] = PrivateAttr(default=None)
+
+    @property
+    def size(self) -> int:
+        return len(self._snapshot)
+
+    def invalidate(self) -> None:
+        """Refresh on the next search, e.g. after documents were ingested or deleted."""
+        super().invalidate()
+        self._next_refresh = 0.0
+
+    def refresh(self) -> None:
+        """Bring the in-memory copy up to date with the collection."""
+        with self._refresh_lock:
+            start = time.perf_counter()
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            snapshot = self._snapshot
+            connection = self.engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute(f"SELECT uuid FROM {COLLECTION_TABLE} WHERE name = %s", (self.collection_name,))
+                row = cursor.fetchone()
+                if row is None:
+                    logger.warning(f"Collection {self.collection_name} does not exist")
+                    self._snapshot = _Snapshot.empty()
+                    return
+                collection_id = str(uuid.UUID(str(row[0])))
+
+                if collection_id != snapshot.collection_id:
+                    # New or recreated collection: load it whole
+                    removed = len(snapshot)
+                    snapshot = self._load(cursor, collection_id, None)
+                    added = len(snapshot)
+                else:
+                    cursor.execute(
+                        f"SELECT CAST(uuid AS text) FROM {EMBEDDING_TABLE} WHERE collection_id = %s",
+                        (collection_id,)
+                    )
+                    current = {r[0] for r in cursor.fetchall()}
+                    held = set(snapshot.ids.tolist())
+                    new_ids, gone_ids = sorted(current - held), held - current
+                    if not new_ids and not gone_ids:
+                        return
+                    if gone_ids:
+                        snapshot = self._without(snapshot, gone_ids)
+                    if new_ids:
+                        snapshot = self._with(snapshot, self._load(cursor, collection_id, new_ids))
+                    added, removed = len(new_ids), len(gone_ids)
+                cursor.close()
+            finally:
+                connection.close()
+
+            self._collection_id = collection_id
+            self._snapshot = snapshot
+            logger.info(
+                "Refreshed in-memory vectors",
+                extra={
+                    "collection": self.collection_name,
+                    "chunks": len(snapshot),
+                    "added": added,
+                    "removed": removed,
+                    "megabytes": round(snapshot.matrix.nbytes / 2**20, 1),
+                    "seconds": round(time.perf_counter() - start, 3),
+                }
+            )
+
+    @staticmethod
+    def _load(cursor, collection_id: str, chunk_ids: Optional[List[str]]) -> _Snapshot:
+        """Fetch chunks (all of the collection's when chunk_ids is None) with one binary COPY."""
+        query = (
+            f"SELECT CAST(uuid AS text), document, CAST(cmetadata AS text), embedding "
+            f"FROM {EMBEDDING_TABLE} WHERE collection_id = %s AND embedding IS NOT NULL"
+        )
+        parameters = [collection_id]
+        if chunk_ids is not None:
+            query += " AND uuid = ANY(CAST(%s AS uuid[]))"
+            parameters.append(chunk_ids)
+        buffer = io.BytesIO()
+        # COPY takes no bind parameters, so they are quoted by the driver
+        statement = cursor.mogrify(f"COPY ({query}) TO STDOUT WITH (FORMAT BINARY)", parameters).decode()
+        cursor.copy_expert(statement, buffer)
+
+        ids, documents, metadata, vectors = [], [], [], []
+        for chunk_id, document, cmetadata, embedding in read_copy_rows(buffer.getvalue()):
+            ids.append(chunk_id.decode())
+            documents.append(document.decode("utf-8") if document is not None else "")
+            metadata.append(cmetadata.decode("utf-8") if cmetadata is not None else "{}")
+            # pgvector's binary form: int16 dimensions, int16 unused, big-endian float4s
+            vectors.append(embedding[4:])
+        if not ids:
+            return _Snapshot.empty(collection_id)
+
+        matrix = np.frombuffer(b"".join(vectors), dtype=">f4").reshape(len(ids), -1)
+        return _Snapshot(collection_id, np.array(ids, dtype="U36"), _normalize(matrix), documents, metadata)
+
+    @staticmethod
+    def _without(snapshot: _Snapshot, chunk_ids: set) -> _Snapshot:
+        keep = ~np.isin(snapshot.ids, list(chunk_ids))
+        positions = np.flatnonzero(keep)
+        return _Snapshot(
+            snapshot.collection_id,
+            snapshot.ids[keep],
+            np.ascontiguousarray(snapshot.matrix[keep]),
+            [snapshot.documents[i] for i in positions],
+            [snapshot.metadata[i] for i in positions],
+        )
+
+    @staticmethod
+    def _with(snapshot: _Snapshot, added: _Snapshot) -> _Snapshot:
+        if not len(snapshot):
+            return added
+        if not len(added):
+            return snapshot
+        if added.matrix.shape[1] != snapshot.matrix.shape[1]:
+            raise ValueError(
+                f"Collection {snapshot.collection_id} mixes {snapshot.matrix.shape[1]} and "
+                f"{added.matrix.shape[1]}-dimensional embeddings"
+            )
+        return _Snapshot(
+            snapshot.collection_id,
+            np.concatenate([snapshot.ids, added.ids]),
+            np.vstack([snapshot.matrix, added.matrix]),
+            snapshot.documents + added.documents,
+            snapshot.metadata + added.metadata,
+        )
+
+    def _top_k(self, embedding: List[float]) -> List[Document]:
+        snapshot = self._snapshot
+        if not len(snapshot):
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        if query.shape[0] != snapshot.matrix.shape[1]:
+            raise ValueError(
+                f"Query embedding has {query.shape[0]} dimensions, collection {self.collection_name} "
+                f"has {snapshot.matrix.shape[1]}"
+            )
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        # Cosine similarity of every chunk, i.e. 1 - cosine distance
+        scores = snapshot.matrix @ query
+        k = min(self.k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        if self.score_threshold is not None:
+            top = top[scores[top] >= self.score_threshold]
+        return [
+            Document(page_content=snapshot.documents[i], metadata=json.loads(snapshot.metadata[i]))
+            for i in top
+        ]
+
+    def _refresh_due(self) -> bool:
+        return time.monotonic() >= self._next_refresh
+
+    async def _asearch(self, query: str, embedding: List[float]) -> List[Document]:
+        if self._refresh_due():
+            if self._snapshot.collection_id is None:
+                # Nothing to serve yet: load before searching
+                await asyncio.to_thread(self.refresh)
+            elif self._refresh_task is None or self._refresh_task.done():
+                # Searches keep using the current copy while it refreshes
+                self._refresh_task = asyncio.create_task(asyncio.to_thread(self._refresh_logged))
+        return self._top_k(embedding)
+
+    def _search(self, query: str, embedding: List[float]) -> List[Document]:
+        if self._refresh_due():
+            self.refresh()
+        return self._top_k(embedding)
+
+    def _refresh_logged(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing in-memory vectors, serving the previous copy: {str(e)}", exc_info=True)
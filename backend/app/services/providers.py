@@ -0,0 +1,165 @@
+# backend/app/services/providers.py
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_openai import OpenAIEmbeddings
+
+from app.core.config import get_settings
+from app.services.hashing_embeddings import HashingEmbeddings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+EMBEDDING_PROVIDERS = ("openai", "fake")
+LLM_PROVIDERS = ("google", "fake")
+
+_FAKE_ANSWER_WORDS = (
+    "This is a simulated answer from the load-testing chat model. It stands in for "
+    "the real model so the API can be driven at full load without spending quota, "
+    "while keeping a realistic time to first token and streaming rate."
+).split()
+
+class FakeEmbeddings(HashingEmbeddings):
+    """HashingEmbeddings that take a fixed time per request, like a remote API."""
+
+    def __init__(self, size: int = 1536, latency: float = settings.FAKE_EMBEDDING_LATENCY_MS / 1000):
+        super().__init__(size=size)
+        self.latency = latency
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that streams a canned answer at a fixed rate.
+
+    The first token arrives after first_token_latency seconds and the rest at
+    tokens_per_second, so streaming and non-streaming calls take as long as a
+    real model producing response_tokens tokens.
+    """
+
+    first_token_latency: float = settings.FAKE_LLM_FIRST_TOKEN_MS / 1000
+    tokens_per_second: float = settings.FAKE_LLM_TOKENS_PER_SECOND
+    response_tokens: int = settings.FAKE_LLM_RESPONSE_TOKENS
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _tokens(self) -> List[str]:
+        return [
+            _FAKE_ANSWER_WORDS[i % len(_FAKE_ANSWER_WORDS)] + " "
+            for i in range(self.response_tokens)
+        ]
+
+    def _generation_time(self) -> float:
+        return self.first_token_latency + max(0, self.response_tokens - 1) / self.tokens_per_second
+
+    def _generate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any
+    ) -> ChatResult:
+        time.sleep(self._generation_time())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self._tokens())))])
+
+    async def _agenerate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self._generation_time())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self._tokens())))])
+
+    def _stream(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        for i, token in enumerate(self._tokens()):
+            time.sleep(self.first_token_latency if i == 0 else 1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for i, token in enumerate(self._tokens()):
+            await asyncio.sleep(self.first_token_latency if i == 0 else 1 / self.tokens_per_second)
+            # BaseChatModel.astream reports each chunk to the callbacks
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+def get_embeddings(
+        model: str = settings.EMBEDDING_MODEL,
+        dimensions: Optional[int] = None,
+        **openai_kwargs: Any
+) -> Embeddings:
+    """
+    Build the embedding model selected by EMBEDDING_PROVIDER.
+
+    Args:
+        model: OpenAI embedding model name
+        dimensions: Shortened output size (text-embedding-3 models), or None for the full size
+        **openai_kwargs: Passed to OpenAIEmbeddings (HTTP clients, retries); ignored by fakes
+
+    Returns:
+        The embeddings instance
+    """
+    if settings.EMBEDDING_PROVIDER == "openai":
+        return OpenAIEmbeddings(model=model, dimensions=dimensions, **openai_kwargs)
+    if settings.EMBEDDING_PROVIDER == "fake":
+        logger.warning("Using fake embeddings (EMBEDDING_PROVIDER=fake)")
+        return FakeEmbeddings(size=dimensions or 1536)
+    raise ValueError(
+        f"Unsupported EMBEDDING_PROVIDER: {settings.EMBEDDING_PROVIDER}. Supported: {', '.join(EMBEDDING_PROVIDERS)}"
+    )
+
+def get_chat_model(model_name: str, temperature: float, max_tokens: int) -> BaseChatModel:
+    """
+    Build the chat model selected by LLM_PROVIDER.
+
+    Args:
+        model_name: Gemini model name
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+
+    Returns:
+        The chat model instance
+    """
+    if settings.LLM_PROVIDER == "google":
+        return ChatGoogleGenerativeAI(model=model_name, temperature=temperature, max_tokens=max_tokens)
+    if settings.LLM_PROVIDER == "fake":
+        logger.warning("Using fake chat model (LLM_PROVIDER=fake)")
+        return FakeChatModel()
+    raise ValueError(f"Unsupported LLM_PROVIDER: {settings.LLM_PROVIDER}. Supported: {', '.join(LLM_PROVIDERS)}")
@@ -1,19 +1,34 @@
 # backend/app/services/rag_service.py
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Tuple
+import os
+import time
+from typing import List, Dict, Any, Tuple, Optional, AsyncIterator
+import httpx
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
 from langchain_community.vectorstores.pgvector import PGVector
-from langchain_openai import OpenAIEmbeddings
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompt_values import PromptValue
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import Runnable, RunnableLambda, RunnablePassthrough
 from langchain_core.runnables import RunnableParallel
 from app.core.config import get_settings
-from app.config import CONTACT_DETAILS, PERSONALITY_SETTINGS
-import datetime
-
+from app.core.metrics import (
+    LLMMetricsCallback, RAG_RETRIEVED_DOCS, RAG_TOKENS, current_stage_timings, current_trace_id, observe_stage, stage
+)
+from app.db.collections import CollectionEmbedding, collection_embedding
+from app.db.session import engine
+from app.services.answer_cache import AnswerCache
+from app.services.chain_registry import ChainRegistry, current_personality
+from app.services.context_builder import ContextBuilder
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.knowledge_events import aget_version, get_version
+from app.services.memory_retriever import InMemoryRetriever
+from app.services.providers import get_chat_model, get_embeddings
+from app.services.retrievers import HybridRetriever, PGVectorRetriever, ensure_fulltext_index
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
@@ -23,117 +38,190 @@ class RAGService:
             collection_name: str = "portfolio_chunks",
             model_name: str = "gemini-2.5-flash",
             temperature: float = 0.7,
-            max_tokens: int = 2048
+            max_tokens: int = 2048,
+            embeddings: Optional[Embeddings] = None,
+            llm: Optional[BaseChatModel] = None,
+            answer_cache: Optional[AnswerCache] = None,
+            context_builder: Optional[ContextBuilder] = None
     ):
         self.connection_string = settings.get_database_url()
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        self.llm = ChatGoogleGenerativeAI(
-            model=model_name,
+        self.collection_name = collection_name
+        # Questions must be embedded with the model and size the collection was built with
+        self.collection_embedding = collection_embedding(collection_name)
+
+        # The service is created once per worker, so the HTTP clients are owned here
+        # and kept open for the lifetime of the process (see aclose()).
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+        self._owns_embeddings = embeddings is None
+        if embeddings is None:
+            self._http_client = httpx.Client()
+            self._http_async_client = httpx.AsyncClient()
+            embeddings = self._create_embeddings(self.collection_embedding)
+        self.embeddings = embeddings
+        self.llm = llm or get_chat_model(
+            model_name=model_name,
             temperature=temperature,
             max_tokens=max_tokens
         )
 
-        # Initialize vector store
-        self.vector_store = PGVector(
-            collection_name=collection_name,
-            connection_string=self.connection_string,
-            embedding_function=self.embeddings,
-        )
+        # Let PGVector create the pgvector tables and the collection if they are
+        # missing, on a pooled connection returned right away
+        with engine.connect() as connection:
+            PGVector(
+                collection_name=collection_name,
+                connection_string=self.connection_string,
+                connection=connection,
+                embedding_function=self.embeddings,
+                collection_metadata=self.collection_embedding.metadata(),
+            )
+        if self.collection_embedding.collection_id is None:
+            # PGVector just created the collection
+            self.collection_embedding = collection_embedding(collection_name)
+
+        # Similarity search runs on the asyncpg pool so concurrent chats aren't
+        # serialized behind blocking queries. Distance is cosine (lower = more
+        # similar); score_threshold filters out docs whose *similarity* (1 - distance)
+        # is below the threshold, so 0.3 keeps anything with distance < 0.7 — wide
+        # enough to catch resume + humor content. Hybrid search adds full-text
+        # matches on top, which the threshold doesn't apply to. The in-memory
+        # retriever searches a copy of the collection held by this worker instead.
+        if settings.HYBRID_SEARCH_ENABLED and not settings.IN_MEMORY_RETRIEVAL_ENABLED:
+            ensure_fulltext_index()
+        self.retriever = self._create_retriever()
+        if isinstance(self.retriever, InMemoryRetriever):
+            self.retriever.refresh()
+        # Picks up a switch to a re-embedded collection (see _check_collection)
+        self._next_collection_check = time.monotonic() + settings.COLLECTION_CHECK_SECONDS
 
-        # PGVector returns cosine distance (lower = more similar). score_threshold filters
-        # out docs whose *similarity* (1 - distance) is below the threshold, so 0.3 keeps
-        # anything with distance < 0.7 — wide enough to catch resume + humor content.
-        self.retriever = self.vector_store.as_retriever(
-            search_type="similarity_score_threshold",
-            search_kwargs={"k": 8, "score_threshold": settings.VECTOR_SIMILARITY_THRESHOLD}
+        if answer_cache is None and settings.ANSWER_CACHE_ENABLED:
+            answer_cache = AnswerCache(self.embeddings)
+        self.answer_cache = answer_cache
+        if self.answer_cache is not None and self.answer_cache.shared:
+            self.answer_cache.shared_generation = self._answer_cache_generation(get_version(collection_name))
+        self.context_builder = context_builder or ContextBuilder()
+
+        # One chain per personality, built once; the time of day picks one per request
+        self._llm_with_metrics = self.llm.with_config(callbacks=[LLMMetricsCallback()])
+        self.chains = ChainRegistry(self._build_chain)
+
+    def _create_embeddings(self, embedding: CollectionEmbedding) -> Embeddings:
+        embeddings = get_embeddings(
+            model=embedding.model,
+            dimensions=embedding.dimensions,
+            http_client=self._http_client,
+            http_async_client=self._http_async_client,
         )
-        
-        self.personality = self.get_current_personality()
-        self._initialize_rag_chain()
-
-    def get_current_personality(self) -> str:
-        """Determine the current personality based on time and day."""
-        now = datetime.datetime.now()
-        if now.weekday() >= 5:  # Saturday and Sunday
-            return "weekend"
-        hour = now.hour
-        if 6 <= hour < 12:
-            return "morning"
-        elif 22 <= hour or hour < 6:
-            return "late_night"
+        if settings.EMBEDDING_CACHE_ENABLED:
+            embeddings = CachedEmbeddings(embeddings, model_name=embedding.name)
+        return embeddings
+
+    def _create_retriever(self) -> PGVectorRetriever:
+        if settings.IN_MEMORY_RETRIEVAL_ENABLED:
+            retriever_class = InMemoryRetriever
+        elif settings.HYBRID_SEARCH_ENABLED:
+            retriever_class = HybridRetriever
         else:
-            return "base"
-
-    def _initialize_rag_chain(self) -> None:
-        """Initialize the RAG chain with custom prompting."""
-        # Move templates to separate constants or config file
-        CONTEXT_TEMPLATE = (
-            "Here is information about me from my resume and portfolio:\n"
-            "You are acting as me, the portfolio owner. Keep a professional yet casual tone. Always write complete sentences — never stop mid-sentence. Aim for 3-5 sentences unless the question genuinely requires more detail."
-            "You have access to my resume and portfolio, use this information to provide a detailed and accurate response. It includes my projects, experience, and background."
-            "{context}\n\n"
-            "Use this information to provide a detailed and accurate response. "
-            "If the information provided doesn't contain enough details to fully "
-            "answer the question, acknowledge what you do know from the context "
-            "and indicate what details are not available."
-            "Do not end include extra information in the response, exclude things like \"If you have any more questions or need further details, feel free to ask!\" stay true to the question."
-            "I have also provided my contact details below, when prompted for contact details, use these. I want to be reachable by mobile phone as well, so when prompted for phone number, use this."
-            "If the contact details are links, e.g. github, twitter, resume, etc. provide the link as an <a href='link'>link</a>, with the text being the name of the link."
-            f"My contact details are: Mobile Phone: {CONTACT_DETAILS['phone_number']}, "
-            f"GitHub: {CONTACT_DETAILS['github']}, "
-            f"Twitter: {CONTACT_DETAILS['twitter']}, "
-            f"Resume: {CONTACT_DETAILS['resume']}"
+            retriever_class = PGVectorRetriever
+        return retriever_class(
+            embeddings=self.embeddings,
+            collection_name=self.collection_name,
+            k=8,
+            score_threshold=settings.VECTOR_SIMILARITY_THRESHOLD
         )
 
-        QUESTION_TEMPLATE = (
-            "You are acting as me, the portfolio owner. Answer the following question "
-            "based on the provided context about my experience, projects, and background. "
-            "Be natural and conversational while maintaining professionalism.\n\n"
-            "Question: {question}\n\n"
-            "{formatted_context}\n\n"
-            "Remember:\n"
-            "1. Only use information from the provided context\n"
-            "2. Be specific about projects, technologies, and experiences mentioned\n" 
-            "3. If certain details aren't in the context, be honest about not having that information\n"
-            "4. Maintain a professional but conversational tone\n\n"
-            "Answer:"
+    async def _check_collection(self, force: bool = False) -> bool:
+        """
+        Switch to the collection now holding this service's collection name, if it changed.
+
+        A re-embedding migration (app/services/collection_migration.py) renames a
+        shadow collection into place; every worker notices within
+        COLLECTION_CHECK_SECONDS. Until then it keeps searching the collection it
+        resolved before, with matching embeddings, so no request mixes the two.
+
+        Returns:
+            True if the service switched collections
+        """
+        now = time.monotonic()
+        if not force and now < self._next_collection_check:
+            return False
+        self._next_collection_check = now + settings.COLLECTION_CHECK_SECONDS
+
+        current = await asyncio.to_thread(collection_embedding, self.collection_name)
+        if current.collection_id == self.collection_embedding.collection_id:
+            return False
+
+        if self._owns_embeddings and current.name != self.collection_embedding.name:
+            self.embeddings = self._create_embeddings(current)
+            if self.answer_cache is not None:
+                self.answer_cache.embeddings = self.embeddings
+        self.collection_embedding = current
+        # Requests in flight keep the retriever and chain they already picked
+        retriever = self._create_retriever()
+        if isinstance(retriever, InMemoryRetriever):
+            await asyncio.to_thread(retriever.refresh)
+        self.retriever = retriever
+        self.chains.rebuild()
+        await self._invalidate_answer_cache()
+        logger.info(
+            "Switched collection",
+            extra={"collection": self.collection_name, "embedding": current.name, "collection_id": current.collection_id}
         )
+        return True
 
-        # Retrieve the personality system prompt from config based on current personality.
-        personality_config = PERSONALITY_SETTINGS.get(self.personality, PERSONALITY_SETTINGS["base"])
-        system_prompt = personality_config.get("system_prompt", "")
-
-        # Concatenate the personality system prompt with the base context template.
-        full_context_template = f"{system_prompt}\n{CONTEXT_TEMPLATE}"
-
-        # Create the prompt templates (we use the same question template regardless of personality).
-        context_formatter = ChatPromptTemplate.from_template(full_context_template)
-        question_prompt = ChatPromptTemplate.from_template(QUESTION_TEMPLATE)
-
-        # Create the chain
-        self.rag_chain = (
-            {
-                "context": self.retriever | log_retrieved_docs | format_docs,
-                "question": RunnablePassthrough(),
-            }
-            | RunnableParallel(
-                formatted_context=lambda x: context_formatter.format(context=x["context"]),
-                question=lambda x: x["question"]
-            )
-            | question_prompt
-            | self.llm
+    def _build_chain(self, prompt: ChatPromptTemplate) -> Runnable:
+        """Build the RAG chain for one personality's prompt."""
+        answer_chain = (
+            RunnableLambda(lambda inputs: self._assemble_prompt(prompt, inputs), name="assemble_prompt")
+            | self._llm_with_metrics
             | StrOutputParser()
         )
 
+        # The retrieved docs are kept alongside the answer so streaming callers can
+        # report sources; query() only needs the answer.
+        return RunnableParallel(
+            docs=self.retriever | log_retrieved_docs,
+            question=RunnablePassthrough(),
+        ).assign(answer=answer_chain)
+
+    def _assemble_prompt(self, prompt: ChatPromptTemplate, inputs: Dict[str, Any]) -> PromptValue:
+        """Fit the retrieved docs into the context budget and render the LLM prompt."""
+        with stage("prompt_assembly"):
+            context = self.context_builder.build(inputs["docs"])
+            RAG_TOKENS.labels(kind="context").observe(context.tokens)
+            return prompt.invoke({"context": context.text, "question": inputs["question"]})
+
+    async def _select_chain(self) -> Tuple[str, Runnable]:
+        """Pick the chain for the current personality, reloading edited personality config first."""
+        await self._check_collection()
+        if self.chains.maybe_reload() and self.answer_cache is not None:
+            # Cached answers were written with the old prompts; shared ones are
+            # scoped by prompt version, so only this worker's need dropping
+            await self.answer_cache.invalidate()
+        personality = current_personality()
+        return personality, self.chains.get(personality)
+
     async def query(self, question: str) -> str:
         """Process a question through the RAG pipeline."""
         try:
-            logger.info(f"Processing question: {question}")
-            
-            # Generate response using the RAG chain
-            response = await self.rag_chain.ainvoke(question)
-            
-            logger.info(f"Generated response for question: {question}")
+            logger.debug("Processing question", extra={"question": question})
+            personality, chain = await self._select_chain()
+
+            with stage("total"):
+                cache_lookup = None
+                if self.answer_cache is not None:
+                    with stage("answer_cache_lookup"):
+                        cache_lookup = await self.answer_cache.lookup(
+                            question, personality, scope=self.chains.prompt_version(personality)
+                        )
+                    if cache_lookup.answer is not None:
+                        return cache_lookup.answer
+
+                # Generate response using the RAG chain
+                response = (await chain.ainvoke(question))["answer"]
+
+            if cache_lookup is not None:
+                await self.answer_cache.store(cache_lookup, response)
             
             # Return the response
             return response
@@ -142,6 +230,72 @@ class RAGService:
             logger.error(f"Error processing query: {str(e)}", exc_info=True)
             raise
 
+    async def stream(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the answer for a question as it is generated.
+
+        Yields "token" events as soon as the LLM produces them, then a single
+        "done" event with retrieval metadata, the request's trace id and
+        per-stage timings. Closing the iterator cancels the upstream LLM call.
+        """
+        logger.debug("Streaming answer", extra={"question": question})
+        personality, chain = await self._select_chain()
+
+        start = time.perf_counter()
+        first_token_ms: Optional[float] = None
+        docs: List[Document] = []
+
+        cache_lookup = None
+        if self.answer_cache is not None:
+            with stage("answer_cache_lookup"):
+                cache_lookup = await self.answer_cache.lookup(
+                    question, personality, scope=self.chains.prompt_version(personality)
+                )
+            if cache_lookup.answer is not None:
+                observe_stage("total", time.perf_counter() - start)
+                yield {"event": "token", "data": {"content": cache_lookup.answer}}
+                yield {
+                    "event": "done",
+                    "data": {
+                        "personality": personality,
+                        "cached": True,
+                        "total_ms": round((time.perf_counter() - start) * 1000, 1),
+                        "trace_id": current_trace_id(),
+                        "stages_ms": current_stage_timings(),
+                    },
+                }
+                return
+
+        tokens: List[str] = []
+        async for chunk in chain.astream(question):
+            if "docs" in chunk:
+                docs = chunk["docs"]
+            token = chunk.get("answer")
+            if token:
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                tokens.append(token)
+                yield {"event": "token", "data": {"content": token}}
+
+        # Only answers that streamed to completion are cached
+        if cache_lookup is not None:
+            await self.answer_cache.store(cache_lookup, "".join(tokens))
+
+        observe_stage("total", time.perf_counter() - start)
+        yield {
+            "event": "done",
+            "data": {
+                "personality": personality,
+                "cached": False,
+                "retrieved_docs": len(docs),
+                "sources": describe_sources(docs),
+                "time_to_first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+                "total_ms": round((time.perf_counter() - start) * 1000, 1),
+                "trace_id": current_trace_id(),
+                "stages_ms": current_stage_timings(),
+            },
+        }
+
     async def search_similar(
             self,
             query: str,
@@ -149,14 +303,47 @@ class RAGService:
     ) -> List[Document]:
         """Search for similar documents."""
         try:
-            docs = await self.retriever.get_relevant_documents(query)
+            docs = await self.retriever.ainvoke(query)
             return docs[:top_k]
         except Exception as e:
             logger.error(f"Error in similarity search: {str(e)}", exc_info=True)
             raise
 
+    async def knowledge_base_changed(self) -> None:
+        """Drop state derived from the old knowledge base."""
+        # A recreated or switched collection may need other embeddings than the cached id's
+        if await self._check_collection(force=True):
+            return
+        self.retriever.invalidate()
+        if isinstance(self.retriever, InMemoryRetriever):
+            # Answers from this worker should reflect the change right away
+            await asyncio.to_thread(self.retriever.refresh)
+        await self._invalidate_answer_cache()
+
+    def _answer_cache_generation(self, version: int) -> str:
+        """The knowledge base state shared cached answers belong to, the same on every worker."""
+        return f"{self.collection_embedding.collection_id}:{version}"
+
+    async def _invalidate_answer_cache(self) -> None:
+        if self.answer_cache is None:
+            return
+        generation = None
+        if self.answer_cache.shared:
+            # kb_versions was bumped once, by the worker that made the change
+            generation = self._answer_cache_generation(await aget_version(self.collection_name))
+        await self.answer_cache.invalidate(generation)
+
+    async def aclose(self) -> None:
+        """Release the HTTP clients held by the service."""
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+        if self._http_client is not None:
+            self._http_client.close()
+        logger.info("RAG service shut down")
+
 def log_retrieved_docs(docs: List[Document]) -> List[Document]:
-    """Log retrieval counts so silent empty-context failures are visible."""
+    """Log and record retrieval counts so silent empty-context failures are visible."""
+    RAG_RETRIEVED_DOCS.observe(len(docs))
     if not docs:
         logger.warning(
             "Retriever returned 0 docs — no chunks met the score_threshold "
@@ -164,20 +351,21 @@ def log_retrieved_docs(docs: List[Document]) -> List[Document]:
             "Lower VECTOR_SIMILARITY_THRESHOLD in .env if relevant docs exist."
         )
     else:
-        logger.info(f"Retrieved {len(docs)} doc(s) after threshold filtering")
+        logger.debug("Retrieved docs after threshold filtering", extra={"docs": len(docs)})
     return docs
 
 
-def format_docs(docs: List[Document]) -> str:
-    """Format documents into a single string."""
-    formatted_docs = []
+def describe_sources(docs: List[Document]) -> List[Dict[str, Any]]:
+    """Summarise where the retrieved chunks came from, one entry per source section."""
+    sources = []
+    seen = set()
     for doc in docs:
-        # Extract section and other metadata
-        section = doc.metadata.get("section", "General")
-        category = doc.metadata.get("category", "Content")
-
-        # Format the document with its metadata
-        formatted_doc = f"[Section: {section} | Type: {category}]\n{doc.page_content}\n"
-        formatted_docs.append(formatted_doc)
-
-    return "\n\n".join(formatted_docs)
\ No newline at end of file
+        source = os.path.basename(doc.metadata.get("source", ""))
+        section = doc.metadata.get("section")
+        page = doc.metadata.get("page")
+        key = (source, section, page)
+        if key in seen:
+            continue
+        seen.add(key)
+        sources.append({"source": source, "section": section, "page": page})
+    return sources
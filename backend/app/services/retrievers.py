@@ -0,0 +1,276 @@
+# backend/app/services/retrievers.py
+
+import json
+import logging
+import re
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict, Field, PrivateAttr
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import get_settings
+from app.core.metrics import stage
+from app.db.bulk_load import COLLECTION_TABLE, EMBEDDING_TABLE
+from app.db.session import async_engine, engine
+from app.db.vector_index import first_pass_distance, quantization_for, to_pgvector
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+if not re.fullmatch(r"[a-z_]+", settings.TEXT_SEARCH_CONFIG):
+    raise ValueError(f"Invalid TEXT_SEARCH_CONFIG: {settings.TEXT_SEARCH_CONFIG}")
+
+# Queries must use this exact expression to hit ix_langchain_pg_embedding_document_fts
+DOCUMENT_TSVECTOR = f"to_tsvector('{settings.TEXT_SEARCH_CONFIG}', document)"
+
+_fulltext_index_ready = False
+_fulltext_index_lock = threading.Lock()
+
+def ensure_fulltext_index() -> None:
+    """
+    Build the GIN index for keyword search over chunk text, once per process.
+
+    Built CONCURRENTLY and skipped until PGVector has created the embedding
+    table, like ensure_source_index(); call it before the caller's session has
+    started a transaction.
+    """
+    global _fulltext_index_ready
+    if _fulltext_index_ready:
+        return
+    with _fulltext_index_lock:
+        if _fulltext_index_ready:
+            return
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if not conn.execute(text(f"SELECT to_regclass('{EMBEDDING_TABLE}') IS NOT NULL")).scalar():
+                return
+            conn.execute(text(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{EMBEDDING_TABLE}_document_fts
+                ON {EMBEDDING_TABLE} USING gin ({DOCUMENT_TSVECTOR})
+            """))
+        _fulltext_index_ready = True
+
+def _metadata(value: Any) -> dict:
+    # asyncpg returns json/jsonb columns as text, psycopg2 as dicts
+    if isinstance(value, str):
+        return json.loads(value)
+    return value or {}
+
+class PGVectorRetriever(BaseRetriever):
+    """
+    Cosine similarity search over a PGVector collection.
+
+    Queries run on the asyncpg engine when invoked asynchronously, so retrieval
+    never holds the event loop while Postgres searches; the sync path uses the
+    psycopg2 engine. The collection id is inlined as a literal so the planner
+    can use the collection's partial ANN index (see app.db.vector_index).
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    embeddings: Embeddings
+    collection_name: str = "portfolio_chunks"
+    k: int = 8
+    # Minimum similarity (1 - cosine distance) a chunk needs to be returned
+    score_threshold: Optional[float] = None
+    # First-pass search on a quantized index ("none", "halfvec", "binary"); None
+    # means the collection's configured quantization, which its index must match
+    quantization: Optional[str] = None
+    # Quantized hits rescored with the full-precision embeddings
+    rescore_candidates: int = settings.VECTOR_RESCORE_CANDIDATES
+    async_engine: AsyncEngine = Field(default_factory=lambda: async_engine)
+    engine: Engine = Field(default_factory=lambda: engine)
+
+    _collection_id: Optional[str] = PrivateAttr(default=None)
+
+    def invalidate(self) -> None:
+        """Forget the cached collection id, e.g. after the collection was recreated."""
+        self._collection_id = None
+
+    def _nearest(self, collection_id: str, dimensions: int, limit: str) -> str:
+        """
+        SQL for the collection's nearest chunks by exact cosine distance.
+
+        Without quantization this is a plain ORDER BY on the float32 index
+        (cast to the collection's dimension, like the index).
+        Otherwise the quantized index finds :rescore_candidates chunks first
+        and only those are ordered by their full-precision distance.
+        """
+        query_vector = "CAST(CAST(:embedding AS text) AS vector)"
+        quantization = self.quantization or quantization_for(self.collection_name)
+        if quantization == "none":
+            return f"""
+                SELECT uuid, document, cmetadata, {first_pass_distance(quantization, dimensions, query_vector)} AS distance
+                FROM {EMBEDDING_TABLE}
+                WHERE collection_id = '{collection_id}'
+                ORDER BY distance
+                LIMIT {limit}
+            """
+        return f"""
+            SELECT uuid, document, cmetadata, embedding <=> {query_vector} AS distance
+            FROM (
+                SELECT uuid, document, cmetadata, embedding
+                FROM {EMBEDDING_TABLE}
+                WHERE collection_id = '{collection_id}'
+                ORDER BY {first_pass_distance(quantization, dimensions, query_vector)}
+                LIMIT :rescore_candidates
+            ) first_pass
+            ORDER BY distance
+            LIMIT {limit}
+        """
+
+    def _search_statement(self, collection_id: str, dimensions: int):
+        return text(self._nearest(collection_id, dimensions, ":k"))
+
+    def _search_parameters(self, query: str, embedding: List[float]) -> Dict[str, Any]:
+        return {
+            "embedding": to_pgvector(embedding),
+            "k": self.k,
+            "rescore_candidates": max(self.rescore_candidates, self.k),
+        }
+
+    def _to_documents(self, rows) -> List[Document]:
+        documents = []
+        for row in rows:
+            if self.score_threshold is not None and 1 - row.distance < self.score_threshold:
+                continue
+            documents.append(Document(page_content=row.document, metadata=_metadata(row.cmetadata)))
+        return documents
+
+    def _statement_for(self, collection_id: Any, dimensions: int):
+        # Validated before being inlined: a bound parameter would hide the value
+        # from the planner and rule out the partial index
+        self._collection_id = str(uuid.UUID(str(collection_id)))
+        return self._search_statement(self._collection_id, dimensions)
+
+    async def _aget_relevant_documents(
+            self,
+            query: str,
+            *,
+            run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        with stage("question_embedding"):
+            embedding = await self.embeddings.aembed_query(query)
+        with stage("vector_search"):
+            return await self._asearch(query, embedding)
+
+    async def _asearch(self, query: str, embedding: List[float]) -> List[Document]:
+        async with self.async_engine.connect() as conn:
+            collection_id = self._collection_id
+            if collection_id is None:
+                collection_id = (await conn.execute(
+                    text(f"SELECT uuid FROM {COLLECTION_TABLE} WHERE name = :name"),
+                    {"name": self.collection_name}
+                )).scalar()
+                if collection_id is None:
+                    logger.warning(f"Collection {self.collection_name} does not exist")
+                    return []
+
+            rows = (await conn.execute(
+                self._statement_for(collection_id, len(embedding)),
+                self._search_parameters(query, embedding)
+            )).fetchall()
+        return self._to_documents(rows)
+
+    def _get_relevant_documents(
+            self,
+            query: str,
+            *,
+            run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        with stage("question_embedding"):
+            embedding = self.embeddings.embed_query(query)
+        with stage("vector_search"):
+            return self._search(query, embedding)
+
+    def _search(self, query: str, embedding: List[float]) -> List[Document]:
+        with self.engine.connect() as conn:
+            collection_id = self._collection_id
+            if collection_id is None:
+                collection_id = conn.execute(
+                    text(f"SELECT uuid FROM {COLLECTION_TABLE} WHERE name = :name"),
+                    {"name": self.collection_name}
+                ).scalar()
+                if collection_id is None:
+                    logger.warning(f"Collection {self.collection_name} does not exist")
+                    return []
+
+            rows = conn.execute(
+                self._statement_for(collection_id, len(embedding)),
+                self._search_parameters(query, embedding)
+            ).fetchall()
+        return self._to_documents(rows)
+
+class HybridRetriever(PGVectorRetriever):
+    """
+    Keyword and vector search over a PGVector collection, fused with reciprocal
+    rank fusion (RRF).
+
+    Each search returns its top `candidates` chunks; a chunk scores
+    1 / (rrf_k + rank) for every list it appears in, and the best `k` by summed
+    score are returned. Keyword search ranks full-text matches with
+    ts_rank_cd, so exact terms (technologies, company names) are found even
+    when their embeddings score low. Any query word may match; chunks that
+    match more of them rank higher. score_threshold only applies to the
+    vector search. Both searches run in one statement, so retrieval is still a
+    single database round trip.
+    """
+
+    candidates: int = settings.HYBRID_SEARCH_CANDIDATES
+    rrf_k: int = settings.HYBRID_RRF_K
+
+    def _search_statement(self, collection_id: str, dimensions: int):
+        config = settings.TEXT_SEARCH_CONFIG
+        return text(f"""
+            WITH semantic AS (
+                SELECT uuid, document, cmetadata, distance, row_number() OVER (ORDER BY distance) AS rank
+                FROM ({self._nearest(collection_id, dimensions, ":candidates")}) nearest
+                WHERE distance <= :max_distance
+            ),
+            keyword AS (
+                SELECT uuid, document, cmetadata, row_number() OVER (ORDER BY score DESC) AS rank
+                FROM (
+                    SELECT uuid, document, cmetadata, ts_rank_cd({DOCUMENT_TSVECTOR}, q.query) AS score
+                    FROM {EMBEDDING_TABLE},
+                         -- OR the normalized query words together; the cast keeps
+                         -- the lexemes as plainto_tsquery produced them
+                         CAST(replace(
+                             CAST(plainto_tsquery('{config}', CAST(:query AS text)) AS text), ' & ', ' | '
+                         ) AS tsquery) AS q(query)
+                    WHERE collection_id = '{collection_id}'
+                      AND {DOCUMENT_TSVECTOR} @@ q.query
+                    ORDER BY score DESC
+                    LIMIT :candidates
+                ) matches
+            )
+            SELECT coalesce(s.document, kw.document) AS document,
+                   coalesce(s.cmetadata, kw.cmetadata) AS cmetadata,
+                   s.distance,
+                   coalesce(1.0 / (:rrf_k + s.rank), 0) + coalesce(1.0 / (:rrf_k + kw.rank), 0) AS score
+            FROM semantic s
+            FULL OUTER JOIN keyword kw ON kw.uuid = s.uuid
+            ORDER BY score DESC
+            LIMIT :k
+        """)
+
+    def _search_parameters(self, query: str, embedding: List[float]) -> Dict[str, Any]:
+        return {
+            "embedding": to_pgvector(embedding),
+            "query": query,
+            "candidates": max(self.candidates, self.k),
+            "rescore_candidates": max(self.rescore_candidates, self.candidates, self.k),
+            # Cosine distance is at most 2, so no threshold keeps every candidate
+            "max_distance": 2.0 if self.score_threshold is None else 1.0 - self.score_threshold,
+            "rrf_k": self.rrf_k,
+            "k": self.k,
+        }
+
+    def _to_documents(self, rows) -> List[Document]:
+        return [Document(page_content=row.document, metadata=_metadata(row.cmetadata)) for row in rows]
@@ -0,0 +1,237 @@
+# backend/app/services/upload_storage.py
+
+import hashlib
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import aiofiles
+from fastapi import HTTPException, Request
+from python_multipart import MultipartParser
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+
+from app.core.config import get_settings
+from app.core.exceptions import UploadTooLargeError
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Room for the boundary and part headers around each file's contents
+MULTIPART_PART_OVERHEAD_BYTES = 16 * 1024
+
+@dataclass
+class SavedUpload:
+    """A file of an upload, saved under a unique name in the upload's directory."""
+    filename: str
+    path: str
+    content_hash: str = ""
+    size_bytes: int = 0
+
+class _UploadParser:
+    """
+    python-multipart callbacks that route each file part to its own file.
+
+    The callbacks run synchronously inside MultipartParser.write(), so they
+    only validate and count; the file I/O they queue is done by drain().
+    """
+
+    def __init__(
+            self,
+            dest_dir: str,
+            field_name: str,
+            extensions: Tuple[str, ...],
+            max_files: int,
+            max_bytes: int,
+            chunk_bytes: int
+    ):
+        self.dest_dir = dest_dir
+        self.field_name = field_name
+        self.extensions = extensions
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.chunk_bytes = chunk_bytes
+
+        self.saved: List[SavedUpload] = []
+        self._names: Set[str] = set()
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition = b""
+        # The file part being received, None inside other parts
+        self._part: Optional[SavedUpload] = None
+        self._events: List[Tuple[str, Any]] = []
+
+        self._out = None
+        self._digest = None
+        self._buffer = bytearray()
+
+    def callbacks(self) -> Dict[str, Callable]:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    @property
+    def in_part(self) -> bool:
+        return self._part is not None
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+        self._part = None
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        if options.get(b"name", b"").decode("utf-8", "replace") != self.field_name or b"filename" not in options:
+            # Other form fields are ignored
+            return
+
+        filename = os.path.basename(options[b"filename"].decode("utf-8", "replace"))
+        if not filename.endswith(self.extensions):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file type for {filename}. Only {', '.join(self.extensions)} files are allowed."
+            )
+        # Chunks are stored per file name, so two files of one upload can't share one
+        if filename in self._names:
+            raise HTTPException(status_code=400, detail=f"Duplicate file name: {filename}")
+        if len(self._names) >= self.max_files:
+            raise HTTPException(status_code=400, detail=f"Too many files. At most {self.max_files} per upload.")
+        self._names.add(filename)
+
+        # The extension picks the loader
+        path = os.path.join(self.dest_dir, uuid.uuid4().hex + os.path.splitext(filename)[1])
+        self._part = SavedUpload(filename=filename, path=path)
+        self._events.append(("begin", self._part))
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part is None:
+            return
+        self._part.size_bytes += end - start
+        if self._part.size_bytes > self.max_bytes:
+            raise UploadTooLargeError(f"{self._part.filename} is larger than the limit of {self.max_bytes} bytes")
+        self._events.append(("data", data[start:end]))
+
+    def _on_part_end(self) -> None:
+        if self._part is not None:
+            self._events.append(("end", self._part))
+            self._part = None
+
+    async def drain(self) -> None:
+        """Write, hash and close what the callbacks queued since the last drain."""
+        for kind, value in self._events:
+            if kind == "begin":
+                self._out = await aiofiles.open(value.path, "wb")
+                self._digest = hashlib.sha256()
+            elif kind == "data":
+                self._digest.update(value)
+                self._buffer += value
+                if len(self._buffer) >= self.chunk_bytes:
+                    await self._flush()
+            else:
+                await self._flush()
+                await self._out.close()
+                self._out = None
+                value.content_hash = self._digest.hexdigest()
+                self.saved.append(value)
+        self._events.clear()
+
+    async def _flush(self) -> None:
+        if self._buffer:
+            await self._out.write(bytes(self._buffer))
+            self._buffer.clear()
+
+    async def aclose(self) -> None:
+        """Close a file left open by an upload that failed part-way."""
+        if self._out is not None:
+            await self._out.close()
+            self._out = None
+
+async def receive_uploads(
+        request: Request,
+        dest_dir: str,
+        field_name: str = "files",
+        extensions: Tuple[str, ...] = (".pdf", ".md"),
+        max_files: int = settings.UPLOAD_MAX_FILES,
+        max_bytes: int = settings.UPLOAD_MAX_FILE_BYTES,
+        chunk_bytes: int = settings.UPLOAD_CHUNK_BYTES
+) -> List[SavedUpload]:
+    """
+    Stream the files of a multipart/form-data request to disk, hashing them on the way.
+
+    The body is parsed as it arrives and each file is written straight to
+    dest_dir under a unique name, at most chunk_bytes buffered at a time and
+    without blocking the event loop; nothing is spooled anywhere first. A
+    request whose Content-Length already exceeds the limits is rejected before
+    any of its body is read, and reading stops as soon as a file, or the body
+    as a whole, goes over them. The caller owns dest_dir and removes it,
+    with anything saved so far, when this raises.
+
+    Args:
+        request: The upload request
+        dest_dir: Directory to save the files in
+        field_name: Form field of the files; other fields are ignored
+        extensions: Accepted file name extensions
+        max_files: Most files per request
+        max_bytes: Size limit per file
+        chunk_bytes: Bytes buffered per file before each write
+
+    Returns:
+        The saved files, in request order
+
+    Raises:
+        UploadTooLargeError: If the request or a file is over its limit
+        HTTPException: 400 for a malformed body, a file of another type, a
+            repeated file name, too many files or none at all
+    """
+    max_request_bytes = max_files * (max_bytes + MULTIPART_PART_OVERHEAD_BYTES)
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_request_bytes:
+        raise UploadTooLargeError(f"The upload is {content_length} bytes; the limit is {max_request_bytes} bytes")
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body")
+
+    uploads = _UploadParser(dest_dir, field_name, extensions, max_files, max_bytes, chunk_bytes)
+    parser = MultipartParser(params[b"boundary"], uploads.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            # Content-Length may be missing (chunked encoding) or wrong
+            received += len(chunk)
+            if received > max_request_bytes:
+                raise UploadTooLargeError(f"The upload is larger than the limit of {max_request_bytes} bytes")
+            parser.write(chunk)
+            await uploads.drain()
+        parser.finalize()
+        await uploads.drain()
+    except MultipartParseError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed multipart body: {str(e)}")
+    finally:
+        await uploads.aclose()
+
+    if uploads.in_part:
+        raise HTTPException(status_code=400, detail="The upload ended in the middle of a file")
+    if not uploads.saved:
+        raise HTTPException(status_code=400, detail=f"No files in the {field_name} field")
+    logger.info(f"Saved {len(uploads.saved)} uploaded file(s), {sum(u.size_bytes for u in uploads.saved)} bytes")
+    return uploads.saved
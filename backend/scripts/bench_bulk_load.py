@@ -0,0 +1,71 @@
+# backend/scripts/bench_bulk_load.py
+"""
+Compare rows/sec for loading embedded chunks into langchain_pg_embedding with
+multi-row INSERTs versus binary COPY, with and without deferred index builds.
+
+Random vectors are loaded into a scratch collection and every run is rolled
+back, so the stored knowledge base is left untouched. Requires a reachable
+DATABASE_URL with the pgvector tables already created (e.g. by init_vectors.py).
+
+Usage: python scripts/bench_bulk_load.py [--rows 20000] [--batch 256] [--dimensions 1536]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.bulk_load import copy_embeddings, deferred_indexes, get_or_create_collection
+from app.db.session import SessionLocal
+from app.services.document_service import DocumentService
+
+logging.basicConfig(level=logging.WARNING)
+
+def run(label: str, insert, args: argparse.Namespace, defer: bool = False) -> None:
+    rng = np.random.default_rng(0)
+    texts = [f"benchmark chunk {i} " + "lorem ipsum " * 60 for i in range(args.rows)]
+    metadatas = [{"source": f"/bench/doc_{i // 100}.md", "content_hash": f"{i:064x}"} for i in range(args.rows)]
+
+    db = SessionLocal()
+    try:
+        collection_id = get_or_create_collection(db, "bench_bulk_load")
+        start = time.perf_counter()
+        with deferred_indexes(db) if defer else nullcontext():
+            for offset in range(0, args.rows, args.batch):
+                vectors = rng.standard_normal((min(args.batch, args.rows - offset), args.dimensions)).astype(np.float32)
+                insert(
+                    db,
+                    collection_id,
+                    texts[offset:offset + args.batch],
+                    metadatas[offset:offset + args.batch],
+                    vectors.tolist()
+                )
+        elapsed = time.perf_counter() - start
+        print(f"{label:<24} rows={args.rows} time={elapsed:.2f}s rows/s={args.rows / elapsed:.0f}")
+    finally:
+        db.rollback()
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=256, help="rows per INSERT/COPY, as sent by the embedding pipeline")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    args = parser.parse_args()
+
+    run("insert", DocumentService.insert_chunks, args)
+    run("copy", copy_embeddings, args)
+    run("copy + deferred indexes", copy_embeddings, args, defer=True)
+
+if __name__ == "__main__":
+    main()
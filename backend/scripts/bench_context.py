@@ -0,0 +1,158 @@
+# backend/scripts/bench_context.py
+"""
+Report prompt tokens per request with the old context assembly and with the
+token-budgeted ContextBuilder.
+
+The fixture corpus (scripts/fixtures/corpus plus the bundled resume PDF) is
+split the way ingestion splits it, and for every question in
+scripts/fixtures/retrieval_questions.json the top --k chunks are picked by
+cosine similarity of local HashingEmbeddings, so no database or API is needed.
+Each question's prompt is then rendered both ways:
+
+  before  every chunk concatenated, with the personality prompt nested inside
+          the question prompt (the previous CONTEXT_TEMPLATE/QUESTION_TEMPLATE)
+  after   overlaps removed, sections merged, context capped at --budget tokens,
+          one system and one human message
+
+Also reported is how many of the labelled relevant chunks still reach the
+prompt, so a budget that drops answers shows up.
+
+Usage:
+    python scripts/bench_context.py
+    python scripts/bench_context.py --k 8 --budget 1000 --chunk-size 1000 --chunk-overlap 200
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import CONTACT_DETAILS, PERSONALITY_SETTINGS
+from app.core.config import get_settings
+from app.services.chain_registry import build_prompt, load_personality_config
+from app.services.context_builder import ContextBuilder
+from app.services.document_processor import DEFAULT_SEPARATORS, parse_file
+from app.services.embedding_pipeline import count_tokens
+from app.services.hashing_embeddings import HashingEmbeddings
+from bench_hybrid_retrieval import FIXTURES, corpus_paths, is_relevant
+
+logging.basicConfig(level=logging.WARNING)
+
+settings = get_settings()
+
+# The templates and formatting RAGService used before the ContextBuilder
+LEGACY_CONTEXT_TEMPLATE = (
+    "Here is information about me from my resume and portfolio:\n"
+    "You are acting as me, the portfolio owner. Keep a professional yet casual tone. Always write complete sentences — never stop mid-sentence. Aim for 3-5 sentences unless the question genuinely requires more detail."
+    "You have access to my resume and portfolio, use this information to provide a detailed and accurate response. It includes my projects, experience, and background."
+    "{context}\n\n"
+    "Use this information to provide a detailed and accurate response. "
+    "If the information provided doesn't contain enough details to fully "
+    "answer the question, acknowledge what you do know from the context "
+    "and indicate what details are not available."
+    "Do not end include extra information in the response, exclude things like \"If you have any more questions or need further details, feel free to ask!\" stay true to the question."
+    "I have also provided my contact details below, when prompted for contact details, use these. I want to be reachable by mobile phone as well, so when prompted for phone number, use this."
+    "If the contact details are links, e.g. github, twitter, resume, etc. provide the link as an <a href='link'>link</a>, with the text being the name of the link."
+    f"My contact details are: Mobile Phone: {CONTACT_DETAILS['phone_number']}, "
+    f"GitHub: {CONTACT_DETAILS['github']}, "
+    f"Twitter: {CONTACT_DETAILS['twitter']}, "
+    f"Resume: {CONTACT_DETAILS['resume']}"
+)
+
+LEGACY_QUESTION_TEMPLATE = (
+    "You are acting as me, the portfolio owner. Answer the following question "
+    "based on the provided context about my experience, projects, and background. "
+    "Be natural and conversational while maintaining professionalism.\n\n"
+    "Question: {question}\n\n"
+    "{formatted_context}\n\n"
+    "Remember:\n"
+    "1. Only use information from the provided context\n"
+    "2. Be specific about projects, technologies, and experiences mentioned\n"
+    "3. If certain details aren't in the context, be honest about not having that information\n"
+    "4. Maintain a professional but conversational tone\n\n"
+    "Answer:"
+)
+
+def legacy_prompt(docs: List[Document], question: str) -> str:
+    formatted_docs = "\n\n".join(
+        f"[Section: {doc.metadata.get('section', 'General')} | Type: {doc.metadata.get('category', 'Content')}]\n{doc.page_content}\n"
+        for doc in docs
+    )
+    system_prompt = PERSONALITY_SETTINGS["base"]["system_prompt"]
+    context_formatter = ChatPromptTemplate.from_template(f"{system_prompt}\n{LEGACY_CONTEXT_TEMPLATE}")
+    formatted_context = context_formatter.format(context=formatted_docs)
+    return ChatPromptTemplate.from_template(LEGACY_QUESTION_TEMPLATE).format(
+        formatted_context=formatted_context, question=question
+    )
+
+def load_chunks(chunk_size: int, chunk_overlap: int) -> List[Document]:
+    chunks = []
+    for path in corpus_paths():
+        try:
+            chunks.extend(parse_file(path, chunk_size, chunk_overlap, DEFAULT_SEPARATORS))
+        except Exception as e:
+            print(f"skipping {Path(path).name}: {type(e).__name__}: {e}")
+    return chunks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=8, help="chunks retrieved per question (RAGService retrieves 8)")
+    parser.add_argument("--budget", type=int, default=settings.CONTEXT_MAX_TOKENS, help="context token budget")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    args = parser.parse_args()
+
+    questions = json.loads((FIXTURES / "retrieval_questions.json").read_text())
+    chunks = load_chunks(args.chunk_size, args.chunk_overlap)
+    embeddings = HashingEmbeddings()
+    chunk_vectors = np.array(embeddings.embed_documents([c.page_content for c in chunks]))
+    builder = ContextBuilder(max_tokens=args.budget)
+    personalities, contact_details = load_personality_config(None)
+    prompt = build_prompt(personalities["base"]["system_prompt"], contact_details)
+
+    before_tokens, after_tokens, context_tokens, kept, relevant_total = [], [], [], 0, 0
+    for question in questions:
+        scores = chunk_vectors @ np.array(embeddings.embed_query(question["question"]))
+        docs = [chunks[i] for i in np.argsort(-scores)[:args.k]]
+
+        before = legacy_prompt(docs, question["question"])
+        context = builder.build(docs)
+        messages = prompt.invoke({"context": context.text, "question": question["question"]}).to_messages()
+        after = "\n".join(str(m.content) for m in messages)
+
+        before_tokens.append(count_tokens([before], settings.CONTEXT_TOKENIZER_MODEL)[0])
+        after_tokens.append(count_tokens([after], settings.CONTEXT_TOKENIZER_MODEL)[0])
+        context_tokens.append(context.tokens)
+        relevant = [d for d in docs if is_relevant(d, question)]
+        relevant_total += len(relevant)
+        kept += sum(1 for d in relevant if any(d is u for u in context.used))
+
+    print(f"{len(chunks)} chunks, {len(questions)} questions, k={args.k}, budget={args.budget} tokens")
+    print(
+        f"before  prompt tokens mean={statistics.mean(before_tokens):7.0f} "
+        f"p50={statistics.median(before_tokens):7.0f} max={max(before_tokens):7.0f}"
+    )
+    print(
+        f"after   prompt tokens mean={statistics.mean(after_tokens):7.0f} "
+        f"p50={statistics.median(after_tokens):7.0f} max={max(after_tokens):7.0f} "
+        f"(context mean={statistics.mean(context_tokens):.0f})"
+    )
+    print(f"saved {1 - sum(after_tokens) / sum(before_tokens):.1%} of input tokens per request")
+    if relevant_total:
+        print(f"labelled relevant chunks retrieved: {relevant_total}, still in the prompt: {kept} ({kept / relevant_total:.1%})")
+
+if __name__ == "__main__":
+    main()
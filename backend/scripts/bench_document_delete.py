@@ -0,0 +1,112 @@
+# backend/scripts/bench_document_delete.py
+"""
+Show that deleting documents costs the same however large the corpus is.
+
+For each corpus size, a scratch collection is grown to that many chunks (spread
+over 50-chunk documents) and a handful of documents is deleted with the
+set-based bulk delete, next to the legacy LIKE '%filename' lookup for contrast.
+Everything runs in one transaction that is rolled back, so the knowledge base is
+untouched. Requires a reachable DATABASE_URL with the pgvector tables created.
+
+Usage: python scripts/bench_document_delete.py [--sizes 10000 50000 200000] [--delete 5]
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.bulk_load import copy_embeddings, get_or_create_collection
+from app.db.session import SessionLocal
+from app.services.document_service import DocumentService, ensure_document_catalog, ensure_source_index
+
+logging.basicConfig(level=logging.WARNING)
+
+CHUNKS_PER_DOCUMENT = 50
+
+def embedding_dimensions(db) -> int:
+    """Dimension of a typed embedding column, or the default model's."""
+    typmod = db.execute(text("""
+        SELECT atttypmod FROM pg_attribute
+        WHERE attrelid = 'langchain_pg_embedding'::regclass AND attname = 'embedding'
+    """)).scalar()
+    return typmod if typmod and typmod > 0 else 1536
+
+def grow(db, collection_id: str, prefix: str, start: int, stop: int, dimensions: int) -> None:
+    rng = np.random.default_rng(start)
+    for offset in range(start, stop, 1000):
+        rows = range(offset, min(offset + 1000, stop))
+        copy_embeddings(
+            db,
+            collection_id,
+            [f"chunk {i} " + "lorem ipsum " * 40 for i in rows],
+            [{"source": f"/tmp/uploads/{prefix}-{i // CHUNKS_PER_DOCUMENT}.md"} for i in rows],
+            rng.standard_normal((len(rows), dimensions)).astype(np.float32).tolist()
+        )
+
+def time_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--delete", type=int, default=5, help="documents deleted per measurement")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    ensure_source_index()
+    ensure_document_catalog()
+    prefix = f"bench-delete-{uuid.uuid4().hex[:8]}"
+
+    db = SessionLocal()
+    try:
+        dimensions = embedding_dimensions(db)
+        collection_id = get_or_create_collection(db, prefix)
+        loaded = 0
+        for size in sorted(args.sizes):
+            grow(db, collection_id, prefix, loaded, size, dimensions)
+            loaded = size
+            db.execute(text("ANALYZE langchain_pg_embedding"))
+
+            documents = size // CHUNKS_PER_DOCUMENT
+            bulk, legacy = [], []
+            for repeat in range(args.repeats):
+                filenames = [f"{prefix}-{(repeat * args.delete + i) % documents}.md" for i in range(args.delete)]
+
+                # Each measurement is undone so every repeat sees the full corpus
+                savepoint = db.begin_nested()
+                bulk.append(time_ms(lambda: DocumentService.bulk_delete_documents(db, filenames, prefix)))
+                savepoint.rollback()
+
+                legacy.append(time_ms(lambda: [
+                    db.execute(
+                        text("SELECT uuid FROM langchain_pg_embedding WHERE cmetadata->>'source' LIKE :pattern"),
+                        {"pattern": f"%{name}"}
+                    ).fetchall()
+                    for name in filenames
+                ]))
+
+            print(
+                f"corpus={size:<8} delete {args.delete} docs: "
+                f"bulk={statistics.median(bulk):.1f}ms legacy LIKE lookup only={statistics.median(legacy):.1f}ms"
+            )
+    finally:
+        db.rollback()
+        db.close()
+
+if __name__ == "__main__":
+    main()
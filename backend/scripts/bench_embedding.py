@@ -0,0 +1,132 @@
+# backend/scripts/bench_embedding.py
+"""
+Measure embedding + insert throughput on a large synthetic corpus, comparing a
+single embed-everything-then-insert pass with EmbeddingPipeline at several
+concurrency levels.
+
+Embeddings come from scripts/fake_embeddings_server.py (started automatically
+unless --base-url is given) and inserts are simulated with a sleep proportional
+to the batch size, so no API key or database is needed.
+
+Usage: python scripts/bench_embedding.py [--chunks 20000] [--concurrency 1 4 8] [--insert-ms-per-1k 200]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+from dotenv import load_dotenv
+from langchain_openai import OpenAIEmbeddings
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.embedding_pipeline import EmbeddingPipeline
+
+logging.basicConfig(level=logging.WARNING)
+
+WORDS = (
+    "python fastapi postgres pgvector kubernetes docker embeddings retrieval latency "
+    "throughput pipeline backend frontend typescript react terraform observability "
+    "designed built shipped scaled migrated optimised led mentored reviewed deployed"
+).split()
+
+def generate_chunks(count: int) -> List[str]:
+    """Chunk-sized texts (~800-1000 characters), like the document splitter produces."""
+    rng = random.Random(42)
+    return [f"#{i} " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(90, 110))) for i in range(count)]
+
+def make_embeddings(base_url: str, max_retries: int) -> OpenAIEmbeddings:
+    return OpenAIEmbeddings(
+        model="text-embedding-3-small",
+        base_url=base_url,
+        api_key="fake",
+        max_retries=max_retries,
+        # Send raw strings; the pipeline does its own token accounting
+        check_embedding_ctx_length=False,
+    )
+
+async def simulate_insert(rows: int, insert_ms_per_1k: float) -> None:
+    await asyncio.sleep(insert_ms_per_1k * rows / 1000 / 1000)
+
+def report(label: str, chunks: int, elapsed: float, extra: str = "") -> None:
+    print(f"{label:<22} chunks={chunks} time={elapsed:.2f}s chunks/s={chunks / elapsed:.0f} {extra}")
+
+async def run_baseline(texts: List[str], args: argparse.Namespace) -> None:
+    """Embed everything with the client's default batching, then insert."""
+    embeddings = make_embeddings(args.base_url, max_retries=args.max_retries)
+    start = time.perf_counter()
+    vectors = await embeddings.aembed_documents(texts)
+    await simulate_insert(len(vectors), args.insert_ms_per_1k)
+    report("sequential", len(vectors), time.perf_counter() - start)
+
+async def run_pipeline(texts: List[str], concurrency: int, args: argparse.Namespace) -> None:
+    pipeline = EmbeddingPipeline(
+        make_embeddings(args.base_url, max_retries=0),
+        max_batch_tokens=args.batch_tokens,
+        max_concurrency=concurrency,
+        max_retries=args.max_retries,
+    )
+
+    async def sink(indices: List[int], vectors: List[List[float]]) -> None:
+        await simulate_insert(len(vectors), args.insert_ms_per_1k)
+
+    start = time.perf_counter()
+    done = await pipeline.run(texts, sink)
+    report(f"pipeline c={concurrency}", done, time.perf_counter() - start, f"retries={pipeline.retries}")
+
+def start_server(args: argparse.Namespace) -> subprocess.Popen:
+    server = subprocess.Popen([
+        sys.executable, str(Path(__file__).parent / "fake_embeddings_server.py"),
+        "--port", str(args.port), "--latency-ms", str(args.latency_ms),
+        "--rpm", str(args.rpm), "--tpm", str(args.tpm),
+    ])
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{args.port}/stats", timeout=0.5)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("Fake embeddings server did not start")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--batch-tokens", type=int, default=20000)
+    parser.add_argument("--max-retries", type=int, default=6)
+    parser.add_argument("--insert-ms-per-1k", type=float, default=200, help="simulated insert time per 1000 rows")
+    parser.add_argument("--base-url", help="use a running embeddings server instead of starting one")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--rpm", type=int, default=3000)
+    parser.add_argument("--tpm", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    server = None
+    if args.base_url is None:
+        server = start_server(args)
+        args.base_url = f"http://127.0.0.1:{args.port}/v1"
+
+    try:
+        texts = generate_chunks(args.chunks)
+        await run_baseline(texts, args)
+        for concurrency in args.concurrency:
+            await run_pipeline(texts, concurrency, args)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+# backend/scripts/bench_embedding_dimensions.py
+"""
+Retrieval quality and search cost of shortened embeddings (e.g. 256, 512 and
+1536 dimensions of text-embedding-3-small).
+
+Quality: the fixture corpus (scripts/fixtures/corpus plus the bundled resume
+PDF) and the labelled questions in scripts/fixtures/retrieval_questions.json
+are embedded once at the model's full size. Shorter embeddings are the leading
+dimensions, renormalised, which is how OpenAI documents the `dimensions`
+parameter of text-embedding-3 models, so one set of API calls covers every
+size. For each size the report gives hit@k and MRR on the labels, and recall@k
+against the full-size ranking.
+
+Cost: for each size, --rows generated vectors are loaded into the scratch
+table of bench_vector_index.py (dropped afterwards), and exact and HNSW search
+are timed with their recall against exact top-k, along with table and index
+size. Skipped with --rows 0; otherwise needs a reachable DATABASE_URL.
+
+Usage:
+    python scripts/bench_embedding_dimensions.py
+    python scripts/bench_embedding_dimensions.py --dimensions 256 512 1024 1536 --rows 200000
+    python scripts/bench_embedding_dimensions.py --fake-embeddings --rows 0
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.db.session import engine
+from app.services.hashing_embeddings import HashingEmbeddings
+from app.services.providers import get_embeddings
+from bench_context import load_chunks
+from bench_hybrid_retrieval import FIXTURES, is_relevant
+from bench_vector_index import TABLE, _normalize, build_index, load_corpus
+
+logging.basicConfig(level=logging.WARNING)
+
+settings = get_settings()
+
+def shorten(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    return _normalize(vectors[:, :dimensions])
+
+def evaluate_quality(args: argparse.Namespace) -> None:
+    questions = json.loads((FIXTURES / "retrieval_questions.json").read_text())
+    chunks = load_chunks(args.chunk_size, args.chunk_overlap)
+    embeddings = HashingEmbeddings() if args.fake_embeddings else get_embeddings(settings.EMBEDDING_MODEL)
+    chunk_vectors = np.array(embeddings.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+    question_vectors = np.array(embeddings.embed_documents([q["question"] for q in questions]), dtype=np.float32)
+    full_size = chunk_vectors.shape[1]
+    full_top = np.argsort(-(question_vectors @ chunk_vectors.T), axis=1)[:, :args.k]
+    print(f"{len(chunks)} chunks, {len(questions)} questions, full size {full_size}")
+
+    for dimensions in args.dimensions:
+        if dimensions > full_size:
+            print(f"{dimensions:>5} dims: larger than the model's {full_size}, skipped")
+            continue
+        scores = shorten(question_vectors, dimensions) @ shorten(chunk_vectors, dimensions).T
+        top = np.argsort(-scores, axis=1)[:, :args.k]
+
+        hits, reciprocal_ranks, recalls = [], [], []
+        for question, ranked, expected in zip(questions, top, full_top):
+            rank = next((i + 1 for i, c in enumerate(ranked) if is_relevant(chunks[c], question)), None)
+            hits.append(rank is not None)
+            reciprocal_ranks.append(1 / rank if rank else 0.0)
+            recalls.append(len(set(ranked.tolist()) & set(expected.tolist())) / args.k)
+        print(
+            f"{dimensions:>5} dims: hit@{args.k}={statistics.mean(hits):.2f} MRR={statistics.mean(reciprocal_ranks):.2f} "
+            f"recall@{args.k} vs full size={statistics.mean(recalls):.3f} "
+            f"vector={dimensions * 4} bytes"
+        )
+
+def time_queries(cursor, queries: np.ndarray, truth: np.ndarray, k: int) -> str:
+    latencies: List[float] = []
+    recalls: List[float] = []
+    for query, expected in zip(queries, truth):
+        literal = "[" + ",".join(f"{x:.7g}" for x in query) + "]"
+        start = time.perf_counter()
+        cursor.execute(f"SELECT id FROM {TABLE} ORDER BY embedding <=> %s::vector LIMIT %s", (literal, k))
+        found = [row[0] for row in cursor.fetchall()]
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(found) & set(expected.tolist())) / k)
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return f"recall@{k}={statistics.mean(recalls):.3f} p50={percentiles[49]:.2f}ms p99={percentiles[98]:.2f}ms"
+
+def evaluate_cost(args: argparse.Namespace) -> None:
+    connection = engine.raw_connection()
+    connection.autocommit = True
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+        cursor.execute(f"SET hnsw.ef_search = {args.ef_search}")
+        for dimensions in args.dimensions:
+            corpus_args = argparse.Namespace(**{**vars(args), "dimensions": dimensions})
+            rng = np.random.default_rng(42)
+            centers = _normalize(rng.standard_normal((args.clusters, dimensions)).astype(np.float32))
+            picks = rng.integers(0, args.clusters, args.queries)
+            queries = _normalize(centers[picks] + rng.standard_normal((args.queries, dimensions)).astype(np.float32) * args.spread)
+
+            truth = load_corpus(cursor, corpus_args, centers, queries)
+            cursor.execute(f"SELECT pg_table_size('{TABLE}')")
+            table_mb = cursor.fetchone()[0] / 2**20
+            exact = min(args.exact_queries, args.queries)
+            print(f"{dimensions:>5} dims: table {table_mb:.1f} MB, exact {time_queries(cursor, queries[:exact], truth[:exact], args.k)}")
+            build_index(cursor, "hnsw", f"m = {args.m}, ef_construction = {args.ef_construction}")
+            print(f"{dimensions:>5} dims: hnsw ef_search={args.ef_search} {time_queries(cursor, queries, truth, args.k)}")
+    finally:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.close()
+        connection.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[256, 512, 1536])
+    parser.add_argument("--k", type=int, default=8, help="chunks retrieved per question (RAGService retrieves 8)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--fake-embeddings", action="store_true", help="local HashingEmbeddings instead of the API")
+    parser.add_argument("--rows", type=int, default=100_000, help="generated vectors for the cost runs; 0 skips them")
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--spread", type=float, default=0.05, help="per-dimension noise around cluster centers")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--exact-queries", type=int, default=50, help="queries timed without an index")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--ef-search", type=int, default=settings.VECTOR_INDEX_EF_SEARCH)
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    args = parser.parse_args()
+
+    evaluate_quality(args)
+    if args.rows:
+        evaluate_cost(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# backend/scripts/bench_hybrid_retrieval.py
+"""
+Hit rate and latency of vector-only retrieval against hybrid (full-text +
+vector, RRF) retrieval on a labelled question set.
+
+The fixture corpus (scripts/fixtures/corpus plus the bundled resume PDF) is
+ingested into a scratch collection (deleted afterwards) and every question in
+scripts/fixtures/retrieval_questions.json is labelled with the source file and
+a phrase its answer chunk contains. Query embeddings are computed up front, so
+latencies are database time only. Requires a reachable DATABASE_URL and, for
+the default OpenAI embeddings, OPENAI_API_KEY.
+
+Usage: python scripts/bench_hybrid_retrieval.py [--k 8] [--repeats 5] [--fake-embeddings]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_openai import OpenAIEmbeddings
+from sqlalchemy import text
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.services.document_processor import DocumentProcessor
+from app.services.retrievers import HybridRetriever, PGVectorRetriever
+
+logging.basicConfig(level=logging.WARNING)
+
+settings = get_settings()
+
+FIXTURES = Path(__file__).parent / "fixtures"
+RESUME = Path(__file__).parent.parent / "resume_dawood_dilawar_sim.pdf"
+
+class PrecomputedEmbeddings(Embeddings):
+    """Serves query embeddings computed before timing starts."""
+
+    def __init__(self, vectors: Dict[str, List[float]]):
+        self.vectors = vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.vectors[t] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors[text]
+
+def corpus_paths() -> List[str]:
+    return [str(path) for path in sorted((FIXTURES / "corpus").glob("*.md"))] + [str(RESUME)]
+
+def is_relevant(doc, label: Dict[str, str]) -> bool:
+    return (
+        os.path.basename(doc.metadata.get("source", "")) == label["source"]
+        and label["contains"].lower() in doc.page_content.lower()
+    )
+
+async def evaluate(label: str, retriever: PGVectorRetriever, questions: List[Dict[str, str]], repeats: int) -> None:
+    hits, reciprocal_ranks, latencies = [], [], []
+    for question in questions:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            docs = await retriever.ainvoke(question["question"])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        rank = next((i + 1 for i, doc in enumerate(docs) if is_relevant(doc, question)), None)
+        hits.append(rank is not None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<28} hit@{retriever.k}={statistics.mean(hits):.2f} MRR={statistics.mean(reciprocal_ranks):.2f} "
+        f"p50={percentiles[49]:.2f}ms p95={percentiles[94]:.2f}ms"
+    )
+
+def drop_scratch_collection(collection_name: str) -> None:
+    db = SessionLocal()
+    try:
+        # Chunks go with the collection (ON DELETE CASCADE)
+        db.execute(text("DELETE FROM langchain_pg_collection WHERE name = :name"), {"name": collection_name})
+        db.execute(text("DELETE FROM knowledge_documents WHERE collection_name = :name"), {"name": collection_name})
+        db.commit()
+    finally:
+        db.close()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=8, help="chunks retrieved per question (RAGService retrieves 8)")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per question")
+    parser.add_argument("--fake-embeddings", action="store_true", help="random deterministic embeddings; no API key needed")
+    args = parser.parse_args()
+
+    questions = json.loads((FIXTURES / "retrieval_questions.json").read_text())
+    embeddings: Embeddings = (
+        DeterministicFakeEmbedding(size=1536) if args.fake_embeddings
+        else OpenAIEmbeddings(model="text-embedding-3-small")
+    )
+
+    collection_name = f"bench-hybrid-{uuid.uuid4().hex[:8]}"
+    processor = DocumentProcessor(collection_name=collection_name)
+    processor.embeddings = embeddings
+    try:
+        await processor.process_documents(corpus_paths())
+
+        texts = [q["question"] for q in questions]
+        query_embeddings = PrecomputedEmbeddings(dict(zip(texts, await embeddings.aembed_documents(texts))))
+
+        retrievers = {
+            f"vector threshold={settings.VECTOR_SIMILARITY_THRESHOLD}": PGVectorRetriever(
+                embeddings=query_embeddings, collection_name=collection_name,
+                k=args.k, score_threshold=settings.VECTOR_SIMILARITY_THRESHOLD
+            ),
+            "vector": PGVectorRetriever(embeddings=query_embeddings, collection_name=collection_name, k=args.k),
+            f"hybrid threshold={settings.VECTOR_SIMILARITY_THRESHOLD}": HybridRetriever(
+                embeddings=query_embeddings, collection_name=collection_name,
+                k=args.k, score_threshold=settings.VECTOR_SIMILARITY_THRESHOLD
+            ),
+            "hybrid": HybridRetriever(embeddings=query_embeddings, collection_name=collection_name, k=args.k),
+        }
+        print(f"{len(questions)} labelled questions")
+        for label, retriever in retrievers.items():
+            await evaluate(label, retriever, questions, args.repeats)
+    finally:
+        drop_scratch_collection(collection_name)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+# backend/scripts/bench_logging.py
+"""
+Measure the logging cost a /chat request pays on the request path.
+
+"before" replays the lines the chat endpoint and ChatService used to log per
+request: the message several times, the full request headers and the full
+answer twice, written synchronously by a StreamHandler. "after" replays the
+current lines (a size-only record per request and response) through the
+queue handler from app/core/logger.py, optionally sampled with --sample-rate.
+
+The reported time is what the request thread spends inside logging calls; for
+"after" the background listener's drain time is reported separately. Output
+goes to --sink: /dev/null, a temp file, or a pipe to a slow reader, which is
+what a busy container log driver looks like.
+
+Usage:
+    python scripts/bench_logging.py --requests 2000
+    python scripts/bench_logging.py --sink pipe --answer-tokens 2048 --sample-rate 0.1
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, TextIO
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from starlette.datastructures import Headers
+
+from app.core import logger as app_logger
+from app.core.config import get_settings
+
+settings = get_settings()
+
+HEADERS = Headers({
+    "host": "api.example.com",
+    "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0 Safari/537.36",
+    "accept": "application/json, text/plain, */*",
+    "accept-language": "en-GB,en;q=0.9",
+    "accept-encoding": "gzip, deflate, br",
+    "content-type": "application/json",
+    "origin": "https://www.example.com",
+    "referer": "https://www.example.com/",
+    "cookie": "session=" + "x" * 120,
+    "x-forwarded-for": "203.0.113.7",
+})
+MESSAGE = "Tell me about the projects you have worked on and the technologies you used"
+
+def log_before(logger: logging.Logger, answer: str) -> None:
+    # chat_endpoint and ChatService as they were
+    logger.info(f"Received chat request with message: {MESSAGE}")
+    logger.info(f"Request headers: {HEADERS}")
+    logger.info("Initializing ChatService")
+    logger.info("Initializing ChatService")
+    logger.info("ChatService initialized with RAG service")
+    logger.info("Processing message")
+    logger.info(f"Processing message: {MESSAGE}")
+    logger.info(f"Generated response using RAG: {answer}")
+    logger.info(f"Generated response: {answer}")
+
+def log_after(logger: logging.Logger, answer: str) -> None:
+    logger.info("Chat request", extra={"message_chars": len(MESSAGE)})
+    logger.info("Chat response", extra={"response_chars": len(answer)})
+
+def time_requests(log: Callable[[], None], requests: int) -> List[float]:
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        log()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+def open_sink(kind: str) -> TextIO:
+    if kind == "devnull":
+        return open(os.devnull, "w")
+    if kind == "file":
+        return tempfile.TemporaryFile("w")
+    # A reader that drains slowly, so writes block once the pipe buffer fills
+    reader = subprocess.Popen(
+        [sys.executable, "-c", "import sys, time\nfor line in sys.stdin: time.sleep(0.0001)"],
+        stdin=subprocess.PIPE, text=True
+    )
+    return reader.stdin
+
+def report(label: str, timings: List[float]) -> None:
+    p99 = statistics.quantiles(timings, n=100)[98]
+    print(
+        f"{label:<8} mean={statistics.mean(timings):8.1f}us p50={statistics.median(timings):8.1f}us "
+        f"p99={p99:8.1f}us max={max(timings):9.1f}us"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--answer-tokens", type=int, default=2048, help="answer length; about 4 characters per token")
+    parser.add_argument("--sink", choices=["devnull", "file", "pipe"], default="file")
+    parser.add_argument("--sample-rate", type=float, default=1.0, help="fraction of request records kept in the after run")
+    args = parser.parse_args()
+
+    answer = ("lorem ipsum " * (args.answer_tokens // 3 + 1))[:args.answer_tokens * 4]
+
+    before_logger = logging.getLogger("bench.before")
+    before_logger.propagate = False
+    before_logger.setLevel(logging.INFO)
+    before_stream = open_sink(args.sink)
+    before_handler = logging.StreamHandler(before_stream)
+    before_handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s - %(message)s"))
+    before_logger.addHandler(before_handler)
+    before = time_requests(lambda: log_before(before_logger, answer), args.requests)
+    before_handler.flush()
+
+    settings.LOG_SAMPLE_RATES = {"bench.after": args.sample_rate}
+    after_logger = logging.getLogger("bench.after")
+    after_logger.propagate = False
+    after_logger.setLevel(logging.INFO)
+    handler, listener = app_logger.create_queue_handler(open_sink(args.sink))
+    after_logger.addHandler(handler)
+    listener.start()
+    after = time_requests(lambda: log_after(after_logger, answer), args.requests)
+    drain_start = time.perf_counter()
+    listener.stop()
+    drain_ms = (time.perf_counter() - drain_start) * 1000
+
+    print(f"{args.requests} requests, {len(answer)}-char answers, sink={args.sink}, format={settings.LOG_FORMAT}")
+    report("before", before)
+    report("after", after)
+    print(f"after: listener drained the remaining queue in {drain_ms:.1f}ms; {handler.dropped} records dropped")
+    print(f"request-path logging time per request: {statistics.mean(before) / statistics.mean(after):.1f}x lower")
+
+if __name__ == "__main__":
+    main()
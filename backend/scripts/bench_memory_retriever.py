@@ -0,0 +1,185 @@
+# backend/scripts/bench_memory_retriever.py
+"""
+Search latency and recall of the in-process NumPy retriever against pgvector
+HNSW search, at several collection sizes.
+
+For each --sizes value a scratch collection of generated vectors (clustered as
+in bench_vector_index.py) is loaded through app.db.bulk_load and given the
+collection HNSW index of app.db.vector_index. The same queries then run
+through PGVectorRetriever (asyncpg, one query per search) and
+InMemoryRetriever (a matrix product over its copy of the collection), with
+recall@k measured against exact top-k in NumPy. For the in-memory copy the
+report also gives the time of a full load, its memory, and the time of an
+incremental refresh after --churn chunks were added and as many deleted.
+The scratch collection is dropped afterwards. Requires a reachable
+DATABASE_URL.
+
+Usage:
+    python scripts/bench_memory_retriever.py
+    python scripts/bench_memory_retriever.py --sizes 1000 10000 100000 --dimensions 1536 --queries 500
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.db import vector_index
+from app.db.bulk_load import COLLECTION_TABLE, EMBEDDING_TABLE, copy_embeddings, get_or_create_collection
+from app.db.session import SessionLocal, async_engine
+from app.services.hashing_embeddings import HashingEmbeddings
+from app.services.memory_retriever import InMemoryRetriever
+from app.services.retrievers import PGVectorRetriever
+from bench_vector_index import _normalize, generate_blocks
+
+logging.basicConfig(level=logging.WARNING)
+
+settings = get_settings()
+
+COLLECTION = "bench_memory_retriever"
+
+def drop_collection() -> None:
+    vector_index.drop_index(COLLECTION)
+    db = SessionLocal()
+    try:
+        db.execute(
+            text(f"DELETE FROM {EMBEDDING_TABLE} WHERE collection_id IN (SELECT uuid FROM {COLLECTION_TABLE} WHERE name = :name)"),
+            {"name": COLLECTION}
+        )
+        db.execute(text(f"DELETE FROM {COLLECTION_TABLE} WHERE name = :name"), {"name": COLLECTION})
+        db.commit()
+    finally:
+        db.close()
+
+def load_collection(args: argparse.Namespace, rows: int, centers: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Load the scratch collection and return the exact top-k chunk numbers per query."""
+    scores = np.empty((len(queries), rows), dtype=np.float32)
+    db = SessionLocal()
+    try:
+        collection_id = get_or_create_collection(db, COLLECTION)
+        offset = 0
+        for block in generate_blocks(argparse.Namespace(**{**vars(args), "rows": rows}), centers):
+            numbers = range(offset, offset + len(block))
+            copy_embeddings(db, collection_id, [f"chunk {n}" for n in numbers], [{"n": n} for n in numbers], block)
+            scores[:, offset:offset + len(block)] = queries @ block.T
+            offset += len(block)
+        db.execute(text(f"ANALYZE {EMBEDDING_TABLE}"))
+        db.commit()
+    finally:
+        db.close()
+    return np.argsort(-scores, axis=1)[:, :args.k]
+
+def churn(args: argparse.Namespace, rows: int, centers: np.ndarray) -> None:
+    """Add and delete --churn chunks, as an ingestion would."""
+    rng = np.random.default_rng(rows)
+    added = _normalize(centers[rng.integers(0, len(centers), args.churn)]
+                       + rng.standard_normal((args.churn, args.dimensions)).astype(np.float32) * args.spread)
+    db = SessionLocal()
+    try:
+        collection_id = get_or_create_collection(db, COLLECTION)
+        db.execute(
+            text(f"""
+                DELETE FROM {EMBEDDING_TABLE} WHERE uuid IN (
+                    SELECT uuid FROM {EMBEDDING_TABLE} WHERE collection_id = CAST(:id AS UUID) LIMIT :limit
+                )
+            """),
+            {"id": collection_id, "limit": args.churn}
+        )
+        numbers = range(rows, rows + args.churn)
+        copy_embeddings(db, collection_id, [f"chunk {n}" for n in numbers], [{"n": n} for n in numbers], added)
+        db.commit()
+    finally:
+        db.close()
+
+async def run_queries(
+        label: str,
+        search: Callable[[List[float]], Awaitable[list]],
+        queries: np.ndarray,
+        truth: np.ndarray,
+        k: int
+) -> None:
+    latencies: List[float] = []
+    recalls: List[float] = []
+    for query, expected in zip(queries, truth):
+        embedding = query.tolist()
+        start = time.perf_counter()
+        docs = await search(embedding)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {doc.metadata["n"] for doc in docs}
+        recalls.append(len(found & set(expected.tolist())) / k)
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(
+        f"{label:<28} recall@{k}={statistics.mean(recalls):.3f} "
+        f"p50={percentiles[49]:.2f}ms p99={percentiles[98]:.2f}ms"
+    )
+
+async def bench_size(args: argparse.Namespace, rows: int) -> None:
+    rng = np.random.default_rng(42)
+    centers = _normalize(rng.standard_normal((args.clusters, args.dimensions)).astype(np.float32))
+    picks = rng.integers(0, args.clusters, args.queries)
+    queries = _normalize(centers[picks] + rng.standard_normal((args.queries, args.dimensions)).astype(np.float32) * args.spread)
+
+    drop_collection()
+    start = time.perf_counter()
+    truth = load_collection(args, rows, centers, queries)
+    print(f"{rows} chunks x {args.dimensions} dims: loaded in {time.perf_counter() - start:.1f}s")
+    vector_index.create_index(COLLECTION, method="hnsw")
+
+    retriever_args = {"embeddings": HashingEmbeddings(size=args.dimensions), "collection_name": COLLECTION, "k": args.k}
+    pgvector = PGVectorRetriever(**retriever_args)
+    await run_queries("  pgvector hnsw", lambda e: pgvector._asearch("", e), queries, truth, args.k)
+
+    memory = InMemoryRetriever(**retriever_args)
+    start = time.perf_counter()
+    memory.refresh()
+    load_seconds = time.perf_counter() - start
+
+    async def search_memory(embedding: List[float]) -> list:
+        return memory._top_k(embedding)
+
+    await run_queries("  in-memory", search_memory, queries, truth, args.k)
+    print(f"  in-memory full load {load_seconds * 1000:.0f}ms, matrix {memory._snapshot.matrix.nbytes / 2**20:.1f} MB")
+
+    churn(args, rows, centers)
+    start = time.perf_counter()
+    memory.refresh()
+    print(
+        f"  in-memory refresh after {args.churn} added and {args.churn} deleted: "
+        f"{(time.perf_counter() - start) * 1000:.0f}ms ({memory.size} chunks)"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--spread", type=float, default=0.05, help="per-dimension noise around cluster centers")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8, help="chunks retrieved per question (RAGService retrieves 8)")
+    parser.add_argument("--churn", type=int, default=100, help="chunks added and deleted before the incremental refresh")
+    args = parser.parse_args()
+
+    try:
+        for rows in args.sizes:
+            await bench_size(args, rows)
+    finally:
+        drop_collection()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+# backend/scripts/bench_quantization.py
+"""
+Index size, search latency and recall of quantized HNSW search with exact
+rescoring, against the float32 index.
+
+Uses the generated corpus of bench_vector_index.py in the same scratch table.
+For each --quantizations mode an HNSW index is built on the embeddings as
+the retrievers index them (app.db.vector_index.index_expression), and queries
+run the retrievers' two-stage shape: --rescore candidates from the quantized
+index, reordered by exact cosine distance on the float32 column. Recall is
+measured against exact top-k in NumPy. Requires a reachable DATABASE_URL with
+pgvector 0.7 or later (halfvec and binary_quantize).
+
+Usage:
+    python scripts/bench_quantization.py --rows 100000
+    python scripts/bench_quantization.py --rows 100000 --quantizations halfvec binary --rescore 8 40 100 --ef-search 100
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.session import engine
+from app.db.vector_index import QUANTIZATIONS, first_pass_distance, index_expression
+from bench_vector_index import TABLE, _normalize, load_corpus
+
+logging.basicConfig(level=logging.WARNING)
+
+QUERY_VECTOR = "CAST(%(embedding)s AS vector)"
+
+def search_sql(quantization: str, dimensions: int) -> str:
+    if quantization == "none":
+        return f"SELECT id FROM {TABLE} ORDER BY embedding <=> {QUERY_VECTOR} LIMIT %(k)s"
+    return f"""
+        SELECT id FROM (
+            SELECT id, embedding FROM {TABLE}
+            ORDER BY {first_pass_distance(quantization, dimensions, QUERY_VECTOR)}
+            LIMIT %(rescore)s
+        ) first_pass
+        ORDER BY embedding <=> {QUERY_VECTOR}
+        LIMIT %(k)s
+    """
+
+def run_queries(cursor, label: str, sql: str, queries: np.ndarray, truth: np.ndarray, k: int, rescore: int) -> None:
+    latencies: List[float] = []
+    recalls: List[float] = []
+    for query, expected in zip(queries, truth):
+        literal = "[" + ",".join(f"{x:.7g}" for x in query) + "]"
+        start = time.perf_counter()
+        cursor.execute(sql, {"embedding": literal, "k": k, "rescore": max(rescore, k)})
+        found = [row[0] for row in cursor.fetchall()]
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(found) & set(expected.tolist())) / k)
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(
+        f"{label:<32} recall@{k}={statistics.mean(recalls):.3f} "
+        f"p50={percentiles[49]:.2f}ms p99={percentiles[98]:.2f}ms qps={1000 / statistics.mean(latencies):.0f}"
+    )
+
+def build_index(cursor, quantization: str, dimensions: int, options: str) -> int:
+    cursor.execute(f"DROP INDEX IF EXISTS {TABLE}_ann")
+    start = time.perf_counter()
+    cursor.execute(
+        f"CREATE INDEX {TABLE}_ann ON {TABLE} USING hnsw ({index_expression(quantization, dimensions)}) WITH ({options})"
+    )
+    elapsed = time.perf_counter() - start
+    cursor.execute(f"SELECT pg_relation_size('{TABLE}_ann')")
+    size = cursor.fetchone()[0]
+    print(f"built hnsw {quantization} ({options}) in {elapsed:.1f}s, index {size / 2**20:.1f} MB")
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--spread", type=float, default=0.05, help="per-dimension noise around cluster centers")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8, help="neighbours per query (RAGService retrieves 8)")
+    parser.add_argument("--quantizations", nargs="+", choices=QUANTIZATIONS, default=list(QUANTIZATIONS))
+    parser.add_argument("--rescore", type=int, nargs="+", default=[8, 40, 100], help="first-pass candidates rescored exactly")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--ef-search", type=int, default=100, help="must be at least the largest --rescore")
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch table")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    centers = _normalize(rng.standard_normal((args.clusters, args.dimensions)).astype(np.float32))
+    # Queries are fresh points near the clusters, not corpus members
+    picks = rng.integers(0, args.clusters, args.queries)
+    queries = _normalize(centers[picks] + rng.standard_normal((args.queries, args.dimensions)).astype(np.float32) * args.spread)
+
+    connection = engine.raw_connection()
+    connection.autocommit = True
+    cursor = connection.cursor()
+    try:
+        truth = load_corpus(cursor, args, centers, queries)
+        cursor.execute(f"SELECT pg_table_size('{TABLE}')")
+        print(f"table (float32 embeddings, kept for rescoring) {cursor.fetchone()[0] / 2**20:.1f} MB")
+        cursor.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+        cursor.execute(f"SET hnsw.ef_search = {args.ef_search}")
+
+        sizes = {}
+        options = f"m = {args.m}, ef_construction = {args.ef_construction}"
+        for quantization in args.quantizations:
+            sizes[quantization] = build_index(cursor, quantization, args.dimensions, options)
+            sql = search_sql(quantization, args.dimensions)
+            if quantization == "none":
+                run_queries(cursor, "float32", sql, queries, truth, args.k, args.k)
+            else:
+                for rescore in args.rescore:
+                    run_queries(cursor, f"{quantization} rescore={rescore}", sql, queries, truth, args.k, rescore)
+            cursor.execute(f"DROP INDEX IF EXISTS {TABLE}_ann")
+
+        if "none" in sizes:
+            for quantization, size in sizes.items():
+                if quantization != "none":
+                    print(f"{quantization} index is {size / sizes['none']:.1%} of the float32 index")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.close()
+        connection.close()
+
+if __name__ == "__main__":
+    main()
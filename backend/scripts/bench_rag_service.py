@@ -0,0 +1,104 @@
+# backend/scripts/bench_rag_service.py
+"""
+Compare /chat latency for a per-request RAGService against the shared,
+lifespan-managed instance.
+
+The embedding and chat models are replaced with local stand-ins that sleep for a
+fixed time, so the numbers isolate pipeline construction and retrieval overhead.
+A reachable DATABASE_URL with the pgvector extension is still required.
+
+Usage: python scripts/bench_rag_service.py [--requests 200] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.chat import ChatService
+from app.services.rag_service import RAGService
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+class StandInEmbeddings(DeterministicFakeEmbedding):
+    """Deterministic embeddings with a simulated network round trip."""
+    latency: float = 0.02
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return self.embed_query(text)
+
+class StandInChatModel(FakeListChatModel):
+    """Canned chat model with a simulated generation time."""
+    latency: float = 0.05
+
+    async def _agenerate(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return await super()._agenerate(*args, **kwargs)
+
+def make_rag_service(args: argparse.Namespace) -> RAGService:
+    return RAGService(
+        embeddings=StandInEmbeddings(size=1536, latency=args.embedding_latency),
+        llm=StandInChatModel(responses=["This is a stand-in answer."], latency=args.llm_latency),
+    )
+
+async def run(label: str, get_service: Callable[[], RAGService], args: argparse.Namespace, per_request: bool) -> None:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one_request(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            rag_service = get_service()
+            chat_service = ChatService(rag_service=rag_service)
+            await chat_service.process_message(f"What projects have you worked on? #{i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+            if per_request:
+                # Outside the timed section, so leaked pools don't exhaust Postgres connections
+                await rag_service.aclose()
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one_request(i) for i in range(args.requests)))
+    wall = time.perf_counter() - wall_start
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<12} requests={len(latencies)} "
+        f"p50={percentiles[49]:.1f}ms p99={percentiles[98]:.1f}ms "
+        f"throughput={len(latencies) / wall:.1f} req/s"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="seconds per stand-in embedding call")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per stand-in LLM call")
+    args = parser.parse_args()
+
+    # Per-request construction, as chat_endpoint used to do
+    await run("per-request", lambda: make_rag_service(args), args, per_request=True)
+
+    # One shared instance, as created by the app lifespan
+    shared = make_rag_service(args)
+    try:
+        await run("shared", lambda: shared, args, per_request=False)
+    finally:
+        await shared.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
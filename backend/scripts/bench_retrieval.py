@@ -0,0 +1,231 @@
+# backend/scripts/bench_retrieval.py
+"""
+Offline retrieval evaluation: recall@k, MRR and retrieval latency on a labelled
+question set, plus ingestion throughput, for one set of chunking and retrieval
+settings.
+
+The fixture corpus (scripts/fixtures/corpus plus the bundled resume PDF) is
+ingested into a scratch collection with the given chunking, embedded with
+deterministic local HashingEmbeddings (no API calls, identical across runs), and
+every question in scripts/fixtures/retrieval_questions.json is run through the
+retriever. A chunk is relevant to a question if it comes from the labelled
+source file and contains the labelled phrase. The scratch collection is deleted
+afterwards. Requires a reachable DATABASE_URL with the pgvector extension.
+
+Results are printed and, with --output, written as JSON; --baseline compares
+against an earlier run's JSON.
+
+Usage:
+    python scripts/bench_retrieval.py --output baseline.json
+    python scripts/bench_retrieval.py --chunk-size 500 --chunk-overlap 50 --baseline baseline.json
+    python scripts/bench_retrieval.py --separators '\\n\\n' '\\n' '. ' ' ' '' --k 4 --threshold 0.3
+"""
+
+import argparse
+import asyncio
+import codecs
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+from sqlalchemy import text
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.services.document_processor import DEFAULT_SEPARATORS, DocumentProcessor
+from app.services.hashing_embeddings import HashingEmbeddings
+from app.services.retrievers import HybridRetriever, PGVectorRetriever
+from bench_hybrid_retrieval import FIXTURES, corpus_paths, drop_scratch_collection, is_relevant
+
+logging.basicConfig(level=logging.WARNING)
+
+settings = get_settings()
+
+# (section, metric, higher is better) compared against --baseline
+COMPARED_METRICS = [
+    ("retrieval", "recall_at_k", True),
+    ("retrieval", "hit_rate_at_k", True),
+    ("retrieval", "mrr", True),
+    ("latency_ms", "p50", False),
+    ("latency_ms", "p95", False),
+    ("latency_ms", "p99", False),
+    ("ingestion", "chunks_per_second", True),
+]
+
+def load_chunks(collection_name: str) -> List[Document]:
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("""
+                SELECT e.document, e.cmetadata FROM langchain_pg_embedding e
+                JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+                WHERE c.name = :name
+            """),
+            {"name": collection_name}
+        ).fetchall()
+    finally:
+        db.close()
+    return [
+        Document(page_content=row.document, metadata=json.loads(row.cmetadata) if isinstance(row.cmetadata, str) else row.cmetadata)
+        for row in rows
+    ]
+
+def percentile(values: List[float], p: int) -> float:
+    return statistics.quantiles(values, n=100)[p - 1] if len(values) > 1 else values[0]
+
+async def evaluate(retriever: PGVectorRetriever, questions: List[Dict[str, str]], chunks: List[Document], repeats: int) -> Dict[str, Any]:
+    # Warm the pool and the collection id lookup
+    await retriever.ainvoke(questions[0]["question"])
+
+    latencies: List[float] = []
+    per_question = []
+    for question in questions:
+        relevant = {c.metadata["content_hash"] for c in chunks if is_relevant(c, question)}
+        for _ in range(repeats):
+            start = time.perf_counter()
+            docs = await retriever.ainvoke(question["question"])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        retrieved = [d.metadata.get("content_hash") for d in docs]
+        rank = next((i + 1 for i, h in enumerate(retrieved) if h in relevant), None)
+        per_question.append({
+            "question": question["question"],
+            "relevant_chunks": len(relevant),
+            "retrieved": len(retrieved),
+            "rank": rank,
+            "recall": len(relevant.intersection(retrieved)) / len(relevant) if relevant else None,
+        })
+
+    # A label no chunk satisfies (e.g. its phrase was split across chunks) can't be scored
+    scored = [q for q in per_question if q["relevant_chunks"]]
+    return {
+        "retrieval": {
+            "questions": len(questions),
+            "unanswerable": [q["question"] for q in per_question if not q["relevant_chunks"]],
+            "recall_at_k": statistics.mean(q["recall"] for q in scored) if scored else 0.0,
+            "hit_rate_at_k": statistics.mean(1.0 if q["rank"] else 0.0 for q in scored) if scored else 0.0,
+            "mrr": statistics.mean(1 / q["rank"] if q["rank"] else 0.0 for q in scored) if scored else 0.0,
+        },
+        "latency_ms": {
+            "mean": statistics.mean(latencies),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        },
+        "per_question": per_question,
+    }
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    print("\nagainst baseline:")
+    for section, metric, higher_is_better in COMPARED_METRICS:
+        before = baseline.get(section, {}).get(metric)
+        after = result[section][metric]
+        if before is None:
+            continue
+        change = after - before
+        better = change > 0 if higher_is_better else change < 0
+        marker = "" if abs(change) < 1e-9 else (" better" if better else " WORSE")
+        print(f"  {section}.{metric:<18} {before:10.3f} -> {after:10.3f} ({change:+.3f}){marker}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument(
+        "--separators", nargs="+", default=list(DEFAULT_SEPARATORS),
+        help="text splitter separators, backslash escapes allowed"
+    )
+    parser.add_argument("--k", type=int, default=8, help="chunks retrieved per question (RAGService retrieves 8)")
+    parser.add_argument("--threshold", type=float, default=settings.VECTOR_SIMILARITY_THRESHOLD, help="minimum similarity; negative disables")
+    parser.add_argument(
+        "--retriever", choices=["vector", "hybrid"],
+        default="hybrid" if settings.HYBRID_SEARCH_ENABLED else "vector"
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per question")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON from an earlier run to compare with")
+    args = parser.parse_args()
+
+    separators = tuple(codecs.decode(s, "unicode_escape") for s in args.separators)
+    questions = json.loads((FIXTURES / "retrieval_questions.json").read_text())
+    embeddings = HashingEmbeddings()
+
+    collection_name = f"bench-retrieval-{uuid.uuid4().hex[:8]}"
+    processor = DocumentProcessor(
+        collection_name=collection_name,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        separators=separators
+    )
+    processor.embeddings = embeddings
+    try:
+        paths = corpus_paths()
+        start = time.perf_counter()
+        summary = await processor.process_documents(paths)
+        ingest_seconds = time.perf_counter() - start
+        chunk_count = sum(counts["added"] for counts in summary.values())
+
+        retriever_class = HybridRetriever if args.retriever == "hybrid" else PGVectorRetriever
+        retriever = retriever_class(
+            embeddings=embeddings,
+            collection_name=collection_name,
+            k=args.k,
+            score_threshold=args.threshold if args.threshold >= 0 else None
+        )
+        result = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "chunk_size": args.chunk_size,
+                "chunk_overlap": args.chunk_overlap,
+                "separators": list(separators),
+                "k": args.k,
+                "score_threshold": retriever.score_threshold,
+                "retriever": args.retriever,
+                "embeddings": f"hashing-{embeddings.size}",
+            },
+            "ingestion": {
+                "files": len(paths),
+                "chunks": chunk_count,
+                "seconds": ingest_seconds,
+                "chunks_per_second": chunk_count / ingest_seconds,
+                "bytes": sum(os.path.getsize(path) for path in paths),
+            },
+            **await evaluate(retriever, questions, load_chunks(collection_name), args.repeats),
+        }
+    finally:
+        drop_scratch_collection(collection_name)
+
+    retrieval, latency, ingestion = result["retrieval"], result["latency_ms"], result["ingestion"]
+    print(
+        f"ingested {ingestion['files']} files -> {ingestion['chunks']} chunks in {ingestion['seconds']:.2f}s "
+        f"({ingestion['chunks_per_second']:.0f} chunks/s)"
+    )
+    print(
+        f"{args.retriever} k={args.k}: recall@k={retrieval['recall_at_k']:.3f} hit@k={retrieval['hit_rate_at_k']:.3f} "
+        f"MRR={retrieval['mrr']:.3f} p50={latency['p50']:.2f}ms p95={latency['p95']:.2f}ms p99={latency['p99']:.2f}ms"
+    )
+    for question in retrieval["unanswerable"]:
+        print(f"  no chunk matches the label of: {question}")
+
+    if args.baseline:
+        compare(result, json.loads(args.baseline.read_text()))
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+        print(f"\nwrote {args.output}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
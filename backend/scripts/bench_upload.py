@@ -0,0 +1,134 @@
+# backend/scripts/bench_upload.py
+"""
+Measure API worker peak RSS while saving uploads of growing size.
+
+For every --sizes value a fresh uvicorn worker is started twice: once serving
+the previous upload handling ("before": each file read whole into memory and
+written with a blocking open().write()) and once serving /knowledge/upload
+("after": parsed as it arrives and streamed to disk with aiofiles, hashed on
+the way). Each request carries --files files of the given size. Ingestion
+is stubbed out, so only the cost of receiving and saving the upload is
+measured; no database or API key is needed.
+
+Peak RSS (VmHWM) is read from the worker after the upload and reported as
+growth over its RSS just before it. "after" should stay flat as uploads grow.
+
+Usage:
+    python scripts/bench_upload.py
+    python scripts/bench_upload.py --sizes 10 100 400 --files 3
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import FastAPI, File, UploadFile
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.api.deps import get_ingestion_queue
+from app.api.v1 import knowledge
+
+PORT = 8765
+
+class DiscardingQueue:
+    """Stands in for IngestionJobQueue: drops the saved files instead of ingesting them."""
+
+    async def submit(self, file_paths: List[str], work_dir: str, file_info=None, file_names=None):
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return SimpleNamespace(id="bench", status=SimpleNamespace(value="queued"))
+
+# The app the benchmark's uvicorn workers serve
+app = FastAPI()
+app.include_router(knowledge.router, prefix="/knowledge")
+app.dependency_overrides[get_ingestion_queue] = DiscardingQueue
+
+@app.post("/legacy-upload")
+async def legacy_upload(files: List[UploadFile] = File(...)):
+    temp_dir = tempfile.mkdtemp(prefix="knowledge-upload-")
+    try:
+        for file in files:
+            with open(os.path.join(temp_dir, os.path.basename(file.filename)), 'wb') as f:
+                content = await file.read()
+                f.write(content)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return {"count": len(files)}
+
+@app.get("/memory")
+def memory() -> Dict[str, int]:
+    """Current and peak RSS of this worker in KiB."""
+    status = Path("/proc/self/status").read_text()
+    fields = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+    return {key: int(fields[key].split()[0]) for key in ("VmRSS", "VmHWM")}
+
+def measure(path: str, upload: Path, files: int) -> Dict[str, float]:
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "bench_upload:app",
+            "--app-dir", str(Path(__file__).parent), "--port", str(PORT), "--log-level", "warning",
+        ],
+        env={**os.environ, "UPLOAD_MAX_FILE_BYTES": str(1 << 40)},
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{PORT}", timeout=600) as client:
+            for _ in range(240):
+                try:
+                    client.get("/memory")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.25)
+            before = client.get("/memory").json()
+
+            handles = [open(upload, "rb") for _ in range(files)]
+            try:
+                start = time.perf_counter()
+                response = client.post(
+                    path, files=[("files", (f"upload-{i}.pdf", h, "application/pdf")) for i, h in enumerate(handles)]
+                )
+                elapsed = time.perf_counter() - start
+            finally:
+                for h in handles:
+                    h.close()
+            response.raise_for_status()
+            after = client.get("/memory").json()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {"growth_mb": (after["VmHWM"] - before["VmRSS"]) / 1024, "peak_mb": after["VmHWM"] / 1024, "seconds": elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200], help="file sizes in MB")
+    parser.add_argument("--files", type=int, default=3, help="files per upload request")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            upload = Path(tmp) / "upload.pdf"
+            with open(upload, "wb") as f:
+                for _ in range(size):
+                    f.write(os.urandom(1 << 20))
+
+            for label, path in (("before", "/legacy-upload"), ("after", "/knowledge/upload")):
+                result = measure(path, upload, args.files)
+                print(
+                    f"{label:<7} {args.files} x {size:>4} MB: peak RSS +{result['growth_mb']:7.1f} MB "
+                    f"(peak {result['peak_mb']:.0f} MB) in {result['seconds']:.2f}s"
+                )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# backend/scripts/bench_vector_index.py
+"""
+Recall vs latency of HNSW and IVFFlat indexes against exact search, on a
+generated corpus of clustered vectors (10k to 1M rows).
+
+The corpus is loaded into a scratch table (dropped afterwards unless --keep), so
+the knowledge base is untouched. Ground truth is computed in NumPy block by
+block, so corpora larger than memory are fine. Requires a reachable
+DATABASE_URL with the pgvector extension.
+
+Usage:
+    python scripts/bench_vector_index.py --rows 10000
+    python scripts/bench_vector_index.py --rows 1000000 --dimensions 256 --methods hnsw --ef-search 40 100
+"""
+
+import argparse
+import io
+import logging
+import statistics
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.bulk_load import encode_vector
+from app.db.session import engine
+
+logging.basicConfig(level=logging.WARNING)
+
+TABLE = "bench_ann_vectors"
+BLOCK_ROWS = 50_000
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def generate_blocks(args: argparse.Namespace, centers: np.ndarray) -> Iterator[np.ndarray]:
+    """Deterministic blocks of unit vectors scattered around cluster centers."""
+    for start in range(0, args.rows, BLOCK_ROWS):
+        rng = np.random.default_rng(start)
+        size = min(BLOCK_ROWS, args.rows - start)
+        assignment = rng.integers(0, len(centers), size)
+        noise = rng.standard_normal((size, args.dimensions)).astype(np.float32) * args.spread
+        yield _normalize(centers[assignment] + noise)
+
+def load_corpus(cursor, args: argparse.Namespace, centers: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """COPY the corpus into the scratch table and return exact top-k ids per query."""
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(f"CREATE TABLE {TABLE} (id BIGINT PRIMARY KEY, embedding vector({args.dimensions}))")
+
+    best_scores = np.full((len(queries), args.k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), args.k), dtype=np.int64)
+    start = time.perf_counter()
+    offset = 0
+    for block in generate_blocks(args, centers):
+        buffer = io.BytesIO()
+        buffer.write(b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0))
+        for i, vector in enumerate(block):
+            encoded = encode_vector(vector)
+            buffer.write(struct.pack(">hiq", 2, 8, offset + i))
+            buffer.write(struct.pack(">i", len(encoded)) + encoded)
+        buffer.write(struct.pack(">h", -1))
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {TABLE} (id, embedding) FROM STDIN WITH (FORMAT BINARY)", buffer)
+
+        # Merge this block into the running exact top-k
+        scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+        ids = np.concatenate([best_ids, np.broadcast_to(np.arange(offset, offset + len(block)), (len(queries), len(block)))], axis=1)
+        top = np.argpartition(-scores, args.k - 1, axis=1)[:, :args.k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+        offset += len(block)
+
+    cursor.execute(f"ANALYZE {TABLE}")
+    print(f"loaded {offset} rows x {args.dimensions} dims in {time.perf_counter() - start:.1f}s")
+    return best_ids
+
+def run_queries(cursor, label: str, queries: np.ndarray, truth: np.ndarray, k: int) -> None:
+    latencies: List[float] = []
+    recalls: List[float] = []
+    for query, expected in zip(queries, truth):
+        literal = "[" + ",".join(f"{x:.7g}" for x in query) + "]"
+        start = time.perf_counter()
+        cursor.execute(
+            f"SELECT id FROM {TABLE} ORDER BY embedding <=> %s::vector LIMIT %s",
+            (literal, k)
+        )
+        found = [row[0] for row in cursor.fetchall()]
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(found) & set(expected.tolist())) / k)
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(
+        f"{label:<28} recall@{k}={statistics.mean(recalls):.3f} "
+        f"p50={percentiles[49]:.2f}ms p99={percentiles[98]:.2f}ms qps={1000 / statistics.mean(latencies):.0f}"
+    )
+
+def build_index(cursor, method: str, options: str) -> None:
+    cursor.execute(f"DROP INDEX IF EXISTS {TABLE}_ann")
+    start = time.perf_counter()
+    cursor.execute(f"CREATE INDEX {TABLE}_ann ON {TABLE} USING {method} (embedding vector_cosine_ops) WITH ({options})")
+    cursor.execute(f"SELECT pg_size_pretty(pg_relation_size('{TABLE}_ann'))")
+    print(f"built {method} ({options}) in {time.perf_counter() - start:.1f}s, size {cursor.fetchone()[0]}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--spread", type=float, default=0.05, help="per-dimension noise around cluster centers")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--exact-queries", type=int, default=50, help="queries timed without an index")
+    parser.add_argument("--k", type=int, default=8, help="neighbours per query (RAGService retrieves 8)")
+    parser.add_argument("--methods", nargs="+", choices=["hnsw", "ivfflat"], default=["hnsw", "ivfflat"])
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--lists", type=int, help="IVFFlat lists (default: rows / 1000, sqrt(rows) above 1M)")
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 5, 10, 20, 40])
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch table")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    centers = _normalize(rng.standard_normal((args.clusters, args.dimensions)).astype(np.float32))
+    # Queries are fresh points near the clusters, not corpus members
+    picks = rng.integers(0, args.clusters, args.queries)
+    queries = _normalize(centers[picks] + rng.standard_normal((args.queries, args.dimensions)).astype(np.float32) * args.spread)
+
+    connection = engine.raw_connection()
+    connection.autocommit = True
+    cursor = connection.cursor()
+    try:
+        truth = load_corpus(cursor, args, centers, queries)
+        cursor.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+
+        exact = min(args.exact_queries, args.queries)
+        run_queries(cursor, "exact (sequential scan)", queries[:exact], truth[:exact], args.k)
+
+        for method in args.methods:
+            if method == "hnsw":
+                build_index(cursor, "hnsw", f"m = {args.m}, ef_construction = {args.ef_construction}")
+                for ef_search in args.ef_search:
+                    cursor.execute(f"SET hnsw.ef_search = {ef_search}")
+                    run_queries(cursor, f"hnsw ef_search={ef_search}", queries, truth, args.k)
+            else:
+                lists = args.lists or (max(1, args.rows // 1000) if args.rows <= 1_000_000 else int(args.rows ** 0.5))
+                build_index(cursor, "ivfflat", f"lists = {lists}")
+                for probes in args.probes:
+                    cursor.execute(f"SET ivfflat.probes = {probes}")
+                    run_queries(cursor, f"ivfflat probes={probes}", queries, truth, args.k)
+            cursor.execute(f"DROP INDEX IF EXISTS {TABLE}_ann")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.close()
+        connection.close()
+
+if __name__ == "__main__":
+    main()
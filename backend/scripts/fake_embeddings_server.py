@@ -0,0 +1,126 @@
+# backend/scripts/fake_embeddings_server.py
+"""
+Local stand-in for the OpenAI embeddings endpoint, for exercising the ingestion
+pipeline without an API key.
+
+Vectors are deterministic (seeded from the input), responses take a configurable
+time, and a per-minute request/token budget answers 429 with Retry-After once
+exhausted, like the real API.
+
+Usage: python scripts/fake_embeddings_server.py [--port 8001] [--latency-ms 150] [--rpm 3000] [--tpm 1000000]
+Then point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8001/v1
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import time
+from typing import List, Union
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+class EmbeddingRequest(BaseModel):
+    input: Union[str, List[str], List[int], List[List[int]]]
+    model: str
+    encoding_format: str = "float"
+    dimensions: int | None = None
+
+class MinuteBudget:
+    """Requests and tokens allowed per rolling minute."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window_start = time.monotonic()
+        self.requests = 0
+        self.tokens = 0
+
+    def try_spend(self, tokens: int) -> float:
+        """Spend from the budget; return 0, or seconds until the window resets."""
+        now = time.monotonic()
+        if now - self.window_start >= 60:
+            self.window_start, self.requests, self.tokens = now, 0, 0
+        if self.requests + 1 > self.rpm or self.tokens + tokens > self.tpm:
+            return 60 - (now - self.window_start)
+        self.requests += 1
+        self.tokens += tokens
+        return 0.0
+
+def _inputs(request: EmbeddingRequest) -> list:
+    value = request.input
+    if isinstance(value, str) or (value and isinstance(value[0], int)):
+        return [value]
+    return list(value)
+
+def _vector(value, dimensions: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(repr(value).encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="Fake embeddings")
+    budget = MinuteBudget(args.rpm, args.tpm)
+    stats = {"requests": 0, "inputs": 0, "throttled": 0}
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: EmbeddingRequest):
+        inputs = _inputs(request)
+        # Token arrays are exact; for strings use the usual 4-characters-per-token estimate
+        tokens = sum(len(v) if isinstance(v, list) else max(1, len(v) // 4) for v in inputs)
+
+        wait = budget.try_spend(tokens)
+        if wait > 0:
+            stats["throttled"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": f"{max(wait, 0.1):.1f}"},
+                content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            )
+
+        await asyncio.sleep((args.latency_ms + args.latency_per_1k_tokens_ms * tokens / 1000) / 1000)
+        stats["requests"] += 1
+        stats["inputs"] += len(inputs)
+
+        dimensions = request.dimensions or args.dimensions
+        data = []
+        for index, value in enumerate(inputs):
+            vector = _vector(value, dimensions)
+            if request.encoding_format == "base64":
+                embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+        return {
+            "object": "list",
+            "data": data,
+            "model": request.model,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--latency-ms", type=float, default=150, help="fixed time per request")
+    parser.add_argument("--latency-per-1k-tokens-ms", type=float, default=10, help="extra time per 1k input tokens")
+    parser.add_argument("--rpm", type=int, default=3000, help="requests per minute before 429s")
+    parser.add_argument("--tpm", type=int, default=1_000_000, help="tokens per minute before 429s")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # backend/scripts/init_vectors.py
 
+import argparse
 import os
 import sys
 from pathlib import Path
@@ -32,26 +33,33 @@ load_dotenv()
 sys.path.append(str(Path(__file__).parent.parent))
 
 from app.db.session import SessionLocal
-from app.services.document_processor import DocumentProcessor
+from app.services.document_processor import DocumentProcessor, shutdown_parse_executor
 from app.services.rag_service import RAGService
 from app.core.config import get_settings
-BATCH_SIZE = 10  # Number of embeddings to generate/store at once
-EMBEDDING_MODEL = "text-embedding-3-small"
-VECTOR_DIMENSIONS = 1536  # Dimensions for text-embedding-3-small
 
 # Initialize settings
 settings = get_settings()
 
+SUPPORTED_SUFFIXES = {".pdf", ".md", ".tex"}
+
 class VectorInitializer:
-    def __init__(self):
-        self.processor = DocumentProcessor()
+    def __init__(self, parse_workers: int = 1):
+        self.processor = DocumentProcessor(parse_workers=parse_workers)
         self.rag_service = RAGService()
 
     async def process_resume(self, pdf_path: str, db: Session):
         """Process resume and store chunks with embeddings."""
+        await self.process_files([pdf_path], db)
+
+    async def process_files(self, file_paths: List[str], db: Session, full_reload: bool = False):
+        """Process documents and store chunks with embeddings."""
         try:
             # First process and store the documents
-            await self.processor.process_documents([pdf_path], clear_existing=True)
+            if full_reload:
+                # Replace the files' chunks wholesale, bulk-loading with indexes built afterwards
+                await self.processor.process_documents(file_paths, clear_existing=True, defer_indexes=True)
+            else:
+                await self.processor.process_documents(file_paths, incremental=True)
             
             # Give the database a moment to complete the transaction
             await asyncio.sleep(1)
@@ -94,23 +102,37 @@ class VectorInitializer:
 async def main():
     logger.info("Starting initialization script")
 
-    if len(sys.argv) != 2:
-        logger.error("No PDF path provided")
-        print("Usage: python init_vectors.py <path_to_resume.pdf>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Load resume/knowledge files into the vector store")
+    parser.add_argument("path", help="path to a resume PDF or a directory of .pdf/.md/.tex files")
+    parser.add_argument(
+        "--full-reload",
+        action="store_true",
+        help="delete and bulk-load the files' chunks instead of diffing them, rebuilding indexes after the load"
+    )
+    args = parser.parse_args()
 
-    pdf_path = sys.argv[1]
+    pdf_path = args.path
     if not os.path.exists(pdf_path):
         logger.error(f"File not found: {pdf_path}")
         sys.exit(1)
 
-    initializer = VectorInitializer()
+    if os.path.isdir(pdf_path):
+        # Bulk-load a directory, parsing files in parallel on every core
+        file_paths = sorted(
+            str(path) for path in Path(pdf_path).iterdir()
+            if path.suffix.lower() in SUPPORTED_SUFFIXES
+        )
+        initializer = VectorInitializer(parse_workers=os.cpu_count() or 1)
+    else:
+        file_paths = [pdf_path]
+        initializer = VectorInitializer()
     db = SessionLocal()
 
     try:
-        await initializer.process_resume(pdf_path, db)
+        await initializer.process_files(file_paths, db, full_reload=args.full_reload)
     finally:
         db.close()
+        shutdown_parse_executor()
         logger.info("Database session closed")
 
 if __name__ == "__main__":
@@ -0,0 +1,441 @@
+# backend/scripts/load_test_chat.py
+"""
+Load test the chat pipeline, in process or over HTTP.
+
+In process (the default): concurrent chat throughput of one worker against
+database pool size. Chats run through the shared RAGService with local
+stand-in models (see bench_rag_service.py), retrieving from a scratch
+collection of --rows random vectors so every request does real pgvector work.
+Retrieval on the asyncpg pool is measured at each --pool-sizes value, next to
+the same query run blocking on the event loop, as sync sessions in async
+endpoints used to. The scratch collection is deleted afterwards.
+
+Over HTTP (--url or --spawn): drive /api/v1/chat at fixed request rates and
+find where a deployment saturates. Requests are sent open-loop: each one starts
+on schedule whether or not earlier ones have finished, so a slow server shows
+up as latency instead of quietly lowering the offered load. Each --rps step
+runs for --duration seconds and also reports time to first token (with
+--stream) and the server's event loop lag, polled from /health. The first step
+that misses its target rate, errors more than 1% or exceeds --slo-p99-ms is
+reported as the saturation point. With --spawn N the app is started locally
+under uvicorn with N workers and EMBEDDING_PROVIDER=fake, LLM_PROVIDER=fake and
+the answer cache disabled, so no API quota is used.
+
+Both modes require a reachable DATABASE_URL with the pgvector extension.
+
+Usage:
+    python scripts/load_test_chat.py [--rows 20000] [--requests 400] [--concurrency 32] [--pool-sizes 1 2 5 10 20]
+    python scripts/load_test_chat.py --spawn 4 --rps 20 40 80 160 --stream --output load.json
+    python scripts/load_test_chat.py --url http://localhost:8000 --rps 10 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.db.bulk_load import COLLECTION_TABLE, copy_embeddings, get_or_create_collection
+from app.db.session import SessionLocal
+from app.services.chat import ChatService
+from app.services.rag_service import RAGService
+from app.services.retrievers import PGVectorRetriever
+from bench_rag_service import StandInChatModel, StandInEmbeddings
+
+logging.basicConfig(level=logging.WARNING)
+
+settings = get_settings()
+
+QUESTIONS = [
+    "What projects have you worked on?",
+    "Tell me about your work experience",
+    "Which programming languages do you know?",
+    "Have you used Kubernetes?",
+    "What did you study at university?",
+    "How can I contact you?",
+    "What are you working on right now?",
+    "What do you do outside work?",
+]
+
+# One request: returns latency and time to first token in seconds, and an error or None
+SendChat = Callable[[int], Awaitable[Dict[str, Any]]]
+
+def percentile(values: List[float], p: int) -> Optional[float]:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100)[p - 1]
+
+def summarize(results: List[Dict[str, Any]], elapsed: float, offered: int, shed: int = 0) -> Dict[str, Any]:
+    """Throughput, error rate and latency percentiles of a batch of requests."""
+    ok = [r for r in results if r["error"] is None]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r["error"] is not None:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    latencies = [r["latency"] * 1000 for r in ok]
+    first_tokens = [r["first_token"] * 1000 for r in ok if r["first_token"] is not None]
+    return {
+        "sent": len(results),
+        "shed": shed,
+        "completed": len(ok),
+        "throughput_rps": len(ok) / elapsed,
+        "error_rate": (len(results) - len(ok) + shed) / offered if offered else 0.0,
+        "errors": errors,
+        "latency_ms": {f"p{p}": percentile(latencies, p) for p in (50, 95, 99)},
+        "first_token_ms": {f"p{p}": percentile(first_tokens, p) for p in (50, 95, 99)} if first_tokens else None,
+    }
+
+def format_summary(label: str, summary: Dict[str, Any]) -> str:
+    latency = summary["latency_ms"]
+    fmt = lambda v: f"{v:.0f}" if v is not None else "-"
+    line = (
+        f"{label:<22} achieved={summary['throughput_rps']:>6.1f}/s errors={summary['error_rate']:>6.1%} "
+        f"p50={fmt(latency['p50'])}ms p95={fmt(latency['p95'])}ms p99={fmt(latency['p99'])}ms"
+    )
+    if summary["first_token_ms"]:
+        line += f" ttft_p50={fmt(summary['first_token_ms']['p50'])}ms"
+    return line
+
+async def run_closed_loop(send: SendChat, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Send requests with at most concurrency in flight, each starting when one finishes."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await send(i)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(results, time.perf_counter() - start, requests)
+
+async def run_open_loop(send: SendChat, rps: float, duration: float, max_in_flight: int) -> Dict[str, Any]:
+    """Start requests on a fixed schedule, whether or not earlier ones finished."""
+    results: List[Dict[str, Any]] = []
+    shed = 0
+    in_flight: set = set()
+
+    async def one(i: int) -> None:
+        results.append(await send(i))
+
+    total = int(rps * duration)
+    start = time.perf_counter()
+    for i in range(total):
+        delay = start + i / rps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            # The client is the bottleneck now; count it rather than queue silently
+            shed += 1
+            continue
+        task = asyncio.create_task(one(i))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.wait(in_flight)
+    return summarize(results, time.perf_counter() - start, total, shed)
+
+# In process
+
+class BlockingRetriever(PGVectorRetriever):
+    """The same search run synchronously inside the coroutine."""
+
+    async def _aget_relevant_documents(
+            self,
+            query: str,
+            *,
+            run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self._get_relevant_documents(query, run_manager=run_manager.get_sync())
+
+def load_scratch_collection(collection_name: str, rows: int, dimensions: int) -> None:
+    rng = np.random.default_rng(0)
+    db = SessionLocal()
+    try:
+        collection_id = get_or_create_collection(db, collection_name)
+        for offset in range(0, rows, 1000):
+            size = min(1000, rows - offset)
+            copy_embeddings(
+                db,
+                collection_id,
+                [f"scratch chunk {offset + i} " + "lorem ipsum " * 40 for i in range(size)],
+                [{"source": f"/tmp/uploads/{collection_name}-{(offset + i) // 50}.md"} for i in range(size)],
+                rng.standard_normal((size, dimensions)).astype(np.float32).tolist()
+            )
+        db.execute(text("ANALYZE langchain_pg_embedding"))
+        db.commit()
+    finally:
+        db.close()
+
+def drop_scratch_collection(collection_name: str) -> None:
+    db = SessionLocal()
+    try:
+        # Chunks go with the collection (ON DELETE CASCADE)
+        db.execute(text(f"DELETE FROM {COLLECTION_TABLE} WHERE name = :name"), {"name": collection_name})
+        db.commit()
+    finally:
+        db.close()
+
+def in_process_chat(rag_service: RAGService) -> SendChat:
+    async def send(i: int) -> Dict[str, Any]:
+        start = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            await ChatService(rag_service=rag_service).process_message(f"{QUESTIONS[i % len(QUESTIONS)]} #{i}")
+        except Exception as e:
+            error = type(e).__name__
+        return {"latency": time.perf_counter() - start, "first_token": None, "error": error}
+
+    return send
+
+async def run_in_process(args: argparse.Namespace) -> None:
+    collection_name = f"load-test-{uuid.uuid4().hex[:8]}"
+    rag_service = RAGService(
+        collection_name=collection_name,
+        embeddings=StandInEmbeddings(size=args.dimensions, latency=args.embedding_latency),
+        llm=StandInChatModel(responses=["This is a stand-in answer."], latency=args.llm_latency),
+    )
+    # Every question must reach the database
+    rag_service.answer_cache = None
+    send = in_process_chat(rag_service)
+    try:
+        load_scratch_collection(collection_name, args.rows, args.dimensions)
+        retriever = rag_service.retriever
+        retriever.score_threshold = None
+
+        for pool_size in args.pool_sizes:
+            engine = create_async_engine(
+                settings.get_async_database_url(),
+                pool_size=pool_size,
+                max_overflow=0,
+                pool_timeout=300
+            )
+            retriever.async_engine = engine
+            retriever.invalidate()
+            try:
+                summary = await run_closed_loop(send, args.requests, args.concurrency)
+                print(format_summary(f"async pool={pool_size}", summary))
+            finally:
+                await engine.dispose()
+
+        rag_service.retriever = BlockingRetriever(
+            embeddings=rag_service.embeddings,
+            collection_name=collection_name,
+            k=retriever.k
+        )
+        rag_service.chains.rebuild()
+        print(format_summary("blocking", await run_closed_loop(send, args.requests, args.concurrency)))
+    finally:
+        await rag_service.aclose()
+        drop_scratch_collection(collection_name)
+
+# Over HTTP
+
+def http_chat(client: httpx.AsyncClient, stream: bool) -> SendChat:
+    async def send(i: int) -> Dict[str, Any]:
+        message = f"{QUESTIONS[i % len(QUESTIONS)]} (request {i})"
+        start = time.perf_counter()
+        first_token: Optional[float] = None
+        error: Optional[str] = None
+        try:
+            if stream:
+                async with client.stream("POST", "/api/v1/chat/stream", json={"message": message}) as response:
+                    if response.status_code != 200:
+                        error = f"HTTP {response.status_code}"
+                    else:
+                        async for line in response.aiter_lines():
+                            if line.startswith("event: "):
+                                event = line[len("event: "):]
+                                if event == "token" and first_token is None:
+                                    first_token = time.perf_counter() - start
+                                elif event == "error":
+                                    error = "error event"
+            else:
+                response = await client.post("/api/v1/chat/", json={"message": message})
+                if response.status_code != 200:
+                    error = f"HTTP {response.status_code}"
+                elif response.json().get("error"):
+                    # The endpoint reports failures inside a 200 response
+                    error = "error in response"
+        except httpx.TimeoutException:
+            error = "timeout"
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+        return {"latency": time.perf_counter() - start, "first_token": first_token, "error": error}
+
+    return send
+
+async def poll_health(client: httpx.AsyncClient, interval: float, samples: Dict[int, List[Dict[str, float]]], stop: asyncio.Event) -> None:
+    """Collect event loop lag per worker process until stopped."""
+    while not stop.is_set():
+        try:
+            response = await client.get("/health", timeout=5)
+            body = response.json()
+            samples.setdefault(body["pid"], []).append(body["event_loop"])
+        except (httpx.HTTPError, ValueError, KeyError):
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+async def run_step(send: SendChat, health_client: httpx.AsyncClient, rps: float, args: argparse.Namespace) -> Dict[str, Any]:
+    health: Dict[int, List[Dict[str, float]]] = {}
+    stop_polling = asyncio.Event()
+    poller = asyncio.create_task(poll_health(health_client, args.health_interval, health, stop_polling))
+    try:
+        step = await run_open_loop(send, rps, args.duration, args.max_in_flight)
+    finally:
+        stop_polling.set()
+        await poller
+    step["target_rps"] = rps
+    step["event_loop_lag"] = {
+        str(pid): {
+            "max_lag_ms": max(s["max_lag_ms"] for s in samples),
+            "p99_lag_ms": max(s["p99_lag_ms"] for s in samples),
+        }
+        for pid, samples in health.items()
+    }
+    return step
+
+def print_step(step: Dict[str, Any]) -> None:
+    lag = max((w["max_lag_ms"] for w in step["event_loop_lag"].values()), default=None)
+    print(
+        format_summary(f"target={step['target_rps']:.1f}/s", step)
+        + f" loop_lag_max={f'{lag:.0f}' if lag is not None else '-'}ms workers_seen={len(step['event_loop_lag'])}"
+    )
+    if step["errors"]:
+        print(f"    errors: {step['errors']}")
+
+def is_saturated(step: Dict[str, Any], slo_p99_ms: float) -> bool:
+    p99 = step["latency_ms"]["p99"]
+    return (
+        step["throughput_rps"] < 0.95 * step["target_rps"]
+        or step["error_rate"] > 0.01
+        or p99 is None
+        or p99 > slo_p99_ms
+    )
+
+def spawn_server(args: argparse.Namespace) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "EMBEDDING_PROVIDER": "fake",
+        "LLM_PROVIDER": "fake",
+        "ANSWER_CACHE_ENABLED": "false",
+    }
+    host, port = args.url.split("://", 1)[1].rsplit(":", 1)
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", host, "--port", port,
+            "--workers", str(args.spawn), "--log-level", "warning",
+        ],
+        cwd=Path(__file__).parent.parent,
+        env=env,
+    )
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health", timeout=2)).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server did not become healthy within {timeout}s")
+
+async def run_http(args: argparse.Namespace) -> None:
+    args.url = args.url or "http://127.0.0.1:8000"
+    server = spawn_server(args) if args.spawn else None
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    try:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client, \
+                httpx.AsyncClient(base_url=args.url) as health_client:
+            await wait_until_ready(health_client, timeout=120)
+            send = http_chat(client, args.stream)
+            # One request to warm pools and caches outside the measured steps
+            await send(0)
+
+            steps = []
+            saturated_at = None
+            for rps in args.rps:
+                step = await run_step(send, health_client, rps, args)
+                print_step(step)
+                steps.append(step)
+                if saturated_at is None and is_saturated(step, args.slo_p99_ms):
+                    saturated_at = rps
+
+            if saturated_at is None:
+                print(f"\nnot saturated up to {args.rps[-1]} req/s")
+            else:
+                print(f"\nsaturated at {saturated_at} req/s")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "url": args.url,
+            "workers": args.spawn,
+            "stream": args.stream,
+            "duration_s": args.duration,
+            "saturated_at_rps": saturated_at,
+            "steps": steps,
+        }, indent=2))
+        print(f"wrote {args.output}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    in_process = parser.add_argument_group("in process")
+    in_process.add_argument("--rows", type=int, default=20_000, help="vectors in the scratch collection")
+    in_process.add_argument("--dimensions", type=int, default=1536)
+    in_process.add_argument("--requests", type=int, default=400)
+    in_process.add_argument("--concurrency", type=int, default=32)
+    in_process.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    in_process.add_argument("--embedding-latency", type=float, default=0.02, help="seconds per stand-in embedding call")
+    in_process.add_argument("--llm-latency", type=float, default=0.05, help="seconds per stand-in LLM call")
+
+    http = parser.add_argument_group("over HTTP")
+    http.add_argument("--url", help="base URL of a running deployment (default with --spawn: http://127.0.0.1:8000)")
+    http.add_argument("--spawn", type=int, metavar="WORKERS", help="start the app locally with fake models and this many workers")
+    http.add_argument("--rps", type=float, nargs="+", default=[5, 10, 20, 40], help="request rate per step")
+    http.add_argument("--duration", type=float, default=20, help="seconds per step")
+    http.add_argument("--stream", action="store_true", help="use /chat/stream and measure time to first token")
+    http.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    http.add_argument("--max-in-flight", type=int, default=1000, help="client-side cap on concurrent requests")
+    http.add_argument("--slo-p99-ms", type=float, default=5000, help="p99 latency above which a step counts as saturated")
+    http.add_argument("--health-interval", type=float, default=0.5, help="seconds between /health polls")
+    http.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args()
+
+    if args.url or args.spawn:
+        await run_http(args)
+    else:
+        await run_in_process(args)
+
+if __name__ == "__main__":
+    asyncio.run(main())
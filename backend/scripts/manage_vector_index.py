@@ -0,0 +1,70 @@
+# backend/scripts/manage_vector_index.py
+"""
+Create, drop or inspect the ANN index on a collection's embeddings.
+
+Usage:
+    python scripts/manage_vector_index.py status
+    python scripts/manage_vector_index.py create --method hnsw --m 16 --ef-construction 64
+    python scripts/manage_vector_index.py create --method ivfflat --lists 100
+    python scripts/manage_vector_index.py create --method hnsw --quantization halfvec
+    python scripts/manage_vector_index.py drop
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.db import vector_index
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+settings = get_settings()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["status", "create", "drop"])
+    parser.add_argument("--collection", default="portfolio_chunks")
+    parser.add_argument("--method", choices=vector_index.INDEX_METHODS, default=settings.VECTOR_INDEX_METHOD)
+    parser.add_argument("--m", type=int, default=settings.VECTOR_INDEX_HNSW_M)
+    parser.add_argument("--ef-construction", type=int, default=settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION)
+    parser.add_argument("--lists", type=int, help="IVFFlat lists (default: derived from the row count)")
+    parser.add_argument("--maintenance-work-mem", default=settings.VECTOR_INDEX_MAINTENANCE_WORK_MEM)
+    parser.add_argument(
+        "--quantization", choices=vector_index.QUANTIZATIONS,
+        help="index halfvec or binary-quantized embeddings (default: the collection's configured quantization)"
+    )
+    args = parser.parse_args()
+
+    if args.command == "create":
+        status = vector_index.create_index(
+            args.collection,
+            method=args.method,
+            m=args.m,
+            ef_construction=args.ef_construction,
+            lists=args.lists,
+            maintenance_work_mem=args.maintenance_work_mem,
+            quantization=args.quantization,
+        )
+    elif args.command == "drop":
+        vector_index.drop_index(args.collection)
+        status = vector_index.get_index_status(args.collection)
+    else:
+        status = vector_index.get_index_status(args.collection)
+
+    print(json.dumps(status, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# backend/scripts/migrate_embeddings.py
+"""
+Re-embed a collection with another embedding size or model, while the API keeps
+serving it, then switch every worker over at once.
+
+The chunks are embedded again into a shadow collection, which gets the same
+kind of ANN index as the live one. Chunks ingested or deleted in the meantime
+are caught up, and the shadow then takes over the collection's name in a
+single transaction. Running API workers switch when notified of it, or at the
+latest within COLLECTION_CHECK_SECONDS.
+The old collection is kept under a retired name unless --drop-retired is given.
+An interrupted run picks up where it stopped.
+
+Usage:
+    python scripts/migrate_embeddings.py --dimensions 512
+    python scripts/migrate_embeddings.py --collection portfolio_chunks --dimensions 256 --drop-retired
+    python scripts/migrate_embeddings.py --full-size
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.db import vector_index
+from app.db.collections import CollectionEmbedding
+from app.services.collection_migration import CollectionMigration
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+settings = get_settings()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="portfolio_chunks")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument("--dimensions", type=int, help="shortened embedding size, e.g. 256 or 512")
+    size.add_argument("--full-size", action="store_true", help="the model's full embedding size")
+    parser.add_argument(
+        "--quantization", choices=vector_index.QUANTIZATIONS,
+        help="quantization of the new ANN index (default: the collection's configured quantization)"
+    )
+    parser.add_argument("--page-size", type=int, default=1000, help="chunks read and committed at a time")
+    parser.add_argument("--drop-retired", action="store_true", help="delete the old collection after the switch")
+    args = parser.parse_args()
+
+    migration = CollectionMigration(
+        args.collection,
+        CollectionEmbedding(model=args.model, dimensions=None if args.full_size else args.dimensions),
+        page_size=args.page_size,
+        quantization=args.quantization,
+    )
+    summary = await migration.run(drop_retired=args.drop_retired)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())